@@ -7,18 +7,27 @@ import logging
 import json
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, BackgroundTasks, WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, BackgroundTasks, WebSocket, WebSocketDisconnect, Query, Header
+from typing import Dict, List, Optional
 
 # 의존성 및 스키마 임포트
 from core.estimation_service import MassEstimationService, mass_estimation_service
+from core.batch_scheduler import MicroBatchScheduler
+from core.admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from core.task_store import create_task_store
+from core.degradation import degradation_controller
 from .schemas import EstimationResponse, ErrorResponse, TaskStatus, TaskCreateResponse
 from config.settings import settings
+from config.profiles import PIPELINE_PROFILES, PipelineProfile, get_profile
+from utils.llm_cache import llm_response_cache
+from utils.density_table import density_table
+from utils.debug_writer import debug_writer
+from utils.image_decode import decode_image_bytes
 
 router = APIRouter()
 
-# 비동기 작업 저장소 (메모리 기반)
-task_store = {}
+# 비동기 작업 저장소 (settings.TASK_STORE_BACKEND에 따라 memory/sqlite/redis)
+task_store = create_task_store()
 
 # WebSocket 연결 관리자
 class WebSocketManager:
@@ -60,17 +69,84 @@ class WebSocketManager:
 # WebSocket 매니저 인스턴스 생성
 websocket_manager = WebSocketManager()
 
-# 스레드 풀 생성 (AI 모델 실행용)
-thread_pool = ThreadPoolExecutor(max_workers=2)
+# 스레드 풀 생성 (AI 모델 실행용, 수락 제어의 실행 슬롯 수와 같은 크기)
+thread_pool = ThreadPoolExecutor(
+    max_workers=settings.MAX_IN_FLIGHT_REQUESTS,
+    thread_name_prefix="pipeline"
+)
+
+# 요청 수락 제어 (실행 + 대기 한도 초과 시 429)
+admission_controller = AdmissionController(
+    max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS,
+    max_queued=settings.MAX_QUEUED_REQUESTS
+)
+
+# 마이크로 배치 스케줄러 (요청을 짧게 모아 YOLO/MiDaS 배치 추론)
+batch_scheduler = MicroBatchScheduler(mass_estimation_service)
 
 # 의존성 주입 함수
 def get_mass_estimation_service() -> MassEstimationService:
     return mass_estimation_service
 
+def get_pipeline_profile(
+    profile: Optional[str] = Query(None, description="파이프라인 프로필 (fast | balanced | accurate)"),
+    x_pipeline_profile: Optional[str] = Header(None, description="파이프라인 프로필 (쿼리 파라미터가 우선)"),
+) -> PipelineProfile:
+    """요청의 파이프라인 프로필 (쿼리 파라미터 > X-Pipeline-Profile 헤더 > DEFAULT_PIPELINE_PROFILE)"""
+    try:
+        return get_profile(profile or x_pipeline_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
 # 동기 함수를 비동기로 실행하는 헬퍼 함수
-def run_pipeline_sync(service, image, image_path):
+def run_pipeline_sync(service, image, image_path, profile: PipelineProfile = None):
     """동기 파이프라인을 별도 스레드에서 실행"""
-    return service.run_pipeline(image, image_path)
+    return service.run_pipeline(image, image_path, profile=profile)
+
+def decode_image(contents: bytes):
+    """업로드된 바이트를 긴 변 MAX_IMAGE_SIZE 이하의 OpenCV 이미지로 디코딩 (실패 시 None, 디코딩 정보)"""
+    return decode_image_bytes(contents, settings.MAX_IMAGE_SIZE)
+
+def reserve_admission() -> AdmissionTicket:
+    """요청 수락 슬롯을 예약합니다. 대기열이 가득 차면 429를 반환합니다."""
+    try:
+        return admission_controller.reserve()
+    except AdmissionRejected as e:
+        logging.warning(f"요청 거절 (429): {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(settings.RETRY_AFTER_SECONDS)},
+        )
+
+async def run_estimation(service: MassEstimationService, contents: bytes, filename: str, profile: PipelineProfile = None):
+    """
+    이미지 디코딩과 파이프라인을 이벤트 루프 밖에서 실행합니다.
+
+    Returns:
+        (디코딩된 이미지 또는 None, 파이프라인 결과 또는 None)
+        결과에는 원본 대비 디코딩 배율(image_info)과 처리 단계(degradation_tier)가 포함됩니다.
+        bbox는 디코딩된 이미지 좌표입니다.
+    """
+    loop = asyncio.get_running_loop()
+    image, image_info = await loop.run_in_executor(thread_pool, decode_image, contents)
+    if image is None:
+        return None, None
+
+    # 서버 부하(대기열 길이, 최근 p95)에 따른 처리 단계를 프로필에 적용
+    degradation_controller.update_load(
+        admission_controller.in_flight + admission_controller.queued, admission_controller.capacity
+    )
+    profile, tier = degradation_controller.apply(profile or get_profile())
+
+    # 마이크로 배치가 활성화되면 다른 요청과 모아서 배치 추론
+    if settings.MICRO_BATCH_ENABLED:
+        result = await batch_scheduler.submit(image, filename, profile)
+    else:
+        result = await loop.run_in_executor(thread_pool, run_pipeline_sync, service, image, filename, profile)
+    result["image_info"] = image_info
+    result["degradation_tier"] = tier
+    return image, result
 
 @router.get("/pipeline-status", summary="파이프라인 상태 확인")
 async def get_pipeline_status():
@@ -82,8 +158,19 @@ async def get_pipeline_status():
         "feature_extractor_loaded": hasattr(mass_estimation_service, 'feature_extractor'),
         "debug_mode": settings.DEBUG_MODE,
         "multimodal_enabled": settings.ENABLE_MULTIMODAL,
+        "inference_backend": settings.INFERENCE_BACKEND,
+        "default_pipeline_profile": settings.DEFAULT_PIPELINE_PROFILE,
+        "pipeline_profiles": {name: profile.model_dump() for name, profile in PIPELINE_PROFILES.items()},
         "llm_provider": settings.LLM_PROVIDER,
-        "llm_model": settings.LLM_MODEL_NAME
+        "llm_model": settings.LLM_MODEL_NAME,
+        "micro_batching": batch_scheduler.snapshot(),
+        "admission": admission_controller.snapshot(),
+        "degradation": degradation_controller.snapshot(),
+        "task_store": await task_store.asnapshot(),
+        "result_cache": mass_estimation_service.result_cache.snapshot(),
+        "llm_cache": llm_response_cache.snapshot(),
+        "density_table": density_table.snapshot(),
+        "debug_writer": debug_writer.snapshot()
     }
 
 @router.post(
@@ -92,6 +179,7 @@ async def get_pipeline_status():
     responses={
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse},
         status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ErrorResponse},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": ErrorResponse},
     },
     summary="음식 질량 추정",
     description="이미지 파일을 업로드하여 음식의 질량을 추정합니다.",
@@ -99,6 +187,7 @@ async def get_pipeline_status():
 async def estimate_mass(
     file: UploadFile = File(..., description="질량을 추정할 이미지 파일 (JPG, PNG 등)"),
     service: MassEstimationService = Depends(get_mass_estimation_service),
+    profile: PipelineProfile = Depends(get_pipeline_profile),
 ):
     """
     이미지 파일을 받아 질량 추정 파이프라인을 실행하고 결과를 반환합니다.
@@ -127,13 +216,16 @@ async def estimate_mass(
                 detail="업로드된 파일이 이미지 형식이 아닙니다. Content-Type을 확인해주세요.",
             )
 
+    # 대기열이 가득 차면 파일을 읽기 전에 429로 거절
+    ticket = reserve_admission()
+
     try:
         # 비동기적으로 파일 읽기
         contents = await file.read()
-        # 바이트 데이터를 numpy 배열로 변환
-        nparr = np.frombuffer(contents, np.uint8)
-        # numpy 배열을 OpenCV 이미지로 디코딩
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+        # 실행 슬롯을 얻은 뒤 디코딩과 파이프라인을 스레드 풀에서 실행
+        async with ticket:
+            image, result = await run_estimation(service, contents, file.filename, profile)
 
         if image is None:
             raise HTTPException(
@@ -141,9 +233,6 @@ async def estimate_mass(
                 detail="이미지 파일을 처리할 수 없습니다. 파일이 손상되었거나 지원하지 않는 형식일 수 있습니다.",
             )
 
-        # 서비스 실행
-        result = service.run_pipeline(image, image_path=file.filename)
-
         if "error" in result:
              raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -239,6 +328,10 @@ async def estimate_mass(
             filename=file.filename,
             detected_objects=detected_objects,
             mass_estimation=simplified_mass_estimation,
+            image_info=result.get("image_info"),
+            pipeline_profile=result.get("pipeline_profile"),
+            degradation_tier=result.get("degradation_tier"),
+            skipped_stages=result.get("skipped_stages", []),
         )
 
     except Exception as e:
@@ -247,6 +340,9 @@ async def estimate_mass(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"이미지 처리 중 예상치 못한 오류가 발생했습니다: {e}",
         )
+    finally:
+        # 파일 읽기 실패나 클라이언트 연결 끊김(취소)으로 슬롯을 얻기 전에 끝나도 예약을 반환
+        ticket.release()
 
 # === 비동기 엔드포인트 추가 ===
 
@@ -255,6 +351,7 @@ async def estimate_mass(
     response_model=TaskCreateResponse,
     responses={
         status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ErrorResponse},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": ErrorResponse},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse},
     },
     summary="비동기 음식 질량 추정",
@@ -263,6 +360,7 @@ async def estimate_mass(
 async def estimate_mass_async(
     file: UploadFile = File(..., description="질량을 추정할 이미지 파일 (JPG, PNG 등)"),
     service: MassEstimationService = Depends(get_mass_estimation_service),
+    profile: PipelineProfile = Depends(get_pipeline_profile),
 ):
     """비동기적으로 질량 추정 작업을 시작합니다."""
     try:
@@ -290,23 +388,31 @@ async def estimate_mass_async(
                     detail="업로드된 파일이 이미지 형식이 아닙니다. Content-Type을 확인해주세요.",
                 )
 
-        task_id = str(uuid.uuid4())
-        
-        # 작업 초기화
-        task_store[task_id] = {
-            "status": "pending",
-            "progress": 0.0,
-            "message": "작업이 시작되었습니다.",
-            "created_at": datetime.now().isoformat(),
-            "result": None,
-            "error": None
-        }
-        
-        # 파일 내용을 미리 읽어서 저장
-        file_contents = await file.read()
+        # 대기열이 가득 차면 작업을 만들지 않고 429로 거절
+        ticket = reserve_admission()
+
+        try:
+            # 파일 내용을 미리 읽어서 저장
+            file_contents = await file.read()
+
+            task_id = str(uuid.uuid4())
+
+            # 작업 초기화
+            await task_store.acreate(task_id, {
+                "status": "pending",
+                "progress": 0.0,
+                "message": "작업이 시작되었습니다.",
+                "created_at": datetime.now().isoformat(),
+                "result": None,
+                "error": None
+            })
+        except BaseException:
+            # 백그라운드 작업에 넘기기 전에 실패하면(읽기 오류, 연결 끊김, 저장소 오류) 예약을 반환
+            ticket.release()
+            raise
         
-        # 비동기 작업 시작 (asyncio.create_task 사용)
-        asyncio.create_task(process_estimation_task(task_id, file_contents, file.filename, service))
+        # 비동기 작업 시작 (asyncio.create_task 사용, 예약한 슬롯은 작업이 반환)
+        asyncio.create_task(process_estimation_task(task_id, file_contents, file.filename, service, ticket, profile))
         
         if settings.DEBUG_MODE:
             logging.info(f"비동기 작업 시작: {task_id}")
@@ -342,13 +448,13 @@ async def estimate_mass_async(
 )
 async def get_task_status(task_id: str):
     """비동기 작업의 상태를 확인합니다."""
-    if task_id not in task_store:
+    task = await task_store.aget(task_id)
+    if task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="작업을 찾을 수 없습니다."
         )
     
-    task = task_store[task_id]
     return TaskStatus(
         task_id=task_id,
         status=task["status"],
@@ -369,11 +475,12 @@ async def websocket_task_status(websocket: WebSocket, task_id: str):
     
     try:
         # 초기 상태 전송
-        if task_id in task_store:
+        task = await task_store.aget(task_id)
+        if task is not None:
             initial_status = {
                 "type": "task_status",
                 "task_id": task_id,
-                "data": task_store[task_id]
+                "data": task
             }
             await websocket.send_text(json.dumps(initial_status, ensure_ascii=False))
         
@@ -392,59 +499,57 @@ async def websocket_task_status(websocket: WebSocket, task_id: str):
 
 # === 기존 process_estimation_task 함수 수정 ===
 
-async def process_estimation_task(task_id: str, file_contents: bytes, filename: str, service: MassEstimationService):
-    """백그라운드에서 질량 추정 작업을 처리합니다."""
+async def process_estimation_task(task_id: str, file_contents: bytes, filename: str, service: MassEstimationService,
+                                  ticket: AdmissionTicket, profile: PipelineProfile = None):
+    """
+    백그라운드에서 질량 추정 작업을 처리합니다.
+    ticket은 요청 핸들러에서 예약한 수락 슬롯이며, 작업이 끝나면 반환합니다.
+    """
     try:
         # 작업 상태 업데이트
-        task_store[task_id]["status"] = "processing"
-        task_store[task_id]["progress"] = 0.1
-        task_store[task_id]["message"] = "이미지 파일을 읽는 중..."
+        task = await task_store.aupdate(
+            task_id,
+            status="processing",
+            progress=0.1,
+            message="이미지 파일을 읽는 중..."
+        )
         
         # WebSocket으로 상태 업데이트 전송
         await websocket_manager.send_task_update(task_id, {
             "type": "task_update",
             "task_id": task_id,
-            "data": task_store[task_id]
+            "data": task
         })
         
-        if settings.DEBUG_MODE:
-            logging.info(f"작업 {task_id}: 이미지 파일 읽기 시작")
-        
-        # 파일 내용을 numpy 배열로 변환
-        nparr = np.frombuffer(file_contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
+        # 실행 슬롯을 얻은 뒤 디코딩과 파이프라인 실행 (마이크로 배치 또는 별도 스레드에서)
+        async with ticket:
+            task = await task_store.aupdate(task_id, progress=0.3, message="AI 모델로 이미지를 분석하는 중...")
+
+            # WebSocket으로 상태 업데이트 전송
+            await websocket_manager.send_task_update(task_id, {
+                "type": "task_update",
+                "task_id": task_id,
+                "data": task
+            })
+
+            if settings.DEBUG_MODE:
+                logging.info(f"작업 {task_id}: AI 파이프라인 실행 시작")
+
+            image, result = await run_estimation(service, file_contents, filename, profile)
+
         if image is None:
             raise Exception("이미지 파일을 처리할 수 없습니다.")
         
-        task_store[task_id]["progress"] = 0.3
-        task_store[task_id]["message"] = "AI 모델로 이미지를 분석하는 중..."
-        
-        # WebSocket으로 상태 업데이트 전송
-        await websocket_manager.send_task_update(task_id, {
-            "type": "task_update",
-            "task_id": task_id,
-            "data": task_store[task_id]
-        })
-        
-        if settings.DEBUG_MODE:
-            logging.info(f"작업 {task_id}: AI 파이프라인 실행 시작")
-        
-        # 파이프라인 실행 (별도 스레드에서)
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(thread_pool, run_pipeline_sync, service, image, filename)
-        
         if "error" in result:
             raise Exception(result["error"])
         
-        task_store[task_id]["progress"] = 0.8
-        task_store[task_id]["message"] = "결과를 정리하는 중..."
+        task = await task_store.aupdate(task_id, progress=0.8, message="결과를 정리하는 중...")
         
         # WebSocket으로 상태 업데이트 전송
         await websocket_manager.send_task_update(task_id, {
             "type": "task_update",
             "task_id": task_id,
-            "data": task_store[task_id]
+            "data": task
         })
         
         # numpy 타입을 Python 기본 타입으로 변환
@@ -530,25 +635,36 @@ async def process_estimation_task(task_id: str, file_contents: bytes, filename:
             filename=filename,
             detected_objects=detected_objects,
             mass_estimation=simplified_mass_estimation,
+            image_info=result.get("image_info"),
+            pipeline_profile=result.get("pipeline_profile"),
+            degradation_tier=result.get("degradation_tier"),
+            skipped_stages=result.get("skipped_stages", []),
         )
         
-        task_store[task_id]["progress"] = 1.0
-        task_store[task_id]["status"] = "completed"
-        task_store[task_id]["message"] = "작업이 완료되었습니다."
-        task_store[task_id]["completed_at"] = datetime.now().isoformat()
-        task_store[task_id]["result"] = final_result
+        # 저장소는 JSON 직렬화 가능한 값만 저장하므로 dict로 변환하여 저장
+        task = await task_store.aupdate(
+            task_id,
+            progress=1.0,
+            status="completed",
+            message="작업이 완료되었습니다.",
+            completed_at=datetime.now().isoformat(),
+            result=final_result.dict()
+        )
+        if task is None:
+            logging.warning(f"작업 {task_id}: 저장소에서 만료되어 결과를 저장하지 못했습니다.")
+            return
         
-        # WebSocket으로 최종 결과 전송 (dict로 변환)
+        # WebSocket으로 최종 결과 전송
         completion_message = {
             "type": "task_completed",
             "task_id": task_id,
             "data": {
-                "status": task_store[task_id]["status"],
-                "progress": task_store[task_id]["progress"],
-                "message": task_store[task_id]["message"],
-                "created_at": task_store[task_id]["created_at"],
-                "completed_at": task_store[task_id]["completed_at"],
-                "result": final_result.dict()  # <-- 여기서 dict로 변환
+                "status": task["status"],
+                "progress": task["progress"],
+                "message": task["message"],
+                "created_at": task["created_at"],
+                "completed_at": task["completed_at"],
+                "result": task["result"]
             }
         }
         await websocket_manager.send_task_update(task_id, completion_message)
@@ -557,16 +673,22 @@ async def process_estimation_task(task_id: str, file_contents: bytes, filename:
             logging.info(f"작업 {task_id}: 성공적으로 완료")
         
     except Exception as e:
-        task_store[task_id]["status"] = "failed"
-        task_store[task_id]["error"] = str(e)
-        task_store[task_id]["completed_at"] = datetime.now().isoformat()
+        task = await task_store.aupdate(
+            task_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
         
         # WebSocket으로 오류 상태 전송
         await websocket_manager.send_task_update(task_id, {
             "type": "task_failed",
             "task_id": task_id,
-            "data": task_store[task_id]
+            "data": task
         })
         
         if settings.DEBUG_MODE:
-            logging.error(f"작업 {task_id}: 실패 - {e}") 
\ No newline at end of file
+            logging.error(f"작업 {task_id}: 실패 - {e}")
+    finally:
+        # 슬롯을 얻기 전에 실패한 경우에도 예약을 반환
+        ticket.release()
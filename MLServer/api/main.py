@@ -6,8 +6,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from . import endpoints
 from .schemas import HealthCheckResponse
 from core.estimation_service import mass_estimation_service
+from core.task_store import run_sweeper
+from core.degradation import MIDAS_LADDER
+from config.profiles import get_profile
+from utils.debug_writer import debug_writer
 from config.settings import settings
 import logging
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,10 +38,33 @@ async def lifespan(app: FastAPI):
     else:
         logging.error("핵심 서비스 초기화에 실패했습니다.")
 
+    # 부하가 높을 때 단계를 낮추면서 모델을 로드하지 않도록 작은 MiDaS 모델을 미리 로드
+    if settings.DEGRADATION_ENABLED:
+        default_model = get_profile().midas_model_type
+        start = MIDAS_LADDER.index(default_model) + 1 if default_model in MIDAS_LADDER else 0
+        for model_type in MIDAS_LADDER[start:]:
+            await asyncio.to_thread(mass_estimation_service.midas_model.load_variant, model_type)
+
+    # 마이크로 배치 스케줄러 시작
+    if settings.MICRO_BATCH_ENABLED:
+        endpoints.batch_scheduler.start()
+
+    # 만료된 비동기 작업 정리 루프 시작
+    sweeper = asyncio.create_task(run_sweeper(endpoints.task_store))
+
     print("="*50)
     yield
     # --- 서버 종료 시 실행될 코드 ---
     logging.info("서버를 종료합니다.")
+    await endpoints.batch_scheduler.stop()
+    sweeper.cancel()
+    try:
+        await sweeper
+    except asyncio.CancelledError:
+        pass
+    endpoints.task_store.close()
+    # 남은 디버그 시각화 저장 완료 대기
+    await asyncio.to_thread(debug_writer.flush)
 
 
 app = FastAPI(
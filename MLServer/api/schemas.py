@@ -25,6 +25,10 @@ class EstimationResponse(BaseModel):
     filename: str
     detected_objects: Dict[str, int] = Field(description="감지된 객체 개수")
     mass_estimation: Dict[str, Any] = Field(description="질량 추정 결과")
+    image_info: Optional[Dict[str, Any]] = Field(None, description="디코딩 정보 (원본/디코딩 크기, 배율)")
+    pipeline_profile: Optional[str] = Field(None, description="사용한 파이프라인 프로필 (fast | balanced | accurate)")
+    degradation_tier: Optional[str] = Field(None, description="서버 부하에 따른 처리 단계 (normal | reduced | minimal)")
+    skipped_stages: List[str] = Field(default_factory=list, description="필요 없어 실행하지 않은 파이프라인 단계 (예: depth, features)")
 
 class ErrorResponse(BaseModel):
     """오류 발생 시 API 응답 모델"""
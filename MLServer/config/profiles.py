@@ -0,0 +1,82 @@
+"""
+파이프라인 프로필 (품질/지연시간 단계)
+요청마다 프로필을 선택해 MiDaS 모델 종류, YOLO 입력 크기, 멀티모달 검증 여부, LLM 호출 수를 정합니다.
+- fast: 모바일 빠른 기록용 (MiDaS_small, 멀티모달 없음, LLM 최대 1회)
+- balanced: 일반 요청용 (DPT_Hybrid, 통합 밀도 조회 + 멀티모달)
+- accurate: 상세 분석 화면용 (DPT_Large, 음식별 밀도 조회 + 멀티모달)
+요청에 프로필이 없으면 settings.DEFAULT_PIPELINE_PROFILE을 사용합니다.
+"""
+
+from typing import Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from config.settings import settings
+
+
+class PipelineProfile(BaseModel):
+    """파이프라인 프로필 (불변)"""
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    midas_model_type: str  # MiDaS_small | DPT_Hybrid | DPT_Large (종류별로 한 번만 로드)
+    yolo_image_size: Optional[int] = None  # YOLO 추론 입력 크기 (None이면 모델 기본값)
+    enable_multimodal: bool = True  # settings.ENABLE_MULTIMODAL이 False면 항상 비활성화
+    llm_request_mode: Optional[str] = None  # per_food | combined (None이면 settings.LLM_REQUEST_MODE)
+    max_llm_calls: Optional[int] = None  # 요청당 LLM 호출 한도 (None이면 제한 없음)
+
+    @property
+    def multimodal_enabled(self) -> bool:
+        return settings.ENABLE_MULTIMODAL and self.enable_multimodal
+
+    @property
+    def request_mode(self) -> str:
+        return self.llm_request_mode or settings.LLM_REQUEST_MODE
+
+    def fingerprint(self) -> str:
+        """결과 캐시 키에 포함할 프로필 설정값"""
+        return "|".join([
+            self.name,
+            self.midas_model_type,
+            str(self.yolo_image_size),
+            str(self.multimodal_enabled),
+            self.request_mode,
+            str(self.max_llm_calls),
+        ])
+
+
+PIPELINE_PROFILES: Dict[str, PipelineProfile] = {
+    "fast": PipelineProfile(
+        name="fast",
+        midas_model_type="MiDaS_small",
+        yolo_image_size=480,
+        enable_multimodal=False,
+        llm_request_mode="combined",
+        max_llm_calls=1,
+    ),
+    "balanced": PipelineProfile(
+        name="balanced",
+        midas_model_type="DPT_Hybrid",
+        enable_multimodal=True,
+        llm_request_mode="combined",
+        max_llm_calls=2,
+    ),
+    "accurate": PipelineProfile(
+        name="accurate",
+        midas_model_type=settings.MIDAS_MODEL_TYPE,
+        enable_multimodal=True,
+    ),
+}
+
+
+def get_profile(name: str = None) -> PipelineProfile:
+    """
+    이름으로 프로필을 찾습니다. (None이면 settings.DEFAULT_PIPELINE_PROFILE)
+
+    Raises:
+        ValueError: 알 수 없는 프로필 이름
+    """
+    name = (name or settings.DEFAULT_PIPELINE_PROFILE).strip().lower()
+    if name not in PIPELINE_PROFILES:
+        raise ValueError(f"알 수 없는 파이프라인 프로필입니다: {name} (사용 가능: {', '.join(PIPELINE_PROFILES)})")
+    return PIPELINE_PROFILES[name]
@@ -37,6 +37,11 @@ class Settings(BaseSettings):
     # 모델 설정
     YOLO_MODEL_PATH: Path = ROOT_DIR / "weights/yolo_food_v1.pt"
     MIDAS_MODEL_TYPE: str = "DPT_Large"
+    INFERENCE_BACKEND: str = "torch"  # torch: PyTorch eager | onnx: ONNX로 한 번 내보낸 뒤 onnxruntime CPU로 추론
+    ONNX_CACHE_DIR: Path = ROOT_DIR / "weights/onnx"  # 내보낸 ONNX 모델 보관 위치 (가중치가 바뀌면 다시 내보냄)
+    ONNX_INTRA_OP_THREADS: int = 0  # 연산 내부 병렬 스레드 수 (0이면 onnxruntime 기본값: 물리 코어 수)
+    ONNX_INTER_OP_THREADS: int = 0  # 독립 연산 간 병렬 스레드 수 (0이면 onnxruntime 기본값)
+    ONNX_GRAPH_OPTIMIZATION: str = "all"  # 그래프 최적화 수준: disable | basic | extended | all
     
     # LLM 설정
     LLM_PROVIDER: str = "gemini"
@@ -44,6 +49,15 @@ class Settings(BaseSettings):
     MULTIMODAL_MODEL_NAME: str | None = "gemini-2.5-flash"  # 멀티모달도 동일한 모델 사용
     LLM_TEMPERATURE: float = 0.0  # 완전히 결정론적
     LLM_TOP_P: float = 0.0  # 완전히 결정론적 (top_p=0은 가장 확실한 토큰만 선택)
+    LLM_MAX_CONCURRENCY: int = 4  # 음식별 LLM 호출의 최대 동시 실행 수
+    LLM_CALL_TIMEOUT_SECONDS: float = 30.0  # 음식별 LLM 호출 제한 시간, 실행 시작 시점부터 계산 (초과 시 기본값 사용)
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 60.0  # 다른 요청의 호출로 풀이 막혀 실행을 시작하지 못한 호출의 최대 대기 시간
+    LLM_REQUEST_MODE: str = "per_food"  # per_food: 음식별 요청 | combined: 이미지당 한 번의 통합 요청
+    LLM_ROI_CROP_ENABLED: bool = True  # LLM에 전체 프레임 대신 음식(검증 시 음식+기준 물체) 영역만 잘라서 전송
+    LLM_CROP_MARGIN_RATIO: float = 0.15  # 잘라낼 때 bbox 긴 변 대비 주변 여백 비율
+    LLM_PAYLOAD_MAX_BYTES: int = 200_000  # LLM 이미지 JPEG 바이트 예산 (품질을 낮춰 맞춤)
+    LLM_JPEG_QUALITY_MAX: int = 90
+    LLM_JPEG_QUALITY_MIN: int = 50
     
     # API 키 설정
     GEMINI_API_KEY: str | None = None
@@ -51,13 +65,16 @@ class Settings(BaseSettings):
     
     # 파이프라인 설정
     PIPELINE_VERSION: str = "1.0.0"
-    ENABLE_MULTIMODAL: bool = True
+    ENABLE_MULTIMODAL: bool = True  # False면 모든 프로필에서 멀티모달 검증 비활성화
+    DEFAULT_PIPELINE_PROFILE: str = "accurate"  # 요청에 프로필이 없을 때 사용 (fast | balanced | accurate, config/profiles.py)
     DEBUG_MODE: bool = True
     SIMPLE_DEBUG: bool = False
+    DEBUG_WRITER_QUEUE_SIZE: int = 8  # 디버그 시각화 저장 대기 작업 수 (가득 차면 버림)
+    DEBUG_WRITER_FLUSH_TIMEOUT_S: float = 5.0  # 종료 시 남은 시각화 저장을 기다리는 최대 시간
     SAVE_RESULTS: bool = True
     
     # 이미지 처리 설정
-    MAX_IMAGE_SIZE: int = 1920
+    MAX_IMAGE_SIZE: int = 1920  # 디코딩 시 긴 변 최대 픽셀 (JPEG는 DCT 축소 디코딩, 0이면 제한 없음)
     CONFIDENCE_THRESHOLD: float = 0.25
     
     # 파일 경로 설정
@@ -83,9 +100,22 @@ class Settings(BaseSettings):
     DENSITY_VALIDATION_MIN: float = 0.1
     DENSITY_VALIDATION_MAX: float = 3.0
     DENSITY_FALLBACK_VALUE: float = 1.0
+    DENSITY_TABLE_ENABLED: bool = True  # LLM 조회 전에 로컬 밀도 테이블을 먼저 사용
+    DENSITY_TABLE_PATH: Path = DATA_DIR / "food_density_table.csv"  # scripts/build_density_table.py로 생성
+    DENSITY_TABLE_MIN_SCORE: float = 0.75  # 이 유사도 미만이면 미스로 보고 LLM 조회
+    DENSITY_TABLE_MIN_CONFIDENCE: float = 0.6  # 항목 신뢰도 × 유사도가 이 값 미만이면 LLM 조회 (LLM 실패 시에만 사용)
     
     # 모델 입력 크기
     MIDAS_INPUT_SIZE: int = 384
+    DEPTH_NATIVE_RESOLUTION: bool = True  # 깊이 맵을 MiDaS 출력 해상도로 유지 (원본 크기 보간은 디버그 시각화에서만 수행)
+    DEPTH_ROI_ENABLED: bool = True  # 감지된 음식/기준 물체 bbox 합집합 + 여백만 MiDaS로 추론 (감지된 객체가 없으면 깊이 추정 생략)
+    DEPTH_ROI_MARGIN_RATIO: float = 0.1  # 깊이 추정 영역의 bbox 긴 변 대비 주변 여백 비율
+    MIDAS_QUANTIZATION: str = "none"  # none | dynamic: Linear 계층 INT8 | static: 보정 이미지로 INT8 변환 (CPU 전용, torch 백엔드)
+    MIDAS_CALIBRATION_DIR: Path = DATA_DIR / "calibration"  # 정적 양자화 보정용 샘플 식사 사진 폴더
+    MIDAS_CALIBRATION_MAX_IMAGES: int = 32  # 정적 양자화 보정에 사용할 최대 이미지 수
+    MODEL_REGISTRY_DIR: Path = DATA_DIR / "models"  # MiDaS 코드/가중치 로컬 저장소 (scripts/populate_model_registry.py로 채움)
+    MODEL_REGISTRY_OFFLINE: bool = False  # True면 저장소에 없는 모델을 네트워크로 받지 않고 로드 실패 처리
+    MODEL_REGISTRY_REQUIRE_PINNED: bool = False  # True면 manifest.json에 해시가 고정되지 않은 모델은 받지 않음 (False면 처음 받은 파일의 해시로 고정)
     
     # 계산 설정
     MINIMUM_CONFIDENCE_THRESHOLD: float = 0.3
@@ -118,8 +148,55 @@ class Settings(BaseSettings):
     REFERENCE_OBJECTS_DB_PATH: Path = DATA_DIR / "reference_objects.json"
     
     # 성능 설정
-    BATCH_SIZE: int = 1
+    BATCH_SIZE: int = 4  # YOLO/MiDaS 배치 추론 시 한 번의 forward pass에 넣을 최대 이미지 수
     USE_GPU: bool = True
+    PIPELINE_STAGE_WORKERS: int = 4  # 독립적인 파이프라인 단계를 동시에 실행할 스레드 수
+
+    # 마이크로 배치 설정 (/estimate, /estimate_async 요청을 짧은 시간 모아 배치 추론)
+    MICRO_BATCH_ENABLED: bool = True
+    MICRO_BATCH_WINDOW_MS: float = 20.0  # 첫 요청 이후 추가 요청을 기다리는 최대 시간
+    MICRO_BATCH_MAX_SIZE: int = 4  # 한 배치에 모을 최대 이미지 수
+
+    # 요청 수락 제어 (한도 초과 시 429 + Retry-After)
+    MAX_IN_FLIGHT_REQUESTS: int = 4  # 동시에 파이프라인을 실행할 최대 요청 수 (파이프라인 스레드 풀 크기)
+    MAX_QUEUED_REQUESTS: int = 16  # 실행 슬롯을 기다릴 수 있는 최대 요청 수
+    RETRY_AFTER_SECONDS: int = 5  # 429 응답의 Retry-After 값
+
+    # 부하 적응형 품질 단계 (core/degradation.py, normal -> reduced -> minimal)
+    DEGRADATION_ENABLED: bool = True
+    DEGRADATION_QUEUE_HIGH_RATIO: float = 0.75  # (실행 + 대기) / 수락 한도가 이 이상이면 한 단계 낮춤
+    DEGRADATION_QUEUE_LOW_RATIO: float = 0.25  # 이 이하이고 p95도 낮으면 한 단계 올림
+    DEGRADATION_P95_HIGH_FACTOR: float = 2.0  # 프로필별 최근 전체 소요시간 p95가 기준 소요시간의 이 배수 이상이면 한 단계 낮춤
+    DEGRADATION_P95_LOW_FACTOR: float = 1.3  # 모든 프로필이 이 배수 이하이고 대기열도 짧으면 한 단계 올림
+    DEGRADATION_BASELINE_MS: dict[str, float] = {"fast": 3000.0, "balanced": 8000.0, "accurate": 20000.0}  # 측정 전 사용할 프로필별 기준 소요시간
+    DEGRADATION_BASELINE_SAMPLES: int = 50  # 한가할 때(normal 단계, 대기열 짧음) 측정한 최근 소요시간 중 기준값(중앙값) 계산에 쓸 개수
+    DEGRADATION_BASELINE_MIN_SAMPLES: int = 5  # 측정값이 이보다 적으면 DEGRADATION_BASELINE_MS 사용
+    DEGRADATION_WINDOW_SECONDS: float = 60.0  # p95 계산에 사용할 최근 소요시간 기록 범위
+    DEGRADATION_MIN_DWELL_SECONDS: float = 30.0  # 단계를 바꾼 뒤 다음 변경까지 최소 유지 시간
+
+    # 비동기 작업 저장소 설정 (memory | sqlite | redis)
+    TASK_STORE_BACKEND: str = "memory"  # 여러 워커를 띄울 경우 sqlite(같은 노드) 또는 redis 사용
+    TASK_STORE_MAX_ENTRIES: int = 1000  # memory 백엔드의 최대 작업 수 (LRU)
+    TASK_STORE_ACTIVE_TTL_SECONDS: int = 3600  # 대기/처리 중인 작업의 만료 시간
+    TASK_STORE_RESULT_TTL_SECONDS: int = 600  # 완료/실패한 작업 결과의 보관 시간
+    TASK_STORE_SWEEP_INTERVAL_SECONDS: float = 60.0  # 만료 작업 정리 주기
+    TASK_STORE_SQLITE_PATH: Path = DATA_DIR / "task_store.sqlite3"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    TASK_STORE_REDIS_PREFIX: str = "mlserver:task:"
+
+    # 파이프라인 결과 캐시 (같은 이미지 재업로드 시 저장된 결과 반환)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_PATH: Path = DATA_DIR / "cache" / "pipeline_results.sqlite3"
+    RESULT_CACHE_MEMORY_ENTRIES: int = 256  # 메모리 LRU 최대 항목 수
+    RESULT_CACHE_MAX_DISK_MB: int = 256  # 디스크 계층 최대 크기
+    RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # LLM 응답 캐시 (모델/생성 설정/프롬프트/이미지가 같으면 저장된 응답 사용)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Path = DATA_DIR / "cache" / "llm_responses.sqlite3"
+    LLM_CACHE_MEMORY_ENTRIES: int = 512
+    LLM_CACHE_MAX_DISK_MB: int = 128
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
 
     @field_validator('YOLO_MODEL_PATH')
     @classmethod
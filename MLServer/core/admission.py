@@ -0,0 +1,98 @@
+"""
+요청 수락(admission) 제어
+동시에 실행 중인 요청과 대기 중인 요청 수를 제한하고, 한도를 넘으면 즉시 거절하여
+요청이 무한정 쌓이지 않도록 합니다. (API에서는 429 + Retry-After로 응답)
+"""
+
+import asyncio
+from typing import Dict
+
+
+class AdmissionRejected(Exception):
+    """실행 + 대기 한도를 초과하여 요청을 받을 수 없음"""
+
+
+class AdmissionTicket:
+    """
+    수락된 요청 하나에 대한 예약.
+    예약 시점에는 '대기' 상태로 집계되며, async with로 진입하면 실행 슬롯을 얻을 때까지 기다린 뒤 '실행 중'으로 전환됩니다.
+    """
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._state = "queued"  # queued -> running -> released
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        try:
+            await self._controller._semaphore.acquire()
+        except BaseException:
+            self.release()
+            raise
+        self._controller._queued -= 1
+        self._controller._in_flight += 1
+        self._state = "running"
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """예약 또는 실행 슬롯을 반환합니다. (여러 번 호출해도 안전)"""
+        if self._state == "queued":
+            self._controller._queued -= 1
+        elif self._state == "running":
+            self._controller._in_flight -= 1
+            self._controller._semaphore.release()
+        self._state = "released"
+
+
+class AdmissionController:
+    """
+    실행 중 요청 수(max_in_flight)와 대기 요청 수(max_queued)를 제한하는 컨트롤러.
+    이벤트 루프 안에서만 사용합니다.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max(0, max_queued)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._queued = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_in_flight + self.max_queued
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def reserve(self) -> AdmissionTicket:
+        """
+        요청 하나를 예약합니다.
+
+        Raises:
+            AdmissionRejected: 실행 + 대기 한도를 초과한 경우
+        """
+        if self._in_flight + self._queued >= self.capacity:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"처리 대기열이 가득 찼습니다 (실행 {self._in_flight}/{self.max_in_flight}, 대기 {self._queued}/{self.max_queued})."
+            )
+        self._queued += 1
+        return AdmissionTicket(self)
+
+    def snapshot(self) -> Dict:
+        """현재 대기열 상태"""
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "rejected_total": self.rejected,
+        }
@@ -0,0 +1,200 @@
+"""
+마이크로 배치 스케줄러
+짧은 시간 창(window) 동안 들어온 요청 이미지를 모아 YOLO/MiDaS를 배치로 추론하고,
+이후 단계(특징 추출, LLM 질량 추정, 멀티모달 검증)는 이미지별로 병렬 실행하여 요청마다 결과를 돌려줍니다.
+프로필마다 YOLO 입력 크기와 MiDaS 모델이 다르므로 한 배치는 같은 프로필의 요청끼리만 묶습니다.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+from config.profiles import PipelineProfile, get_profile
+from utils.metrics import Histogram
+
+# 큐 대기 시간(ms) 히스토그램 버킷
+QUEUE_WAIT_BUCKETS_MS = (1, 2, 5, 10, 20, 30, 50, 100, 250, 500, 1000, 5000)
+
+
+class _PendingRequest:
+    """배치를 기다리는 단일 요청"""
+
+    def __init__(self, image: np.ndarray, image_path: Optional[str], future: asyncio.Future,
+                 cache_key: Optional[str] = None, profile: PipelineProfile = None):
+        self.image = image
+        self.image_path = image_path
+        self.future = future
+        self.cache_key = cache_key
+        self.profile = profile or get_profile()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatchScheduler:
+    """
+    요청을 모아 배치 추론하는 스케줄러.
+    - 첫 요청이 들어온 뒤 window_ms가 지나거나 max_batch_size개가 모이면 배치를 실행합니다.
+    - 배치 실행 중에도 다음 배치를 계속 수집합니다.
+    - 큐 대기 시간과 배치 크기 히스토그램을 제공합니다.
+    """
+
+    def __init__(self, service, window_ms: float = None, max_batch_size: int = None):
+        """
+        Args:
+            service: run_batched_inference()/run_pipeline()을 제공하는 MassEstimationService
+            window_ms: 배치 수집 시간 창 (기본값: settings.MICRO_BATCH_WINDOW_MS)
+            max_batch_size: 최대 배치 크기 (기본값: settings.MICRO_BATCH_MAX_SIZE)
+        """
+        self.service = service
+        self.window_ms = window_ms if window_ms is not None else settings.MICRO_BATCH_WINDOW_MS
+        self.max_batch_size = max(1, max_batch_size or settings.MICRO_BATCH_MAX_SIZE)
+
+        # 배치 앞단 1개 + 이미지별 후단을 동시에 실행할 수 있는 스레드 풀
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_batch_size + 1,
+            thread_name_prefix="micro-batch"
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_tasks: set = set()  # 실행 중인 배치 작업 (GC 방지용 참조)
+
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.batch_size = Histogram(range(1, self.max_batch_size + 1))
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        """현재 이벤트 루프에서 배치 수집 작업을 시작합니다."""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._collect_batches())
+        logging.info(f"마이크로 배치 스케줄러 시작: window={self.window_ms}ms, max_batch_size={self.max_batch_size}")
+
+    async def stop(self) -> None:
+        """배치 수집 작업을 중지합니다. 대기 중인 요청은 취소됩니다."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        logging.info("마이크로 배치 스케줄러 종료")
+
+    async def submit(self, image: np.ndarray, image_path: str = None, profile: PipelineProfile = None) -> Dict:
+        """
+        이미지를 큐에 넣고 파이프라인 결과를 기다립니다.
+        결과 캐시에 있는 이미지는 배치에 넣지 않고 바로 반환합니다.
+        profile이 None이면 기본 프로필을 사용합니다.
+
+        Returns:
+            run_pipeline()과 같은 형식의 결과 딕셔너리
+        """
+        if not self.is_running:
+            self.start()
+        profile = profile or get_profile()
+        cache_key, cached = await asyncio.to_thread(self.service.lookup_cached_result, image, profile)
+        if cached is not None:
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingRequest(image, image_path, future, cache_key, profile))
+        return await future
+
+    def snapshot(self) -> Dict:
+        """튜닝용 상태 정보"""
+        return {
+            "enabled": settings.MICRO_BATCH_ENABLED,
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+    async def _collect_batches(self) -> None:
+        """요청을 배치 단위로 모아 실행하는 루프"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 연결이 끊겨 취소된 요청은 제외
+            batch = [request for request in batch if not request.future.done()]
+            if not batch:
+                continue
+
+            now = time.perf_counter()
+            for request in batch:
+                self.queue_wait_ms.observe((now - request.enqueued_at) * 1000.0)
+            self.batch_size.observe(len(batch))
+
+            # 프로필별로 나눠 배치 실행은 별도 작업으로 넘기고 곧바로 다음 배치 수집
+            # (부하 단계에 따라 낮춘 프로필은 이름이 같아도 설정이 다르므로 이름이 아닌 프로필 전체로 구분)
+            groups: Dict[PipelineProfile, List[_PendingRequest]] = {}
+            for request in batch:
+                groups.setdefault(request.profile, []).append(request)
+            for group in groups.values():
+                task = asyncio.create_task(self._run_batch(group))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[_PendingRequest]) -> None:
+        """같은 프로필의 배치 앞단을 한 번에 추론한 뒤, 이미지별 후단을 병렬로 실행하여 각 요청의 결과를 설정"""
+        loop = asyncio.get_running_loop()
+        images = [request.image for request in batch]
+        profile = batch[0].profile
+        if settings.DEBUG_MODE:
+            logging.info(f"마이크로 배치 실행: 이미지 {len(images)}장 (프로필: {profile.name})")
+
+        try:
+            precomputed, batch_timings = await loop.run_in_executor(
+                self._executor, self.service.run_batched_inference, images, profile
+            )
+        except Exception as e:
+            logging.error(f"마이크로 배치 추론 중 오류 발생: {e}", exc_info=True)
+            for request in batch:
+                self._resolve(request, {"error": f"서버 내부 오류가 발생했습니다: {e}"})
+            return
+
+        await asyncio.gather(*[
+            self._run_tail(request, image_precomputed, batch_timings)
+            for request, image_precomputed in zip(batch, precomputed)
+        ])
+
+    async def _run_tail(self, request: _PendingRequest, precomputed: Dict, batch_timings: Dict[str, float]) -> None:
+        """이미지 한 장의 나머지 파이프라인을 실행"""
+        loop = asyncio.get_running_loop()
+        run = functools.partial(
+            self.service.run_pipeline, request.image, request.image_path,
+            precomputed=precomputed, precomputed_timings=batch_timings, cache_key=request.cache_key,
+            profile=request.profile
+        )
+        try:
+            result = await loop.run_in_executor(self._executor, run)
+        except Exception as e:
+            logging.error(f"파이프라인 실행 중 오류 발생: {e}", exc_info=True)
+            result = {"error": f"서버 내부 오류가 발생했습니다: {e}"}
+        self._resolve(request, result)
+
+    @staticmethod
+    def _resolve(request: _PendingRequest, result: Dict) -> None:
+        if not request.future.done():
+            request.future.set_result(result)
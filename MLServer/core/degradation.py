@@ -0,0 +1,188 @@
+"""
+부하 적응형 품질 단계 (degradation) 제어
+대기열 길이와 프로필별 최근 파이프라인 소요시간 p95를 보고 서버 전체의 처리 단계를 조정합니다.
+- normal: 요청한 프로필 그대로
+- reduced: MiDaS 한 단계 작은 모델, 멀티모달 검증 생략
+- minimal: MiDaS_small, 멀티모달 검증 생략, 밀도는 통합 요청 LLM 1회 이하 (fast 프로필 수준)
+p95는 프로필마다 정상 소요시간이 크게 다르므로(accurate는 평소에도 수 초 이상) 고정 ms가 아니라
+프로필별 기준 소요시간 대비 배수로 판단합니다. 기준 소요시간은 한가할 때 측정한 최근 값의 중앙값이며,
+측정값이 적으면 DEGRADATION_BASELINE_MS를 사용합니다.
+부하가 높으면 한 단계씩 낮추고, 대기열과 p95 배수가 모두 낮은 임계값 아래로 내려가야 한 단계씩 올립니다.
+단계를 바꾼 뒤에는 DEGRADATION_MIN_DWELL_SECONDS 동안 유지하여 단계가 빠르게 오가지 않도록 합니다.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from config.profiles import PIPELINE_PROFILES, PipelineProfile
+
+# 품질 순서대로의 단계 이름
+TIERS = ("normal", "reduced", "minimal")
+
+# 큰 모델부터 작은 모델 순서 (단계가 낮아질수록 오른쪽 모델 사용)
+MIDAS_LADDER = ("DPT_Large", "DPT_Hybrid", "MiDaS_small")
+
+
+def degrade_profile(profile: PipelineProfile, level: int) -> PipelineProfile:
+    """
+    프로필을 level 단계만큼 낮춘 복사본을 반환합니다. (이미 더 낮은 설정은 올리지 않음)
+    이름은 유지되지만 설정이 바뀌므로 결과 캐시 키도 달라집니다.
+    """
+    if level <= 0:
+        return profile
+    current = MIDAS_LADDER.index(profile.midas_model_type) if profile.midas_model_type in MIDAS_LADDER else 0
+    update = {
+        "midas_model_type": MIDAS_LADDER[min(len(MIDAS_LADDER) - 1, current + level)],
+        "enable_multimodal": False,
+    }
+    if level >= 2:
+        # LLM 호출을 막으면 YOLO의 일반 클래스("food")는 밀도 테이블에서 찾을 수 없어 기본 밀도만 남으므로
+        # 음식 식별과 밀도 조회를 한 번의 통합 요청으로 묶어 실제 추정값은 유지
+        update["llm_request_mode"] = "combined"
+        update["max_llm_calls"] = 1 if profile.max_llm_calls is None else min(profile.max_llm_calls, 1)
+    return profile.model_copy(update=update)
+
+
+class DegradationController:
+    """
+    서버 전체 품질 단계 컨트롤러.
+    - update_load(): 요청이 들어올 때 대기열 길이로 단계를 다시 평가 (이벤트 루프)
+    - observe(): 파이프라인이 끝날 때 단계별/프로필별 소요시간 기록 (작업 스레드)
+    - apply(): 현재 단계를 요청 프로필에 적용
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = settings.DEGRADATION_ENABLED if enabled is None else enabled
+        self._level = 0
+        self._changed_at = float("-inf")
+        self._queue_ratio = 0.0
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._profile_samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._baseline_samples: Dict[str, Deque[float]] = {}
+        self._transitions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tier(self) -> str:
+        return TIERS[self._level]
+
+    def observe(self, stage_timings: Dict[str, float], profile: Optional[PipelineProfile] = None) -> None:
+        """
+        파이프라인 한 번의 단계별 소요시간(ms)을 기록합니다.
+        profile을 주면 전체 소요시간을 프로필별로도 기록하고, 낮추지 않은 프로필이 한가할 때 실행된 경우
+        기준 소요시간 측정값에 추가합니다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for stage, elapsed in stage_timings.items():
+                self._samples.setdefault(stage, deque()).append((now, float(elapsed)))
+                self._trim(self._samples[stage], now)
+            total = stage_timings.get("total")
+            if profile is None or total is None:
+                return
+            samples = self._profile_samples.setdefault(profile.name, deque())
+            samples.append((now, float(total)))
+            self._trim(samples, now)
+            idle = self._level == 0 and self._queue_ratio <= settings.DEGRADATION_QUEUE_LOW_RATIO
+            if idle and profile == PIPELINE_PROFILES.get(profile.name):
+                baseline = self._baseline_samples.setdefault(
+                    profile.name, deque(maxlen=max(1, settings.DEGRADATION_BASELINE_SAMPLES))
+                )
+                baseline.append(float(total))
+
+    def baseline_ms(self, profile_name: str) -> float:
+        """프로필의 기준 소요시간 (한가할 때 측정한 중앙값, 측정값이 부족하면 설정값)"""
+        measured = self._baseline_samples.get(profile_name)
+        if measured and len(measured) >= settings.DEGRADATION_BASELINE_MIN_SAMPLES:
+            return float(np.median(measured))
+        defaults = settings.DEGRADATION_BASELINE_MS
+        return float(defaults.get(profile_name, max(defaults.values(), default=1.0)))
+
+    def update_load(self, queue_depth: int, capacity: int) -> str:
+        """
+        현재 대기열 길이(실행 + 대기)로 단계를 다시 평가하고 현재 단계 이름을 반환합니다.
+        """
+        if not self.enabled:
+            return self.tier
+        now = time.monotonic()
+        with self._lock:
+            self._queue_ratio = queue_depth / capacity if capacity > 0 else 0.0
+            if now - self._changed_at < settings.DEGRADATION_MIN_DWELL_SECONDS:
+                return self.tier
+
+            latency_ratio = self._latency_ratio(now)
+            under_pressure = (self._queue_ratio >= settings.DEGRADATION_QUEUE_HIGH_RATIO
+                              or latency_ratio >= settings.DEGRADATION_P95_HIGH_FACTOR)
+            relieved = (self._queue_ratio <= settings.DEGRADATION_QUEUE_LOW_RATIO
+                        and latency_ratio <= settings.DEGRADATION_P95_LOW_FACTOR)
+            if under_pressure and self._level < len(TIERS) - 1:
+                self._set_level(self._level + 1, now, latency_ratio)
+            elif relieved and self._level > 0:
+                self._set_level(self._level - 1, now, latency_ratio)
+            return self.tier
+
+    def apply(self, profile: PipelineProfile) -> Tuple[PipelineProfile, str]:
+        """현재 단계를 적용한 프로필과 단계 이름"""
+        level = self._level if self.enabled else 0
+        return degrade_profile(profile, level), TIERS[level]
+
+    def snapshot(self) -> Dict:
+        """모니터링용 상태 정보 (단계별 최근 p95, 프로필별 p95와 기준 소요시간 포함)"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tier": self.tier,
+                "queue_ratio": round(self._queue_ratio, 3),
+                "latency_ratio": round(self._latency_ratio(now), 3),
+                "transitions": self._transitions,
+                "p95_ms": {stage: round(self._p95(stage, now), 1) for stage in self._samples},
+                "profile_p95_ms": {
+                    name: round(self._p95_of(samples, now), 1) for name, samples in self._profile_samples.items()
+                },
+                "baseline_ms": {name: round(self.baseline_ms(name), 1) for name in self._profile_samples},
+            }
+
+    def _set_level(self, level: int, now: float, latency_ratio: float) -> None:
+        logging.warning(
+            f"처리 단계 변경: {TIERS[self._level]} -> {TIERS[level]} "
+            f"(대기열 비율 {self._queue_ratio:.2f}, p95/기준 소요시간 {latency_ratio:.2f}배)"
+        )
+        self._level = level
+        self._changed_at = now
+        self._transitions += 1
+
+    def _latency_ratio(self, now: float) -> float:
+        """프로필별 최근 p95 / 기준 소요시간 중 가장 큰 값 (기록이 없으면 0)"""
+        ratios = [
+            self._p95_of(samples, now) / max(self.baseline_ms(name), 1.0)
+            for name, samples in self._profile_samples.items()
+        ]
+        return max(ratios, default=0.0)
+
+    def _p95(self, stage: str, now: float) -> float:
+        """최근 DEGRADATION_WINDOW_SECONDS 동안의 단계별 p95 (기록이 없으면 0)"""
+        return self._p95_of(self._samples.get(stage), now)
+
+    def _p95_of(self, samples: Optional[Deque[Tuple[float, float]]], now: float) -> float:
+        if not samples:
+            return 0.0
+        self._trim(samples, now)
+        if not samples:
+            return 0.0
+        return float(np.percentile([elapsed for _, elapsed in samples], 95))
+
+    @staticmethod
+    def _trim(samples: Deque[Tuple[float, float]], now: float) -> None:
+        while samples and now - samples[0][0] > settings.DEGRADATION_WINDOW_SECONDS:
+            samples.popleft()
+
+
+# 싱글톤 인스턴스 생성
+degradation_controller = DegradationController()
@@ -1,14 +1,22 @@
 import logging
+import time
 import numpy as np
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 # 새로운 모델 래퍼 및 유틸리티 임포트
 from models.yolo_model import yolo_model, load_image
 from models.midas_model import midas_model
-from models.llm_model import llm_estimator
+from models.llm_model import llm_estimator, LLMCallBudget
 from utils.feature_extraction import FeatureExtractor
 from utils.debug_helper import DebugHelper
+from utils.image_context import ImageContext
+from utils.llm_payload import expand_box
 from config.settings import settings
+from config.profiles import PipelineProfile, get_profile
+from core.stage_graph import StageGraph, StageError
+from core.result_cache import ResultCache, uses_fallback
+from core.degradation import degradation_controller
 
 class MassEstimationService:
     """
@@ -23,6 +31,14 @@ class MassEstimationService:
         self.midas_model = midas_model
         self.llm_estimator = llm_estimator
         self.feature_extractor = FeatureExtractor()
+        self.result_cache = ResultCache()
+
+        # 서로 독립적인 단계(세그멘테이션/깊이 추정/밀도 조회 등)를 동시에 실행하기 위한 단계 그래프
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=settings.PIPELINE_STAGE_WORKERS,
+            thread_name_prefix="pipeline-stage"
+        )
+        self._stage_graph = self._build_stage_graph()
         
         # 로깅 설정은 main.py에서 이미 설정되었으므로 여기서는 건드리지 않음
         # if settings.DEBUG_MODE:
@@ -30,19 +46,60 @@ class MassEstimationService:
         # else:
         #     logging.basicConfig(level=logging.INFO, format=settings.LOG_FORMAT)
 
-    def run_pipeline(self, image: np.ndarray, image_path: str = None) -> Dict:
+    def run_pipeline(self, image: np.ndarray, image_path: str = None, precomputed: Dict = None,
+                     precomputed_timings: Dict[str, float] = None, cache_key: str = None,
+                     profile: PipelineProfile = None) -> Dict:
         """
         전체 질량 추정 파이프라인을 실행합니다.
+        서로의 결과가 필요 없는 단계(밀도 조회와 MiDaS 깊이 추정 등)는 단계 그래프를 통해 동시에 실행됩니다.
+        깊이 추정과 특징 추출은 기준 물체와 음식이 모두 감지되어 질량 계산에 쓰일 때만 실행하며,
+        건너뛴 단계는 결과의 skipped_stages에 기록합니다.
 
         Args:
             image (np.ndarray): 처리할 이미지 (OpenCV BGR 형식).
             image_path (str, optional): 원본 이미지 경로 (EXIF 정보 추출용). Defaults to None.
+            precomputed (Dict, optional): 이미 계산된 단계 결과 (예: 배치 추론한 segmentation, depth).
+                해당 단계는 다시 실행하지 않습니다.
+            precomputed_timings (Dict, optional): precomputed 단계들의 소요시간(ms).
+            cache_key (str, optional): 호출자가 이미 계산한 결과 캐시 키.
+                precomputed가 없으면 이 키로 캐시를 먼저 조회합니다.
+            profile (PipelineProfile, optional): 파이프라인 프로필 (기본값: settings.DEFAULT_PIPELINE_PROFILE).
+                precomputed가 있으면 같은 프로필로 계산된 결과여야 합니다.
+
+        Returns:
+            Dict: 최종 추정 결과 (단계별 소요시간 stage_timings_ms, 건너뛴 단계 skipped_stages 포함).
+        """
+        profile = profile or get_profile()
+        if cache_key is None and self.result_cache.enabled:
+            cache_key = self.result_cache.key_for(image, profile)
+        if precomputed is None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self._run_pipeline(image, image_path, precomputed, precomputed_timings, profile)
+        self.result_cache.put(cache_key, result)
+        return result
+
+    def lookup_cached_result(self, image: np.ndarray, profile: PipelineProfile = None) -> Tuple[str | None, Dict | None]:
+        """
+        결과 캐시를 조회합니다. (profile이 None이면 기본 프로필)
 
         Returns:
-            Dict: 최종 추정 결과.
+            (캐시 키, 캐시된 결과 또는 None). 캐시가 비활성화되어 있으면 (None, None)
         """
+        if not self.result_cache.enabled:
+            return None, None
+        cache_key = self.result_cache.key_for(image, profile)
+        return cache_key, self.result_cache.get(cache_key)
+
+    def _run_pipeline(self, image: np.ndarray, image_path: str = None, precomputed: Dict = None,
+                      precomputed_timings: Dict[str, float] = None, profile: PipelineProfile = None) -> Dict:
+        """run_pipeline()의 실제 실행부 (캐시 미적용)"""
         try:
-            logging.info("질량 추정 파이프라인 시작...")
+            profile = profile or get_profile()
+            logging.info(f"질량 추정 파이프라인 시작... (프로필: {profile.name})")
+            pipeline_start = time.perf_counter()
             
             # DebugHelper 인스턴스 생성
             debug_helper = DebugHelper(
@@ -51,78 +108,290 @@ class MassEstimationService:
                 image_path=image_path
             )
 
-            # 1단계: YOLO 세그멘테이션
-            logging.info("1단계: YOLO 세그멘테이션 실행")
-            segmentation_results = self.yolo_model.segment_image(image)
-            debug_helper.log_segmentation_debug(segmentation_results)
-            
-            # 시각화 추가
-            debug_helper.save_segmentation_visualization(image, segmentation_results)
-            
-            # 음식 객체가 없어도 파이프라인 계속 진행 (멀티모달이 최종 판단)
-            if not segmentation_results.get("food_objects"):
-                logging.warning("음식 객체를 감지하지 못했습니다. 멀티모달 검증으로 진행합니다.")
-                # 빈 음식 객체 리스트로 초기화하여 파이프라인 계속 진행
-                segmentation_results["food_objects"] = []
-
-            # 2단계: MiDaS 깊이 추정
-            logging.info("2단계: MiDaS 깊이 추정 실행")
-            depth_map = self.midas_model.estimate_depth(image)
-            if depth_map is None:
-                logging.error("깊이 추정에 실패했습니다.")
-                return {"error": "깊이 추정에 실패했습니다."}
-
-            # 시각화 추가
-            debug_helper.save_depth_map_visualization(image, depth_map, segmentation_results)
-
-            # 3단계: 특징 추출
-            logging.info("3단계: 특징 추출 실행")
-            features = self.feature_extractor.extract_features(segmentation_results, depth_map, image_path)
-
-            # 기준물체 유무 확인
-            reference_objects = features.get("reference_objects", [])
-            has_reference = len(reference_objects) > 0
-
-            if has_reference:
-                # 4단계: LLM 질량 추정
-                logging.info("4단계: LLM 질량 추정 실행")
-                debug_helper.log_step_start("LLM 질량 추정")
-                estimated_result = self.llm_estimator.estimate_mass_from_features(
-                    features, debug_helper=debug_helper, image=image
-                )
-                debug_helper.log_step_end("LLM 질량 추정")
-            else:
-                # 기준물체 없으면 초기 질량 추정 스킵
-                logging.info("기준물체 없음: 초기 질량 추정 스킵, 멀티모달만 사용")
-                estimated_result = {"no_food_detected": False}
-
-            # 5단계: 멀티모달 검증 (설정에 따라 선택적 실행)
-            if settings.ENABLE_MULTIMODAL and (not estimated_result.get("error") or estimated_result.get("no_food_detected")):
-                logging.info("5단계: 멀티모달 검증 실행")
-                verification_result = self.llm_estimator.verify_mass_with_multimodal(
-                    image, estimated_result, features
-                )
-                if not verification_result.get("error"):
-                    estimated_result = verification_result
-                    logging.info("멀티모달 검증 완료")
-                else:
-                    logging.warning(f"멀티모달 검증 실패: {verification_result.get('error')}")
-                    logging.info("초기 추정 결과 사용")
-            else:
-                logging.info("멀티모달 검증 건너뜀 (비활성화 또는 오류)")
+            initial = dict(precomputed or {})
+            if "segmentation" in initial:
+                initial["segmentation"] = self._finalize_segmentation(initial["segmentation"], debug_helper)
+            if "depth" in initial and initial["depth"] is None:
+                raise StageError("깊이 추정에 실패했습니다.")
+            initial.update({
+                "image": image,
+                "image_context": ImageContext(image),
+                "image_path": image_path,
+                "debug_helper": debug_helper,
+                "profile": profile,
+                # 멀티모달 검증을 하는 프로필이면 검증 호출 1회를 남겨 둠
+                "llm_budget": LLMCallBudget(profile.max_llm_calls, reserved=1 if profile.multimodal_enabled else 0),
+            })
+
+            results, stage_timings, skipped_stages = self._stage_graph.run(initial)
+            # 배치로 미리 계산된 단계(세그멘테이션 뒤 깊이 추정 순서로 실행)의 소요시간을 전체 시간에 더함
+            precomputed_timings = precomputed_timings or {}
+            stage_timings.update(precomputed_timings)
+            stage_timings["total"] = (time.perf_counter() - pipeline_start) * 1000.0 + sum(precomputed_timings.values())
+            # 부하 적응형 단계 조정에 사용할 소요시간 기록
+            degradation_controller.observe(stage_timings, profile)
 
             # 최종 결과 조합
             final_result = {
-                "mass_estimation": estimated_result,
-                "features": self._simplify_features_for_response(features)
+                "mass_estimation": results["multimodal_verification"],
+                "features": self._simplify_features_for_response(
+                    results["features"] or self._detection_features(results["segmentation"])
+                ),
+                "pipeline_profile": profile.name,
+                "llm_calls": initial["llm_budget"].used,
+                # 초기 추정에서 기본값/대체 밀도를 썼으면 멀티모달 검증 결과로 바뀌었어도 표시 (결과 캐시에 저장하지 않음)
+                "fallback_used": uses_fallback(results["mass_estimation"]) or uses_fallback(results["multimodal_verification"]),
+                "skipped_stages": skipped_stages,
+                "stage_timings_ms": {name: round(elapsed, 1) for name, elapsed in stage_timings.items()}
             }
-            logging.info("질량 추정 파이프라인 성공적으로 완료.")
+            logging.info(f"질량 추정 파이프라인 성공적으로 완료. 단계별 소요시간(ms): {final_result['stage_timings_ms']}")
             return final_result
 
+        except StageError as e:
+            logging.error(f"파이프라인 단계 실패: {e}")
+            return {"error": str(e)}
         except Exception as e:
             logging.error(f"파이프라인 실행 중 심각한 오류 발생: {e}", exc_info=True)
             return {"error": f"서버 내부 오류가 발생했습니다: {e}"}
 
+    def run_pipeline_batch(self, images: List[np.ndarray], image_paths: List[str] = None,
+                           profile: PipelineProfile = None) -> List[Dict]:
+        """
+        여러 이미지에 대해 파이프라인을 실행합니다.
+        YOLO 세그멘테이션과 MiDaS 깊이 추정은 배치 추론으로 한 번에 처리하고(깊이는 필요한 이미지만),
+        이후 단계(특징 추출, LLM 질량 추정, 멀티모달 검증)는 이미지별로 병렬 실행합니다.
+
+        Args:
+            images: 처리할 이미지 리스트 (OpenCV BGR 형식)
+            image_paths: 원본 이미지 경로 리스트 (선택사항)
+            profile: 모든 이미지에 적용할 파이프라인 프로필 (기본값: settings.DEFAULT_PIPELINE_PROFILE)
+
+        Returns:
+            이미지 순서와 같은 run_pipeline() 결과 리스트
+        """
+        if not images:
+            return []
+        image_paths = image_paths or [None] * len(images)
+        profile = profile or get_profile()
+
+        # 캐시에 결과가 있는 이미지는 배치 추론에서 제외
+        results: List[Dict | None] = [None] * len(images)
+        cache_keys: List[str | None] = [None] * len(images)
+        for i, image in enumerate(images):
+            cache_keys[i], results[i] = self.lookup_cached_result(image, profile)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        try:
+            logging.info(f"배치 파이프라인 시작: 이미지 {len(pending)}장 (캐시 적중 {len(images) - len(pending)}장)")
+            precomputed, batch_timings = self.run_batched_inference([images[i] for i in pending], profile)
+        except Exception as e:
+            logging.error(f"배치 추론 중 오류 발생: {e}", exc_info=True)
+            for i in pending:
+                results[i] = {"error": f"서버 내부 오류가 발생했습니다: {e}"}
+            return results
+
+        # 이후 단계는 이미지별로 병렬 실행 (각 파이프라인이 단계 그래프 스레드 풀을 사용하므로 별도 풀에서 실행)
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="pipeline-batch") as executor:
+            futures = {
+                i: executor.submit(self.run_pipeline, images[i], image_paths[i], image_precomputed,
+                                   batch_timings, cache_keys[i], profile)
+                for i, image_precomputed in zip(pending, precomputed)
+            }
+            for i, future in futures.items():
+                results[i] = future.result()
+        return results
+
+    def run_batched_inference(self, images: List[np.ndarray],
+                              profile: PipelineProfile = None) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        파이프라인 앞단(YOLO 세그멘테이션, MiDaS 깊이 추정)을 배치로 실행합니다.
+        모든 이미지는 같은 프로필(YOLO 입력 크기, MiDaS 모델)로 추론합니다.
+        세그멘테이션 배치가 끝난 뒤 깊이가 필요한 이미지(기준 물체와 음식이 모두 감지된 이미지)만 깊이 배치로 추론합니다.
+        (DEPTH_ROI_ENABLED이면 감지 영역만 추론)
+
+        Returns:
+            (이미지별 run_pipeline()의 precomputed 인자 리스트, 배치 단계별 소요시간(ms))
+        """
+        profile = profile or get_profile()
+        segmentations, segmentation_ms = self._timed(
+            self.yolo_model.segment_images, images, profile.yolo_image_size
+        )
+        targets = [i for i, segmentation in enumerate(segmentations) if self._needs_depth(segmentation)]
+        precomputed = [{"segmentation": segmentation} for segmentation in segmentations]
+        if not targets:
+            return precomputed, {"segmentation": segmentation_ms}
+
+        rois = None
+        if settings.DEPTH_ROI_ENABLED:
+            rois = [self._depth_roi(segmentations[i], images[i].shape) for i in targets]
+        depth_maps, depth_ms = self._timed(
+            self.midas_model.estimate_depths, [images[i] for i in targets], profile.midas_model_type, rois
+        )
+        # 깊이가 필요 없는 이미지는 depth를 넘기지 않음 (파이프라인의 깊이 단계가 건너뜀으로 기록)
+        for i, depth_map in zip(targets, depth_maps):
+            precomputed[i]["depth"] = depth_map
+        return precomputed, {"segmentation": segmentation_ms, "depth": depth_ms}
+
+    @staticmethod
+    def _timed(func, *args):
+        """함수를 실행하고 (결과, 소요시간 ms)를 반환"""
+        start = time.perf_counter()
+        value = func(*args)
+        return value, (time.perf_counter() - start) * 1000.0
+
+    def _build_stage_graph(self) -> StageGraph:
+        """파이프라인 단계와 각 단계의 입력을 선언합니다."""
+        graph = StageGraph(self._stage_executor)
+        graph.add_stage("segmentation", self._run_segmentation, inputs=("image", "profile", "debug_helper"))
+        # 깊이/특징/밀도는 질량 계산에만 쓰이므로 세그멘테이션 결과를 보고 필요할 때만 실행
+        graph.add_stage("depth", self._run_depth_estimation, inputs=("image_context", "profile", "segmentation"),
+                        run_if=self._needs_depth)
+        graph.add_stage("segmentation_visualization", self._save_segmentation_visualization,
+                        inputs=("image", "segmentation", "debug_helper"))
+        graph.add_stage("depth_visualization", self._save_depth_visualization,
+                        inputs=("image", "depth", "segmentation", "debug_helper"),
+                        run_if=lambda depth, **_: depth is not None)
+        graph.add_stage("features", self._run_feature_extraction, inputs=("segmentation", "depth", "image_path"),
+                        run_if=self._needs_depth)
+        graph.add_stage("density_lookup", self._run_density_lookup,
+                        inputs=("image_context", "segmentation", "profile", "llm_budget"),
+                        run_if=self._needs_depth)
+        graph.add_stage("mass_estimation", self._run_mass_estimation,
+                        inputs=("image_context", "segmentation", "features", "density_lookup", "profile",
+                                "llm_budget", "debug_helper"))
+        graph.add_stage("multimodal_verification", self._run_multimodal_verification,
+                        inputs=("image_context", "segmentation", "features", "mass_estimation", "profile", "llm_budget"))
+        return graph
+
+    @staticmethod
+    def _needs_depth(segmentation: Dict, **_) -> bool:
+        """
+        깊이 맵과 특징이 필요한지 여부 (단계 실행 조건).
+        기준 물체가 없으면 초기 질량 추정을 건너뛰고 멀티모달 검증만 사용하며,
+        음식이 없으면 추정할 대상이 없으므로 둘 다 있을 때만 필요합니다.
+        """
+        return bool(segmentation.get("reference_objects")) and bool(segmentation.get("food_objects"))
+
+    @staticmethod
+    def _detection_features(segmentation: Dict) -> Dict:
+        """특징 추출을 건너뛴 경우 뒤 단계와 응답에 넘길 감지 정보 (깊이/부피 없음)"""
+        def summarize(obj: Dict) -> Dict:
+            return {key: obj[key] for key in ("class_id", "class_name", "confidence", "bbox", "pixel_area") if key in obj}
+        return {
+            "food_objects": [summarize(obj) for obj in segmentation.get("food_objects", [])],
+            "reference_objects": [summarize(obj) for obj in segmentation.get("reference_objects", [])],
+        }
+
+    def _run_segmentation(self, image: np.ndarray, profile: PipelineProfile, debug_helper: DebugHelper) -> Dict:
+        """1단계: YOLO 세그멘테이션"""
+        logging.info("1단계: YOLO 세그멘테이션 실행")
+        return self._finalize_segmentation(self.yolo_model.segment_image(image, profile.yolo_image_size), debug_helper)
+
+    def _finalize_segmentation(self, segmentation_results: Dict, debug_helper: DebugHelper) -> Dict:
+        """세그멘테이션 결과 디버그 출력 및 음식 객체 목록 보정"""
+        debug_helper.log_segmentation_debug(segmentation_results)
+
+        # 음식 객체가 없어도 파이프라인 계속 진행 (멀티모달이 최종 판단)
+        if not segmentation_results.get("food_objects"):
+            logging.warning("음식 객체를 감지하지 못했습니다. 멀티모달 검증으로 진행합니다.")
+            # 빈 음식 객체 리스트로 초기화하여 파이프라인 계속 진행
+            segmentation_results["food_objects"] = []
+        return segmentation_results
+
+    def _run_depth_estimation(self, image_context: ImageContext, profile: PipelineProfile,
+                              segmentation: Dict) -> np.ndarray:
+        """
+        2단계: MiDaS 깊이 추정 (기준 물체와 음식이 모두 감지된 경우에만 실행).
+        DEPTH_ROI_ENABLED이면 감지된 객체 영역만 추론합니다.
+        """
+        roi = self._depth_roi(segmentation, image_context.shape) if settings.DEPTH_ROI_ENABLED else None
+        logging.info(f"2단계: MiDaS 깊이 추정 실행 ({profile.midas_model_type}, 영역: {roi or '전체 프레임'})")
+        depth_map = self.midas_model.estimate_depth(
+            image_context.bgr, rgb_image=image_context.rgb, model_type=profile.midas_model_type, roi=roi
+        )
+        if depth_map is None:
+            raise StageError("깊이 추정에 실패했습니다.")
+        return depth_map
+
+    @staticmethod
+    def _depth_roi(segmentation: Dict, image_shape: Tuple[int, ...]) -> Tuple[int, int, int, int] | None:
+        """깊이 추정 영역: 음식/기준 물체 bbox(마스크 box 포함) 합집합 + 여백 (감지된 객체가 없으면 None)"""
+        boxes = []
+        for obj in segmentation.get("food_objects", []) + segmentation.get("reference_objects", []):
+            boxes.append(obj.get("bbox"))
+            mask = obj.get("mask")
+            if mask is not None and mask.box is not None:
+                boxes.append(mask.box)
+        return expand_box(boxes, image_shape, settings.DEPTH_ROI_MARGIN_RATIO)
+
+    def _save_segmentation_visualization(self, image: np.ndarray, segmentation: Dict, debug_helper: DebugHelper) -> None:
+        debug_helper.save_segmentation_visualization(image, segmentation)
+
+    def _save_depth_visualization(self, image: np.ndarray, depth: np.ndarray, segmentation: Dict,
+                                  debug_helper: DebugHelper) -> None:
+        debug_helper.save_depth_map_visualization(image, depth, segmentation)
+
+    def _run_feature_extraction(self, segmentation: Dict, depth: np.ndarray, image_path: str) -> Dict:
+        """3단계: 특징 추출"""
+        logging.info("3단계: 특징 추출 실행")
+        return self.feature_extractor.extract_features(segmentation, depth, image_path)
+
+    def _run_density_lookup(self, image_context: ImageContext, segmentation: Dict, profile: PipelineProfile,
+                            llm_budget: LLMCallBudget) -> List[Dict] | None:
+        """
+        음식별 밀도 조회. 깊이 정보가 필요 없으므로 깊이 추정/특징 추출과 동시에 실행됩니다.
+        기준물체나 음식이 없으면 질량 추정 자체를 건너뛰므로 실행되지 않습니다. (_needs_depth)
+        """
+        logging.info("음식별 밀도 조회 실행")
+        return self.llm_estimator.lookup_food_densities(
+            segmentation["food_objects"], image_context, profile.request_mode, llm_budget
+        )
+
+    def _run_mass_estimation(self, image_context: ImageContext, segmentation: Dict, features: Dict | None,
+                             density_lookup: List[Dict] | None, profile: PipelineProfile, llm_budget: LLMCallBudget,
+                             debug_helper: DebugHelper) -> Dict:
+        """4단계: LLM 질량 추정 (기준물체가 있을 때만)"""
+        features = features or self._detection_features(segmentation)
+        # 기준물체 유무 확인
+        reference_objects = features.get("reference_objects", [])
+        has_reference = len(reference_objects) > 0
+
+        if not has_reference:
+            # 기준물체 없으면 초기 질량 추정 스킵
+            logging.info("기준물체 없음: 초기 질량 추정 스킵, 멀티모달만 사용")
+            return {"no_food_detected": False}
+
+        logging.info("4단계: LLM 질량 추정 실행")
+        debug_helper.log_step_start("LLM 질량 추정")
+        estimated_result = self.llm_estimator.estimate_mass_from_features(
+            features, debug_helper=debug_helper, image=image_context, density_infos=density_lookup,
+            request_mode=profile.request_mode, budget=llm_budget
+        )
+        debug_helper.log_step_end("LLM 질량 추정")
+        return estimated_result
+
+    def _run_multimodal_verification(self, image_context: ImageContext, segmentation: Dict, features: Dict | None,
+                                     mass_estimation: Dict, profile: PipelineProfile, llm_budget: LLMCallBudget) -> Dict:
+        """5단계: 멀티모달 검증 (설정과 프로필에 따라 선택적 실행). 최종 질량 추정 결과를 반환합니다."""
+        features = features or self._detection_features(segmentation)
+        estimated_result = mass_estimation
+        if profile.multimodal_enabled and (not estimated_result.get("error") or estimated_result.get("no_food_detected")):
+            logging.info("5단계: 멀티모달 검증 실행")
+            verification_result = self.llm_estimator.verify_mass_with_multimodal(
+                image_context, estimated_result, features, budget=llm_budget
+            )
+            if not verification_result.get("error"):
+                estimated_result = verification_result
+                logging.info("멀티모달 검증 완료")
+            else:
+                logging.warning(f"멀티모달 검증 실패: {verification_result.get('error')}")
+                logging.info("초기 추정 결과 사용")
+        else:
+            logging.info("멀티모달 검증 건너뜀 (비활성화 또는 오류)")
+        return estimated_result
+
     def _simplify_features_for_response(self, features: dict) -> dict:
         """API 응답에 포함될 특징 정보를 간소화합니다. (numpy 타입을 Python 타입으로 변환)"""
         
@@ -0,0 +1,117 @@
+"""
+파이프라인 결과 캐시
+같은 사진이 다시 업로드되면(재시도, 타임아웃 후 재전송 등) YOLO/MiDaS/LLM을 다시 실행하지 않고 저장된 결과를 반환합니다.
+키는 디코딩된 픽셀의 SHA-256과 결과에 영향을 주는 설정값(파이프라인 프로필 포함)으로 구성됩니다.
+"""
+
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from config.settings import settings
+from config.profiles import PipelineProfile, get_profile
+from utils.disk_cache import TieredCache
+
+
+class ResultCache:
+    """MassEstimationService.run_pipeline() 결과 캐시"""
+
+    def __init__(self, enabled: bool = None, cache: TieredCache = None):
+        self.enabled = settings.RESULT_CACHE_ENABLED if enabled is None else enabled
+        self._cache = cache or TieredCache(
+            name="result-cache",
+            path=settings.RESULT_CACHE_PATH,
+            max_memory_entries=settings.RESULT_CACHE_MEMORY_ENTRIES,
+            max_disk_bytes=settings.RESULT_CACHE_MAX_DISK_MB * 1024 * 1024,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+        )
+
+    def key_for(self, image: np.ndarray, profile: PipelineProfile = None) -> str:
+        """이미지 픽셀과 파이프라인 설정/프로필로 캐시 키를 만듭니다. (profile이 None이면 기본 프로필)"""
+        profile = profile or get_profile()
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(image).data)
+        digest.update(f"{image.shape}|{image.dtype}".encode())
+        digest.update(self._settings_fingerprint().encode())
+        digest.update(profile.fingerprint().encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """캐시된 결과를 반환합니다. (비활성화 또는 미스인 경우 None)"""
+        if not self.enabled or key is None:
+            return None
+        start = time.perf_counter()
+        result = self._cache.get(key)
+        if result is None:
+            return None
+        lookup_ms = (time.perf_counter() - start) * 1000.0
+        result["cache_hit"] = True
+        result["stage_timings_ms"] = {"cache_lookup": round(lookup_ms, 1), "total": round(lookup_ms, 1)}
+        logging.info(f"결과 캐시 적중: {key[:12]}... ({lookup_ms:.1f}ms)")
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """
+        성공한 파이프라인 결과만 저장합니다.
+        LLM 실패/시간 초과/호출 한도 초과로 기본값이나 대체 밀도를 쓴 결과는 저장하지 않습니다. (다음 요청에서 다시 시도)
+        """
+        if not self.enabled or key is None or "error" in result:
+            return
+        if result.get("fallback_used") or uses_fallback(result.get("mass_estimation")):
+            logging.info(f"대체값이 사용된 결과는 캐시하지 않음: {key[:12]}...")
+            return
+        try:
+            self._cache.set(key, result)
+        except Exception as e:
+            logging.error(f"결과 캐시 저장 실패: {e}")
+
+    def snapshot(self) -> Dict:
+        return {"enabled": self.enabled, **self._cache.snapshot()}
+
+    @staticmethod
+    def _settings_fingerprint() -> str:
+        """결과에 영향을 주는 설정값 (YOLO 가중치와 밀도 테이블 파일은 크기/수정 시각 포함)"""
+        return "|".join([
+            settings.PIPELINE_VERSION,
+            _file_signature(settings.YOLO_MODEL_PATH),
+            settings.INFERENCE_BACKEND,
+            settings.MIDAS_QUANTIZATION,
+            settings.LLM_PROVIDER,
+            settings.LLM_MODEL_NAME,
+            str(settings.MULTIMODAL_MODEL_NAME),
+            str(settings.DEPTH_NATIVE_RESOLUTION),
+            str(settings.DEPTH_ROI_ENABLED),
+            str(settings.DEPTH_ROI_MARGIN_RATIO),
+            str(settings.LLM_ROI_CROP_ENABLED),
+            str(settings.LLM_CROP_MARGIN_RATIO),
+            str(settings.LLM_PAYLOAD_MAX_BYTES),
+            str(settings.DENSITY_TABLE_ENABLED),
+            str(settings.DENSITY_TABLE_MIN_SCORE),
+            str(settings.DENSITY_TABLE_MIN_CONFIDENCE),
+            _file_signature(settings.DENSITY_TABLE_PATH),
+        ])
+
+
+def uses_fallback(estimation: Optional[Dict]) -> bool:
+    """질량 추정 결과(또는 음식별 결과)에 오류나 대체값(fallback)이 포함되어 있는지 확인합니다."""
+    if not estimation:
+        return False
+    if "error" in estimation or estimation.get("fallback") or estimation.get("calculation_method") == "fallback":
+        return True
+    if (estimation.get("density_info") or {}).get("fallback"):
+        return True
+    items = estimation.get("food_estimations", []) + estimation.get("food_verifications", [])
+    return any(uses_fallback(item) for item in items)
+
+
+def _file_signature(path: Path) -> str:
+    """파일 이름, 크기, 수정 시각 (파일이 바뀌면 캐시 키도 바뀌도록)"""
+    try:
+        stat = path.stat()
+        return f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return path.name
@@ -0,0 +1,129 @@
+"""
+파이프라인 단계(stage) 그래프 실행기
+각 단계가 필요로 하는 입력을 선언하면, 입력이 모두 준비된 단계들을 스레드 풀에서 동시에 실행합니다.
+실행 조건(run_if)을 선언한 단계는 입력이 준비된 시점에 조건을 평가해 필요 없으면 실행하지 않습니다.
+"""
+
+import logging
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class StageError(Exception):
+    """
+    단계 실행 실패를 나타내는 예외.
+    메시지는 파이프라인 오류 응답에 그대로 사용됩니다.
+    """
+
+
+class Stage:
+    """그래프의 단일 단계 (이름, 실행 함수, 입력 이름 목록, 실행 조건)"""
+
+    def __init__(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+                 run_if: Optional[Callable[..., bool]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.run_if = run_if
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={list(self.inputs)})"
+
+
+class StageGraph:
+    """
+    단계 간 의존성을 기반으로 실행 순서를 결정하는 실행기.
+    - 각 단계의 결과는 단계 이름을 키로 저장되며, 다른 단계의 입력으로 사용됩니다.
+    - run()에 전달한 초기값에 이미 존재하는 이름의 단계는 실행하지 않습니다.
+    - 입력이 준비된 단계들은 전달받은 executor에서 동시에 실행됩니다.
+    - run_if가 False인 단계는 건너뛰며, 결과는 None으로 저장되어 뒤 단계에 그대로 전달됩니다.
+    """
+
+    def __init__(self, executor: Executor):
+        self._executor = executor
+        self._stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any], inputs: Iterable[str] = (),
+                  run_if: Optional[Callable[..., bool]] = None) -> "StageGraph":
+        """
+        단계를 등록합니다.
+
+        Args:
+            name: 단계 이름 (결과 키로도 사용)
+            func: 입력 이름을 키워드 인자로 받는 실행 함수
+            inputs: 필요한 입력 이름 목록 (다른 단계 이름 또는 초기값 키)
+            run_if: func와 같은 키워드 인자를 받아 실행 여부를 반환하는 함수 (None이면 항상 실행)
+        """
+        if name in self._stages:
+            raise ValueError(f"이미 등록된 단계입니다: {name}")
+        self._stages[name] = Stage(name, func, inputs, run_if)
+        return self
+
+    def run(self, initial: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+        """
+        그래프를 실행합니다.
+
+        Args:
+            initial: 초기 입력값 (예: image, image_path)
+
+        Returns:
+            (단계별 결과 딕셔너리, 단계별 소요시간(ms) 딕셔너리, 건너뛴 단계 이름 목록)
+        """
+        results: Dict[str, Any] = dict(initial)
+        timings: Dict[str, float] = {}
+        skipped: List[str] = []
+        pending: List[Stage] = [stage for name, stage in self._stages.items() if name not in results]
+        self._validate(pending, results)
+
+        running = {}
+        try:
+            while pending or running:
+                ready = [stage for stage in pending if all(key in results for key in stage.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    kwargs = {key: results[key] for key in stage.inputs}
+                    if stage.run_if is not None and not stage.run_if(**kwargs):
+                        # 조건 평가는 가벼우므로 스레드 풀을 거치지 않고 바로 결과를 채움
+                        logging.debug(f"단계 '{stage.name}' 건너뜀")
+                        results[stage.name] = None
+                        skipped.append(stage.name)
+                        continue
+                    running[self._executor.submit(self._run_stage, stage, kwargs)] = stage
+
+                if not running:
+                    if ready:
+                        # 건너뛴 단계로 새로 준비된 단계가 있을 수 있으므로 다시 확인
+                        continue
+                    raise RuntimeError(f"실행 가능한 단계가 없습니다 (순환 의존성): {pending}")
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    value, elapsed_ms = future.result()
+                    results[stage.name] = value
+                    timings[stage.name] = elapsed_ms
+        finally:
+            # 오류로 중단된 경우 아직 시작하지 않은 단계는 취소
+            for future in running:
+                future.cancel()
+
+        return results, timings, skipped
+
+    def _validate(self, pending: List[Stage], available: Dict[str, Any]) -> None:
+        """모든 입력이 초기값 또는 다른 단계에서 제공되는지 확인"""
+        for stage in pending:
+            for key in stage.inputs:
+                if key not in available and key not in self._stages:
+                    raise ValueError(f"단계 '{stage.name}'의 입력 '{key}'을(를) 제공하는 단계가 없습니다.")
+
+    @staticmethod
+    def _run_stage(stage: Stage, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        """단계 실행 및 소요시간 측정"""
+        start = time.perf_counter()
+        try:
+            value = stage.func(**kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            logging.debug(f"단계 '{stage.name}' 완료: {elapsed_ms:.1f}ms")
+        return value, elapsed_ms
@@ -0,0 +1,321 @@
+"""
+비동기 작업(/estimate_async) 상태 저장소
+작업 상태를 TTL과 함께 저장하고, 만료된 항목은 주기적으로 정리합니다.
+- memory: 프로세스 내 LRU (단일 워커 전용)
+- sqlite: 로컬 파일 DB (같은 노드의 여러 워커가 공유)
+- redis: 외부 Redis (여러 노드가 공유)
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+# 완료된 것으로 간주하는 작업 상태 (결과 TTL 적용 대상)
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class TaskStore(ABC):
+    """
+    작업 상태 저장소 인터페이스.
+    저장되는 값은 JSON 직렬화 가능한 딕셔너리여야 합니다.
+    """
+
+    backend_name = "base"
+
+    def __init__(self, active_ttl_seconds: float = None, result_ttl_seconds: float = None):
+        """
+        Args:
+            active_ttl_seconds: 대기/처리 중인 작업의 만료 시간 (기본값: settings.TASK_STORE_ACTIVE_TTL_SECONDS)
+            result_ttl_seconds: 완료/실패한 작업의 만료 시간 (기본값: settings.TASK_STORE_RESULT_TTL_SECONDS)
+        """
+        self.active_ttl_seconds = active_ttl_seconds if active_ttl_seconds is not None else settings.TASK_STORE_ACTIVE_TTL_SECONDS
+        self.result_ttl_seconds = result_ttl_seconds if result_ttl_seconds is not None else settings.TASK_STORE_RESULT_TTL_SECONDS
+        self.swept_total = 0
+
+    def create(self, task_id: str, record: Dict[str, Any]) -> None:
+        """새 작업을 저장합니다."""
+        self._put(task_id, dict(record), self._ttl_for(record))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태를 반환합니다. 없거나 만료된 경우 None."""
+        return self._get(task_id)
+
+    def update(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """
+        작업 상태 일부를 갱신하고 갱신된 전체 상태를 반환합니다.
+        작업이 없거나 만료된 경우 아무것도 하지 않고 None을 반환합니다.
+        """
+        record = self._get(task_id)
+        if record is None:
+            return None
+        record.update(fields)
+        self._put(task_id, record, self._ttl_for(record))
+        return record
+
+    # 이벤트 루프(async 핸들러, WebSocket, 백그라운드 작업)에서는 아래 메서드를 사용합니다.
+    # SQLite/Redis 호출은 블로킹이므로 스레드에서 실행하여 느린 왕복이 다른 요청을 멈추지 않도록 합니다.
+
+    async def acreate(self, task_id: str, record: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.create, task_id, record)
+
+    async def aget(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, task_id)
+
+    async def aupdate(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.update, task_id, **fields)
+
+    async def asnapshot(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.snapshot)
+
+    def __contains__(self, task_id: str) -> bool:
+        return self._get(task_id) is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """모니터링용 상태 정보"""
+        return {
+            "backend": self.backend_name,
+            "size": self.size(),
+            "active_ttl_seconds": self.active_ttl_seconds,
+            "result_ttl_seconds": self.result_ttl_seconds,
+            "swept_total": self.swept_total,
+        }
+
+    def _ttl_for(self, record: Dict[str, Any]) -> float:
+        if record.get("status") in FINISHED_STATUSES:
+            return self.result_ttl_seconds
+        return self.active_ttl_seconds
+
+    @abstractmethod
+    def _get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def _put(self, task_id: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """작업을 삭제합니다."""
+        pass
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """만료된 작업을 정리하고 삭제한 개수를 반환합니다."""
+        pass
+
+    @abstractmethod
+    def size(self) -> int:
+        """저장된 작업 수"""
+        pass
+
+    def close(self) -> None:
+        """연결 등 리소스를 정리합니다."""
+        pass
+
+
+class MemoryTaskStore(TaskStore):
+    """
+    프로세스 메모리 기반 저장소.
+    최대 개수를 넘으면 가장 오래 사용되지 않은 작업부터 제거합니다. (uvicorn 워커 간 공유 불가)
+    """
+
+    backend_name = "memory"
+
+    def __init__(self, max_entries: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max(1, max_entries or settings.TASK_STORE_MAX_ENTRIES)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # task_id -> (만료 시각, 상태)
+        self._lock = threading.Lock()
+
+    def _get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at <= time.time():
+                del self._entries[task_id]
+                self.swept_total += 1
+                return None
+            self._entries.move_to_end(task_id)
+            return dict(record)
+
+    def _put(self, task_id: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[task_id] = (time.time() + ttl_seconds, record)
+            self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                logging.warning(f"작업 저장소가 가득 차 오래된 작업을 제거합니다: {evicted_id}")
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._entries.pop(task_id, None)
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [task_id for task_id, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for task_id in expired:
+                del self._entries[task_id]
+            self.swept_total += len(expired)
+        return len(expired)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    SQLite 파일 기반 저장소.
+    WAL 모드를 사용하므로 같은 노드의 여러 uvicorn 워커가 하나의 파일을 공유할 수 있습니다.
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: Path = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path or settings.TASK_STORE_SQLITE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_expires_at ON tasks (expires_at)")
+
+    def _get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE task_id = ? AND expires_at > ?", (task_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, task_id: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        data = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, data, expires_at) VALUES (?, ?, ?)",
+                (task_id, data, time.time() + ttl_seconds)
+            )
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def sweep(self) -> int:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM tasks WHERE expires_at <= ?", (time.time(),)).rowcount
+        self.swept_total += deleted
+        return deleted
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisTaskStore(TaskStore):
+    """
+    Redis 기반 저장소.
+    작업은 만료 시간이 설정된 문자열 키로 저장되고, 크기 집계와 정리를 위해 만료 시각 순 정렬 집합을 함께 유지합니다.
+    client를 직접 전달하면 해당 클라이언트를 사용합니다. (예: 로컬 테스트용 fakeredis.FakeRedis())
+    """
+
+    backend_name = "redis"
+
+    def __init__(self, client=None, url: str = None, prefix: str = None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "TASK_STORE_BACKEND=redis를 사용하려면 redis 패키지가 필요합니다: pip install redis"
+                ) from e
+            client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self._client = client
+        self.prefix = prefix or settings.TASK_STORE_REDIS_PREFIX
+        self._index_key = f"{self.prefix}index"
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.prefix}{task_id}"
+
+    def _get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        data = self._client.get(self._key(task_id))
+        return json.loads(data) if data else None
+
+    def _put(self, task_id: str, record: Dict[str, Any], ttl_seconds: float) -> None:
+        data = json.dumps(record, ensure_ascii=False)
+        pipe = self._client.pipeline()
+        pipe.set(self._key(task_id), data, px=max(1, int(ttl_seconds * 1000)))
+        pipe.zadd(self._index_key, {task_id: time.time() + ttl_seconds})
+        pipe.execute()
+
+    def delete(self, task_id: str) -> None:
+        pipe = self._client.pipeline()
+        pipe.delete(self._key(task_id))
+        pipe.zrem(self._index_key, task_id)
+        pipe.execute()
+
+    def sweep(self) -> int:
+        # 작업 키는 Redis가 만료시키므로 인덱스에서만 제거
+        deleted = self._client.zremrangebyscore(self._index_key, "-inf", time.time())
+        self.swept_total += deleted
+        return deleted
+
+    def size(self) -> int:
+        return self._client.zcount(self._index_key, time.time(), "+inf")
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_task_store(backend: str = None) -> TaskStore:
+    """
+    설정에 맞는 작업 저장소를 생성합니다.
+
+    Args:
+        backend: "memory", "sqlite", "redis" 중 하나 (기본값: settings.TASK_STORE_BACKEND)
+    """
+    backend = (backend or settings.TASK_STORE_BACKEND).lower()
+    if backend == "memory":
+        store = MemoryTaskStore()
+    elif backend == "sqlite":
+        store = SQLiteTaskStore()
+    elif backend == "redis":
+        store = RedisTaskStore()
+    else:
+        raise ValueError(f"지원하지 않는 작업 저장소입니다: {backend} (memory, sqlite, redis 중 선택)")
+    logging.info(f"작업 저장소 초기화: {store.backend_name}")
+    return store
+
+
+async def run_sweeper(store: TaskStore, interval_seconds: float = None) -> None:
+    """만료된 작업을 주기적으로 정리하는 백그라운드 루프 (lifespan에서 실행)"""
+    interval_seconds = interval_seconds or settings.TASK_STORE_SWEEP_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await asyncio.to_thread(store.sweep)
+            if deleted and settings.DEBUG_MODE:
+                size = await asyncio.to_thread(store.size)
+                logging.info(f"만료된 작업 {deleted}개 정리 (저장소 크기: {size})")
+        except Exception as e:
+            logging.error(f"작업 저장소 정리 중 오류 발생: {e}")
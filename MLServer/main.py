@@ -9,6 +9,7 @@ YOLO-Segment + MiDaS + LLM 파이프라인
 예시:
     python main.py test_image.jpg
     python main.py test_image.jpg --debug --no-multimodal
+    python main.py test_image.jpg --profile fast
 """
 
 import argparse
@@ -23,6 +24,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.estimation_service import mass_estimation_service
 from config.settings import settings
+from config.profiles import PIPELINE_PROFILES, get_profile
 from utils.logging_utils import setup_logging
 
 
@@ -36,6 +38,7 @@ def parse_arguments():
   python main.py image.jpg                    # 기본 설정으로 실행
   python main.py image.jpg --debug            # 디버그 모드로 실행
   python main.py image.jpg --no-multimodal    # 멀티모달 검증 비활성화
+  python main.py image.jpg --profile fast     # 빠른 프로필 (MiDaS_small, 멀티모달 없음)
   python main.py --config                     # 설정 확인
         """
     )
@@ -66,6 +69,13 @@ def parse_arguments():
         help='멀티모달 검증 비활성화'
     )
     
+    parser.add_argument(
+        '--profile',
+        choices=list(PIPELINE_PROFILES),
+        default=None,
+        help=f'파이프라인 프로필 (기본값: {settings.DEFAULT_PIPELINE_PROFILE})'
+    )
+    
     parser.add_argument(
         '--config',
         action='store_true',
@@ -157,10 +167,12 @@ def main():
         if simple_debug:
             settings.SIMPLE_DEBUG_MODE = True
     
-    # 멀티모달 검증 설정 업데이트
+    # 파이프라인 프로필 선택 (멀티모달 비활성화는 이 실행의 프로필에만 적용)
+    profile = get_profile(args.profile)
     if args.no_multimodal:
-        settings.ENABLE_MULTIMODAL = False
+        profile = profile.model_copy(update={"enable_multimodal": False})
         print("멀티모달 검증이 비활성화되었습니다.")
+    print(f"파이프라인 프로필: {profile.name}")
     
     # 로깅 설정
     setup_logging(debug_mode, simple_debug)
@@ -192,7 +204,7 @@ def main():
                 return
             
             # 질량 추정
-            result = mass_estimation_service.run_pipeline(image, image_path)
+            result = mass_estimation_service.run_pipeline(image, image_path, profile=profile)
             
             # 결과 출력
             if "error" in result:
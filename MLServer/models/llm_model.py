@@ -6,16 +6,68 @@ import json
 import re
 import cv2
 import base64
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from config.settings import settings
 from utils.base_model import BaseModel
+from utils.debug_writer import debug_writer
 from utils.density_calculator import density_calculator
+from utils.llm_cache import call_deadline, llm_response_cache
+from utils.image_context import ImageContext
+from utils.llm_payload import build_scene_payload
+
+
+class LLMCallBudget:
+    """
+    요청 하나의 LLM 호출 한도 (파이프라인 프로필의 max_llm_calls).
+    음식별 호출이 여러 스레드에서 동시에 차감하므로 잠금 안에서 계산합니다.
+    reserved만큼은 멀티모달 검증용으로 남겨 두고, 밀도 조회 등 다른 호출은 나머지 한도 안에서만 허용합니다.
+    """
+
+    def __init__(self, limit: int = None, reserved: int = 0):
+        """
+        Args:
+            limit: 최대 호출 수 (None이면 제한 없음)
+            reserved: 멀티모달 검증용으로 남겨 둘 호출 수
+        """
+        self.limit = limit
+        self.used = 0
+        self._reserved = max(0, reserved) if limit is not None else 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, reserved: bool = False) -> bool:
+        """호출 1회를 차감합니다. 한도를 넘으면 False (reserved=True는 멀티모달 검증용 몫 사용)"""
+        with self._lock:
+            if self.limit is None:
+                self.used += 1
+                return True
+            if reserved and self._reserved > 0:
+                self._reserved -= 1
+                self.used += 1
+                return True
+            if self.used + self._reserved < self.limit:
+                self.used += 1
+                return True
+            return False
+
 
 class LLMMassEstimator(BaseModel):
     """
     LLM (Gemini)을 사용하여 질량을 추정하는 래퍼 클래스. (일반화 및 자기 교정 로직 강화)
     """
+
+    FAN_OUT_POLL_SECONDS = 0.05  # 풀에서 대기 중인 호출의 실행 시작 확인 주기
     
+    def __init__(self):
+        # 음식별 LLM 호출을 동시에 실행하기 위한 스레드 풀 (전체 동시 호출 수 제한)
+        self._llm_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.LLM_MAX_CONCURRENCY),
+            thread_name_prefix="llm-call"
+        )
+        super().__init__()
+
     def get_model_name(self) -> str:
         return "Gemini LLM 모델"
     
@@ -33,7 +85,139 @@ class LLMMassEstimator(BaseModel):
             self._log_error("설정 실패", e)
             self._model = None
     
-    def estimate_mass_from_features(self, features: dict, debug_helper=None, image: np.ndarray = None) -> dict:
+    def lookup_food_densities(self, food_objects: list, image: np.ndarray | ImageContext = None,
+                              request_mode: str = None, budget: LLMCallBudget = None) -> list:
+        """
+        음식 객체별 밀도 정보를 조회합니다. (깊이/특징 추출과 무관하므로 별도 단계로 먼저 실행 가능)
+        로컬 밀도 테이블에서 먼저 찾고, 없거나 유사도가 낮을 때만 LLM을 호출합니다.
+        - LLM_REQUEST_MODE="per_food": 음식별 LLM 호출을 동시에 실행 (최대 LLM_MAX_CONCURRENCY개)
+        - LLM_REQUEST_MODE="combined": 테이블에 없는 음식들을 한 번의 멀티모달 요청으로 조회
+
+        Args:
+            food_objects: 세그멘테이션 결과의 음식 객체 목록 (마스크 포함)
+            image: 원본 이미지 (음식 식별용)
+            request_mode: 요청 모드 (None이면 settings.LLM_REQUEST_MODE, 파이프라인 프로필에서 지정)
+            budget: 요청의 LLM 호출 한도 (한도를 넘은 음식은 기본 밀도 사용)
+
+        Returns:
+            food_objects와 같은 순서의 밀도 정보 리스트
+        """
+        # 음식별 호출이 축소/인코딩된 이미지를 공유하도록 컨텍스트로 감쌈
+        if image is not None:
+            image = ImageContext.of(image)
+        if (request_mode or settings.LLM_REQUEST_MODE) == "combined":
+            return self._lookup_food_densities_combined(food_objects, image, budget)
+        # 시간 초과 시 기본 밀도로 대체하므로 로컬 테이블은 먼저 조회하여 결과를 넘김
+        local_densities = [density_calculator.lookup_local_density(food.get('class_name', '알수없음')) for food in food_objects]
+        return self._fan_out(
+            self._lookup_food_density,
+            [(food, image, budget, local_density) for food, local_density in zip(food_objects, local_densities)],
+            on_timeout=lambda food, image, budget, local_density: density_calculator._get_fallback_density(
+                food.get('class_name', '알수없음'), local_density=local_density
+            )
+        )
+
+    def _lookup_food_densities_combined(self, food_objects: list, image: np.ndarray | ImageContext = None,
+                                        budget: LLMCallBudget = None) -> list:
+        """로컬 테이블에서 신뢰할 만한 결과를 찾지 못한 음식만 모아 한 번의 요청으로 조회하고 원래 순서로 합칩니다."""
+        local_densities = [
+            density_calculator.lookup_local_density(food.get('class_name', '알수없음'))
+            for food in food_objects
+        ]
+        density_infos = list(local_densities)
+        missing = [i for i, density_info in enumerate(local_densities) if not density_calculator.is_confident(density_info)]
+        if missing and budget is not None and not budget.try_acquire():
+            logging.warning(f"LLM 호출 한도 초과: 음식 {len(missing)}개에 기본 밀도 사용")
+            for i in missing:
+                density_infos[i] = density_calculator._get_fallback_density(
+                    food_objects[i].get('class_name', '알수없음'), local_density=local_densities[i]
+                )
+        elif missing:
+            combined = density_calculator.get_food_densities_combined(
+                [food_objects[i] for i in missing], image, [local_densities[i] for i in missing]
+            )
+            for i, density_info in zip(missing, combined):
+                density_info["food_index"] = i
+                density_infos[i] = density_info
+        return density_infos
+
+    def _lookup_food_density(self, food: dict, image: np.ndarray | ImageContext = None,
+                             budget: LLMCallBudget = None, local_density: dict = None) -> dict:
+        """음식 객체 하나의 밀도 정보 조회 (local_density: 먼저 조회한 로컬 테이블 결과)"""
+        food_name = food.get('class_name', '알수없음')
+        if density_calculator.is_confident(local_density):
+            return local_density
+        if budget is not None and not budget.try_acquire():
+            logging.warning(f"LLM 호출 한도 초과: '{food_name}'에 기본 밀도 사용")
+            return density_calculator._get_fallback_density(food_name, local_density=local_density)
+        # 이미지와 마스크를 함께 전달하여 정확한 음식 식별 + 밀도 조회
+        return density_calculator.get_food_density_from_llm(
+            food_name,
+            food_class=food_name,
+            image=image,
+            food_mask=food.get('mask'),
+            food_bbox=food.get('bbox'),
+            local_density=local_density
+        )
+
+    def _fan_out(self, func, args_list: list, on_timeout) -> list:
+        """
+        음식별 호출을 LLM 스레드 풀에서 동시에 실행하고 입력 순서대로 결과를 반환합니다.
+        한 요청이 풀에 올리는 호출은 풀 크기(LLM_MAX_CONCURRENCY)까지만 유지하고 나머지는 앞 호출이 끝나면 제출합니다.
+        LLM_CALL_TIMEOUT_SECONDS는 호출이 실제로 실행을 시작한 시점부터 계산하며, 초과한 호출은 on_timeout(*args) 결과로 대체합니다.
+        같은 제한 시간을 Gemini 요청 타임아웃으로도 걸어 두므로 시간 초과된 호출의 스레드도 곧바로 풀로 돌아옵니다.
+        다른 요청의 호출로 풀이 막혀 LLM_QUEUE_TIMEOUT_SECONDS 동안 시작하지 못한 호출도 같은 방식으로 대체합니다.
+        """
+        if not args_list:
+            return []
+        max_running = max(1, settings.LLM_MAX_CONCURRENCY)
+        started_at = [None] * len(args_list)
+
+        def run(index, args):
+            started_at[index] = time.monotonic()
+            with call_deadline(settings.LLM_CALL_TIMEOUT_SECONDS):
+                return func(*args)
+
+        results = [None] * len(args_list)
+        running = {}  # 인덱스 -> (future, 제출 시각)
+        next_index = 0
+        while next_index < len(args_list) or running:
+            while next_index < len(args_list) and len(running) < max_running:
+                future = self._llm_executor.submit(run, next_index, args_list[next_index])
+                running[next_index] = (future, time.monotonic())
+                next_index += 1
+
+            now = time.monotonic()
+            deadlines = [
+                started_at[i] + settings.LLM_CALL_TIMEOUT_SECONDS if started_at[i] is not None
+                else submitted_at + settings.LLM_QUEUE_TIMEOUT_SECONDS
+                for i, (_, submitted_at) in running.items()
+            ]
+            timeout = max(0.0, min(deadlines) - now)
+            if any(started_at[i] is None for i in running):
+                # 실행 시작 여부는 future로 알 수 없으므로 대기 중인 호출이 있으면 짧게 나눠 확인
+                timeout = min(timeout, self.FAN_OUT_POLL_SECONDS)
+            done, _ = wait([future for future, _ in running.values()], timeout=timeout, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for i, (future, submitted_at) in list(running.items()):
+                if future in done:
+                    results[i] = future.result()
+                elif started_at[i] is not None:
+                    if now - started_at[i] < settings.LLM_CALL_TIMEOUT_SECONDS:
+                        continue
+                    logging.error(f"LLM 호출 시간 초과 ({settings.LLM_CALL_TIMEOUT_SECONDS}s): {func.__name__}")
+                    results[i] = on_timeout(*args_list[i])
+                elif now - submitted_at >= settings.LLM_QUEUE_TIMEOUT_SECONDS and future.cancel():
+                    logging.error(f"LLM 호출 대기 시간 초과 ({settings.LLM_QUEUE_TIMEOUT_SECONDS}s, 실행 전 취소): {func.__name__}")
+                    results[i] = on_timeout(*args_list[i])
+                else:
+                    continue
+                del running[i]
+        return results
+
+    def estimate_mass_from_features(self, features: dict, debug_helper=None, image: np.ndarray | ImageContext = None, density_infos: list = None,
+                                    request_mode: str = None, budget: LLMCallBudget = None) -> dict:
         if self._model is None:
             return {"error": "LLM 모델이 초기화되지 않았습니다."}
         
@@ -46,89 +230,136 @@ class LLMMassEstimator(BaseModel):
                 "no_food_detected": True
             }
         
-        # 여러 음식에 대해 각각 질량 추정
-        food_estimations = []
+        request_mode = request_mode or settings.LLM_REQUEST_MODE
+        logging.info(f"총 {len(food_objects)}개의 음식 객체에 대해 질량 추정을 시작합니다. (요청 모드: {request_mode})")
+        if image is not None:
+            image = ImageContext.of(image)
         
-        logging.info(f"총 {len(food_objects)}개의 음식 객체에 대해 질량 추정을 시작합니다.")
+        # 통합 모드에서는 모든 음식의 밀도/질량을 한 번에 조회한 뒤 음식별 계산에 사용
+        if density_infos is None and request_mode == "combined":
+            density_infos = self.lookup_food_densities(food_objects, image, request_mode, budget)
         
-        for i, food in enumerate(food_objects):
-            logging.info(f"음식 {i+1}/{len(food_objects)} 처리 중: 픽셀 면적 {food.get('pixel_area', 0):,}, 신뢰도 {food.get('confidence', 0):.3f}, bbox {food.get('bbox', [])}")
-            
-            # 1단계: 부피 계산 (기존 방식)
-            volume_info = self._calculate_volume_from_features(features, food, i)
-            
-            # 2단계: 음식 이름 식별 및 밀도 조회 (이미지 기반)
-            food_name = food.get('class_name', '알수없음')
-            food_mask = food.get('mask')  # 음식 마스크 정보
-            
-            # 이미지와 마스크를 함께 전달하여 정확한 음식 식별 + 밀도 조회
-            density_info = density_calculator.get_food_density_from_llm(
-                food_name, 
-                food_class=food_name,
-                image=image,
-                food_mask=food_mask
-            )
-            
-            # 3단계: 부피 × 밀도로 최종 질량 계산
-            if volume_info.get("volume_cm3", 0) > 0:
-                mass_calculation = density_calculator.calculate_mass_from_volume(
-                    volume_info["volume_cm3"], 
-                    density_info
-                )
-                
-                # 결과 통합
-                mass_info = {
-                    "estimated_mass_g": mass_calculation["estimated_mass_g"],
-                    "confidence": mass_calculation["confidence"],
-                    "reasoning": mass_calculation["reasoning"],
-                    "calculation_method": "volume_density_based",
-                    "volume_info": volume_info,
-                    "density_info": density_info,
-                    "calculation_steps": mass_calculation.get("calculation_steps", [])
-                }
-            else:
-                # 부피 계산 실패시 기존 LLM 방식 사용
-                logging.warning(f"음식 {i+1} 부피 계산 실패, LLM 직접 추정 사용")
-                prompt = self._build_prompt_for_food(features, food, i)
-                try:
-                    response = self._model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            temperature=settings.LLM_TEMPERATURE, 
-                            top_p=settings.LLM_TOP_P,
-                            candidate_count=1
-                        ),
-                    )
-                    mass_info = self._parse_response(response.text)
-                    mass_info["calculation_method"] = "llm_direct_estimation"
-                    mass_info["density_info"] = density_info  # 참고용
-                except Exception as e:
-                    logging.error(f"음식 {i} LLM 직접 추정 실패: {e}")
-                    mass_info = {
-                        "error": str(e),
-                        "estimated_mass_g": 100.0,  # 기본값
-                        "confidence": 0.2
-                    }
-            
+        # 여러 음식에 대해 각각 질량 추정 (음식별 LLM 호출은 동시에 실행, 결과는 원래 순서 유지)
+        food_estimations = self._fan_out(
+            self._estimate_single_food,
+            [
+                (features, food, i, image, density_infos[i] if density_infos is not None and i < len(density_infos) else None, budget)
+                for i, food in enumerate(food_objects)
+            ],
+            on_timeout=self._timeout_estimation
+        )
+        
+        for i, mass_info in enumerate(food_estimations):
             if debug_helper:
                 debug_helper.log_initial_mass_calculation_debug(features, "", "", mass_info, food_index=i)
-            
-            # 음식별 정보 추가
-            mass_info["food_index"] = i
-            mass_info["food_bbox"] = food.get("bbox", [])
-            mass_info["food_pixel_area"] = food.get("pixel_area", 0)
-            food_estimations.append(mass_info)
-            
             logging.info(f"음식 {i+1} 질량 추정 완료: {mass_info.get('estimated_mass_g', 0):.1f}g (방법: {mass_info.get('calculation_method', 'unknown')})")
         
         return {
             "food_estimations": food_estimations,
-            "food_count": len(food_objects)
+            "food_count": len(food_objects),
+            "llm_request_mode": request_mode
         }
 
-    def verify_mass_with_multimodal(self, image: np.ndarray, initial_estimation: dict, features: dict) -> dict:
+    def _estimate_single_food(self, features: dict, food: dict, i: int, image: np.ndarray | ImageContext = None,
+                              density_info: dict = None, budget: LLMCallBudget = None) -> dict:
+        """음식 객체 하나의 질량 추정 (부피 계산 → 밀도 조회 → 부피 × 밀도, 부피 계산 실패 시 LLM 직접 추정)"""
+        food_objects = features.get("food_objects", [])
+        logging.info(f"음식 {i+1}/{len(food_objects)} 처리 중: 픽셀 면적 {food.get('pixel_area', 0):,}, 신뢰도 {food.get('confidence', 0):.3f}, bbox {food.get('bbox', [])}")
+        
+        # 1단계: 부피 계산 (기존 방식)
+        volume_info = self._calculate_volume_from_features(features, food, i)
+        
+        # 2단계: 음식 이름 식별 및 밀도 조회 (이미지 기반, 미리 조회된 결과가 있으면 재사용)
+        if density_info is None:
+            local_density = density_calculator.lookup_local_density(food.get('class_name', '알수없음'))
+            density_info = self._lookup_food_density(food, image, budget, local_density)
+        
+        # 3단계: 부피 × 밀도로 최종 질량 계산
+        if volume_info.get("volume_cm3", 0) > 0:
+            mass_calculation = density_calculator.calculate_mass_from_volume(
+                volume_info["volume_cm3"], 
+                density_info
+            )
+            
+            # 결과 통합
+            mass_info = {
+                "estimated_mass_g": mass_calculation["estimated_mass_g"],
+                "confidence": mass_calculation["confidence"],
+                "reasoning": mass_calculation["reasoning"],
+                "calculation_method": "volume_density_based",
+                "volume_info": volume_info,
+                "density_info": density_info,
+                "calculation_steps": mass_calculation.get("calculation_steps", [])
+            }
+        elif density_info.get("llm_mass_g") is not None:
+            # 부피 계산 실패 시 통합 요청에서 받은 LLM 질량 추정값 사용 (추가 호출 없음)
+            logging.warning(f"음식 {i+1} 부피 계산 실패, 통합 요청의 LLM 질량 추정 사용")
+            mass_info = {
+                "estimated_mass_g": density_info["llm_mass_g"],
+                "confidence": density_info.get("confidence", 0.5),
+                "reasoning": density_info.get("reasoning", ""),
+                "calculation_method": "llm_combined_estimation",
+                "density_info": density_info
+            }
+        elif budget is not None and not budget.try_acquire():
+            logging.warning(f"음식 {i+1} 부피 계산 실패, LLM 호출 한도 초과로 기본값 사용")
+            mass_info = {
+                "error": "LLM 호출 한도 초과",
+                "estimated_mass_g": 100.0,  # 기본값
+                "confidence": 0.2,
+                "density_info": density_info
+            }
+        else:
+            # 부피 계산 실패시 기존 LLM 방식 사용
+            logging.warning(f"음식 {i+1} 부피 계산 실패, LLM 직접 추정 사용")
+            prompt = self._build_prompt_for_food(features, food, i)
+            try:
+                response_text = llm_response_cache.generate_text(
+                    self._model,
+                    prompt,
+                    generation_config=dict(
+                        temperature=settings.LLM_TEMPERATURE, 
+                        top_p=settings.LLM_TOP_P,
+                        candidate_count=1
+                    ),
+                )
+                mass_info = self._parse_response(response_text)
+                mass_info["calculation_method"] = "llm_direct_estimation"
+                mass_info["density_info"] = density_info  # 참고용
+            except Exception as e:
+                logging.error(f"음식 {i} LLM 직접 추정 실패: {e}")
+                mass_info = {
+                    "error": str(e),
+                    "estimated_mass_g": 100.0,  # 기본값
+                    "confidence": 0.2
+                }
+        
+        # 음식별 정보 추가
+        return self._attach_food_info(mass_info, food, i)
+
+    def _timeout_estimation(self, features: dict, food: dict, i: int, image: np.ndarray | ImageContext = None,
+                            density_info: dict = None, budget: LLMCallBudget = None) -> dict:
+        """시간 초과된 음식의 기본 추정 결과"""
+        mass_info = {
+            "error": f"LLM 호출 시간 초과 ({settings.LLM_CALL_TIMEOUT_SECONDS}s)",
+            "estimated_mass_g": 100.0,  # 기본값
+            "confidence": 0.2
+        }
+        return self._attach_food_info(mass_info, food, i)
+
+    @staticmethod
+    def _attach_food_info(mass_info: dict, food: dict, i: int) -> dict:
+        mass_info["food_index"] = i
+        mass_info["food_bbox"] = food.get("bbox", [])
+        mass_info["food_pixel_area"] = food.get("pixel_area", 0)
+        return mass_info
+
+    def verify_mass_with_multimodal(self, image: np.ndarray | ImageContext, initial_estimation: dict, features: dict,
+                                    budget: LLMCallBudget = None) -> dict:
         if self._model is None:
             return {"error": "LLM 모델이 초기화되지 않았습니다."}
+        if budget is not None and not budget.try_acquire(reserved=True):
+            return {"error": "LLM 호출 한도 초과"}
         try:
             multimodal_model = genai.GenerativeModel(settings.MULTIMODAL_MODEL_NAME or settings.LLM_MODEL_NAME)
 
@@ -140,51 +371,29 @@ class LLMMassEstimator(BaseModel):
                 # 기준물체가 없으면 초기 추정값을 완전히 무시
                 multimodal_initial = {"no_food_detected": initial_estimation.get("no_food_detected", False)}
 
-            # 디버그: 원본 이미지 정보 출력
-            if settings.DEBUG_MODE:
-                print(f"\n🔍 멀티모달 검증 이미지 처리:")
-                print(f"   원본 이미지 크기: {image.shape}")
-                print(f"   원본 BGR 평균: {np.mean(image, axis=(0,1))}")
-
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            max_size = 1536
-            h, w = image_rgb.shape[:2]
-
-            if settings.DEBUG_MODE:
-                print(f"   RGB 변환 후 크기: {image_rgb.shape}")
-                print(f"   RGB 평균: {np.mean(image_rgb, axis=(0,1))}")
-
-            if max(h, w) > max_size:
-                scale = max_size / max(h, w)
-                new_h, new_w = int(h * scale), int(w * scale)
-                image_rgb = cv2.resize(image_rgb, (new_w, new_h))
-                if settings.DEBUG_MODE:
-                    print(f"   리사이즈 후 크기: {image_rgb.shape} (스케일: {scale:.3f})")
-                    print(f"   리사이즈 후 RGB 평균: {np.mean(image_rgb, axis=(0,1))}")
-
-            # 디버그: 처리된 이미지 저장
-            if settings.DEBUG_MODE:
-                cv2.imwrite("debug_multimodal_input.jpg", cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR))
-                print(f"   멀티모달 입력 이미지 저장: debug_multimodal_input.jpg")
-
-            # 반드시 BGR로 변환 후 인코딩 (색상 문제 방지)
-            image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
-            _, buffer = cv2.imencode('.jpg', image_bgr)
-            image_base64 = base64.b64encode(buffer).decode('utf-8')
+            # 음식/기준 물체 영역의 합집합만 잘라서 전송 (감지된 객체가 없으면 전체 프레임)
+            context = ImageContext.of(image)
+            boxes = [obj.get("bbox") for obj in features.get("food_objects", []) + reference_objects]
+            image_base64 = build_scene_payload(context, boxes)
 
             if settings.DEBUG_MODE:
-                print(f"   JPEG 버퍼 크기: {len(buffer)} bytes")
-                print(f"   Base64 길이: {len(image_base64)} 문자")
+                # 디코딩과 저장은 디버그 저장 스레드에서 수행 (요청 스레드는 디스크 I/O를 기다리지 않음)
+                save_path = settings.RESULTS_DIR / "debug_multimodal_input.jpg"
+                debug_writer.submit(save_path, lambda: cv2.imdecode(
+                    np.frombuffer(base64.b64decode(image_base64), np.uint8), cv2.IMREAD_COLOR
+                ))
+                logging.info(f"🔍 멀티모달 검증 이미지: 원본 크기 {context.shape}, Base64 길이 {len(image_base64)} 문자, 저장 경로 {save_path}")
 
             prompt = self._build_multimodal_prompt(multimodal_initial, features)
             multimodal_content = [{"parts": [{"text": prompt}, {"inline_data": {"mime_type": "image/jpeg", "data": image_base64}}]}]
 
             if settings.DEBUG_MODE:
-                print(f"   멀티모달 프롬프트 길이: {len(prompt)} 문자")
+                logging.info(f"멀티모달 프롬프트 길이: {len(prompt)} 문자")
 
-            response = multimodal_model.generate_content(
+            response_text = llm_response_cache.generate_text(
+                multimodal_model,
                 multimodal_content,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=dict(
                     temperature=settings.LLM_TEMPERATURE, 
                     top_p=settings.LLM_TOP_P,
                     candidate_count=1  # 완전히 결정론적
@@ -192,10 +401,9 @@ class LLMMassEstimator(BaseModel):
             )
 
             if settings.DEBUG_MODE:
-                print(f"   LLM 응답 길이: {len(response.text)} 문자")
-                print(f"   LLM 응답 미리보기: {response.text[:200]}...")
+                logging.info(f"LLM 응답 길이: {len(response_text)} 문자, 미리보기: {response_text[:200]}...")
 
-            return self._parse_multimodal_response(response.text, multimodal_initial, features)
+            return self._parse_multimodal_response(response_text, multimodal_initial, features)
         except Exception as e:
             logging.error(f"멀티모달 검증 중 오류 발생: {e}")
             return {"error": str(e)}
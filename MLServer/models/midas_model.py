@@ -2,11 +2,16 @@ import cv2
 import torch
 import numpy as np
 import logging
-from typing import Dict
+import threading
+from typing import Dict, List, Tuple
 from PIL import Image, ImageOps
 
 from config.settings import settings
+from config.profiles import get_profile
 from utils.base_model import BaseModel
+from models import onnx_backend
+from models.model_registry import ModelRegistryError, model_registry
+from models.quantization import quantization_mode, quantize_model
 
 class MiDaSDepthModel(BaseModel):
     """
@@ -18,56 +23,247 @@ class MiDaSDepthModel(BaseModel):
     
     def __init__(self):
         self._transform = None
+        self._variants: Dict[str, Tuple[torch.nn.Module, object]] = {}
+        self._variant_lock = threading.Lock()
+        self._quantization_warned = False
         super().__init__()
     
     def get_model_name(self) -> str:
         return "MiDaS 깊이 추정 모델"
     
     def _initialize_model(self) -> None:
-        """MiDaS 모델 초기화"""
-        model_type = settings.MIDAS_MODEL_TYPE
-        
-        try:
-            self._model = torch.hub.load("intel-isl/MiDaS", model_type, trust_repo=True)
-            self._model.to(self.device)
-            self._model.eval()
+        """
+        기본 파이프라인 프로필의 MiDaS 모델 초기화 (다른 프로필의 모델은 처음 사용할 때 로드)
+        MIDAS_QUANTIZATION이 dynamic/static이면 양자화한 모델을 기본으로 사용합니다.
+        """
+        variant = self.load_variant(get_profile().midas_model_type)
+        if variant is not None:
+            self._model, self._transform = variant
 
-            transforms = torch.hub.load("intel-isl/MiDaS", "transforms", trust_repo=True)
-            self._transform = transforms.dpt_transform if "dpt" in model_type.lower() else transforms.small_transform
-            
-            self._log_success(f"로딩 성공: {model_type} -> {self.device}")
+    def load_variant(self, model_type: str, quantization: str = None) -> Tuple[torch.nn.Module, object] | None:
+        """
+        MiDaS 모델 종류(MiDaS_small, DPT_Hybrid, DPT_Large 등)를 로드합니다.
+        종류별로 한 번만 로드하고 이후에는 보관된 모델을 반환합니다. (실패 시 None)
+        INFERENCE_BACKEND=onnx이면 ONNX로 내보낸 모델을 onnxruntime CPU 세션으로 로드합니다.
+        quantization(none | dynamic | static, 기본값: settings.MIDAS_QUANTIZATION)을 주면 float 모델을 양자화한
+        모델을 따로 보관합니다. (양자화는 torch 백엔드의 CPU에서만 적용)
+        """
+        quantization = self._effective_quantization(quantization)
+        key = model_type if quantization == "none" else f"{model_type}:{quantization}"
+        variant = self._variants.get(key)
+        if variant is not None:
+            return variant
+        if quantization != "none":
+            # float 모델을 먼저 로드(또는 재사용)한 뒤 양자화
+            base = self.load_variant(model_type, "none")
+            if base is None:
+                return None
+        with self._variant_lock:
+            if key in self._variants:
+                return self._variants[key]
+            try:
+                if quantization != "none":
+                    model, transform = base
+                    self._variants[key] = (quantize_model(model, quantization, transform), transform)
+                    self._log_success(f"양자화 성공: {model_type} ({quantization} INT8)")
+                else:
+                    variant = self._load_onnx_variant(model_type) if onnx_backend.is_enabled() else None
+                    if variant is None:
+                        variant = self._load_torch_variant(model_type)
+                        self._log_success(f"로딩 성공: {model_type} -> {self.device}")
+                    self._variants[key] = variant
+                return self._variants[key]
+            except Exception as e:
+                self._log_error(f"로딩 실패 ({key})", e)
+                return None
+
+    def _load_onnx_variant(self, model_type: str) -> Tuple[onnx_backend.OnnxDepthModel, object] | None:
+        """
+        ONNX로 내보낸 MiDaS 모델을 onnxruntime 세션으로 로드합니다.
+        내보내기나 torch 모델과의 출력 비교에 실패하면 None을 반환하여 torch 모델을 사용하게 합니다.
+        """
+        # 내보낸 파일은 검증된 가중치의 해시로 구분하므로 저장소에 먼저 등록
+        self._ensure_registered(model_type)
+        try:
+            onnx_path = onnx_backend.export_midas(
+                model_type,
+                model_registry.pinned_sha256(model_type),
+                lambda: self._load_torch_variant(model_type)[0],
+            )
+            session = onnx_backend.create_session(onnx_path)
         except Exception as e:
-            self._log_error("로딩 실패", e)
-            self._model = None
+            logging.warning(f"MiDaS {model_type}을(를) ONNX로 사용할 수 없어 torch 모델을 사용합니다: {e}")
+            return None
+        self._log_success(f"로딩 성공: {model_type} -> onnxruntime CPU ({onnx_path.name})")
+        return onnx_backend.OnnxDepthModel(session), onnx_backend.midas_transform(model_type)
+
+    def _effective_quantization(self, quantization: str = None) -> str:
+        """적용 가능한 양자화 방식 (ONNX 백엔드나 GPU에서는 양자화하지 않음)"""
+        quantization = quantization_mode(quantization)
+        if quantization != "none" and (onnx_backend.is_enabled() or self.device != "cpu"):
+            if not self._quantization_warned:
+                logging.warning(f"MiDaS {quantization} 양자화는 torch 백엔드의 CPU에서만 지원되어 float 모델을 사용합니다.")
+                self._quantization_warned = True
+            return "none"
+        return quantization
 
-    def estimate_depth(self, image: np.ndarray) -> np.ndarray | None:
+    def _load_torch_variant(self, model_type: str) -> Tuple[torch.nn.Module, object]:
+        """
+        MiDaS 모델과 입력 변환을 로컬 모델 저장소(MODEL_REGISTRY_DIR)에서 체크섬을 검증한 뒤 로드합니다.
+        저장소에 없으면 코드와 가중치를 받아 저장소에 추가한 뒤 로드합니다. (고정된 해시가 있으면 그 값으로 검증)
+        MODEL_REGISTRY_OFFLINE=True이면 받지 않고, MODEL_REGISTRY_REQUIRE_PINNED=True이면 해시가 고정되지 않은 모델은 받지 않습니다.
+        """
+        self._ensure_registered(model_type)
+        return model_registry.load_midas(model_type, self.device)
+
+    def _ensure_registered(self, model_type: str) -> None:
+        """로컬 모델 저장소에 없으면 받아서 추가합니다. (_load_torch_variant 참고)"""
+        if not model_registry.has_midas(model_type):
+            populate = f"python scripts/populate_model_registry.py --models {model_type}"
+            if settings.MODEL_REGISTRY_OFFLINE:
+                raise ModelRegistryError(f"로컬 모델 저장소에 {model_type}이(가) 없습니다: {model_registry.root} ({populate})")
+            if settings.MODEL_REGISTRY_REQUIRE_PINNED and model_registry.pinned_sha256(model_type) is None:
+                raise ModelRegistryError(
+                    f"{model_type} 가중치의 해시가 고정되지 않았습니다. ({populate} --sha256 {model_type}=<SHA-256>)"
+                )
+            logging.warning(f"로컬 모델 저장소에 {model_type}이(가) 없어 받아서 추가합니다: {model_registry.root}")
+            model_registry.populate_midas(model_type)
+
+    def estimate_depth(self, image: np.ndarray, rgb_image: np.ndarray = None, model_type: str = None,
+                       roi: Tuple[int, int, int, int] = None, quantization: str = None) -> np.ndarray | None:
         """
         주어진 이미지에 대해 깊이 맵을 추정합니다.
+        rgb_image가 주어지면 (예: ImageContext.rgb) BGR→RGB 변환을 다시 하지 않습니다.
+        model_type을 주면 해당 MiDaS 모델을 사용합니다. (기본값: 기본 파이프라인 프로필의 모델)
+        roi (x1, y1, x2, y2)를 주면 해당 영역만 추론하고 전체 프레임 좌표의 깊이 맵에 배치합니다. (_place_roi 참고)
+        quantization을 주면 해당 방식으로 양자화한 모델을 사용합니다. (기본값: settings.MIDAS_QUANTIZATION)
         """
-        if self._model is None or self._transform is None:
+        variant = self.load_variant(model_type or get_profile().midas_model_type, quantization)
+        if variant is None:
             logging.error("MiDaS 모델이 로드되지 않아 깊이 추정을 수행할 수 없습니다.")
             return None
+        model, transform = variant
 
         try:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if rgb_image is None:
+                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             
-            with torch.no_grad():
-                transformed_image = self._transform(rgb_image).to(self.device)
-                prediction = self._model(transformed_image)
+            frame_size = rgb_image.shape[:2]
+            if roi is not None:
+                x1, y1, x2, y2 = roi
+                rgb_image = np.ascontiguousarray(rgb_image[y1:y2, x1:x2])
 
-                prediction = torch.nn.functional.interpolate(
-                    prediction.unsqueeze(1),
-                    size=rgb_image.shape[:2],
-                    mode="bicubic",
-                    align_corners=False,
-                ).squeeze()
+            with torch.no_grad():
+                transformed_image = transform(rgb_image).to(self.device)
+                prediction = model(transformed_image)
 
-            return prediction.cpu().numpy()
+            return self._postprocess_prediction(prediction[0], frame_size, roi)
 
         except Exception as e:
             logging.error(f"MiDaS 깊이 추정 중 오류 발생: {e}")
             return None
 
+    def estimate_depths(self, images: List[np.ndarray], model_type: str = None,
+                        rois: List[Tuple[int, int, int, int] | None] = None) -> List[np.ndarray | None]:
+        """
+        여러 이미지의 깊이 맵을 배치로 추정합니다.
+        변환된 입력의 크기가 서로 다르면 가장 큰 크기에 맞춰 오른쪽/아래쪽을 패딩하여 하나의 배치로 추론하고,
+        예측 결과에서 패딩 영역을 잘라낸 뒤 이미지별 원본 크기로 복원합니다. (DEPTH_NATIVE_RESOLUTION이면 모델 해상도 유지)
+        rois를 주면 이미지별로 해당 영역만 추론합니다. (None인 항목은 전체 프레임)
+
+        Returns:
+            이미지 순서와 같은 깊이 맵 리스트 (실패한 배치의 이미지는 None)
+        """
+        variant = self.load_variant(model_type or get_profile().midas_model_type)
+        if variant is None:
+            logging.error("MiDaS 모델이 로드되지 않아 깊이 추정을 수행할 수 없습니다.")
+            return [None] * len(images)
+        model, transform = variant
+
+        rois = rois or [None] * len(images)
+        batch_size = max(1, settings.BATCH_SIZE)
+        depth_maps = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            chunk_rois = rois[start:start + batch_size]
+            try:
+                rgb_images = [
+                    cv2.cvtColor(image if roi is None else image[roi[1]:roi[3], roi[0]:roi[2]], cv2.COLOR_BGR2RGB)
+                    for image, roi in zip(chunk, chunk_rois)
+                ]
+                inputs = [transform(rgb_image) for rgb_image in rgb_images]
+                batch, input_sizes = self._pad_to_batch(inputs)
+
+                with torch.no_grad():
+                    predictions = model(batch.to(self.device))
+
+                for prediction, (h, w), image, roi in zip(predictions, input_sizes, chunk, chunk_rois):
+                    depth_maps.append(self._postprocess_prediction(prediction[:h, :w], image.shape[:2], roi))
+
+            except Exception as e:
+                logging.error(f"MiDaS 배치 깊이 추정 중 오류 발생: {e}")
+                depth_maps.extend([None] * len(chunk))
+
+        return depth_maps
+
+    def _pad_to_batch(self, inputs: List[torch.Tensor]) -> Tuple[torch.Tensor, List[Tuple[int, int]]]:
+        """(1, 3, H, W) 입력들을 가장 큰 H, W에 맞춰 가장자리 값으로 패딩한 뒤 하나의 배치로 합칩니다."""
+        input_sizes = [tuple(tensor.shape[-2:]) for tensor in inputs]
+        max_h = max(h for h, _ in input_sizes)
+        max_w = max(w for _, w in input_sizes)
+        padded = [
+            torch.nn.functional.pad(tensor, (0, max_w - w, 0, max_h - h), mode="replicate") if (h, w) != (max_h, max_w) else tensor
+            for tensor, (h, w) in zip(inputs, input_sizes)
+        ]
+        return torch.cat(padded, dim=0), input_sizes
+
+    def _postprocess_prediction(self, prediction: torch.Tensor, output_size: Tuple[int, int],
+                                roi: Tuple[int, int, int, int] = None) -> np.ndarray:
+        """
+        예측 결과를 numpy 깊이 맵으로 변환합니다.
+        DEPTH_NATIVE_RESOLUTION이면 모델 해상도 그대로 반환하고 (객체별 깊이 통계는 bbox를 축소해 계산),
+        아니면 원본 이미지 크기로 보간합니다.
+        """
+        if roi is not None:
+            return self._place_roi(prediction, output_size, roi)
+        if settings.DEPTH_NATIVE_RESOLUTION:
+            return prediction.float().cpu().numpy()
+        return self._resize_prediction(prediction, output_size)
+
+    def _place_roi(self, prediction: torch.Tensor, frame_size: Tuple[int, int],
+                   roi: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        잘라낸 영역의 예측 결과를 전체 프레임 비율의 깊이 맵에 배치합니다.
+        마스크 좌표(Mask.placement)가 그대로 적용되도록 프레임 전체와 같은 가로세로 비율의 격자를 만들고,
+        영역 밖은 예측의 최솟값(가장 먼 깊이)으로 채웁니다.
+        DEPTH_NATIVE_RESOLUTION이면 영역의 모델 해상도에 맞춘 격자 (원본보다 크게 만들지는 않음),
+        아니면 원본 이미지 크기 격자를 사용합니다.
+        """
+        x1, y1, x2, y2 = roi
+        frame_h, frame_w = frame_size
+        scale = 1.0
+        if settings.DEPTH_NATIVE_RESOLUTION:
+            scale = min(1.0, prediction.shape[0] / (y2 - y1), prediction.shape[1] / (x2 - x1))
+        grid_h, grid_w = max(1, round(frame_h * scale)), max(1, round(frame_w * scale))
+        sy, sx = grid_h / frame_h, grid_w / frame_w
+        ty1, tx1 = min(int(np.floor(y1 * sy)), grid_h - 1), min(int(np.floor(x1 * sx)), grid_w - 1)
+        ty2, tx2 = max(min(int(np.ceil(y2 * sy)), grid_h), ty1 + 1), max(min(int(np.ceil(x2 * sx)), grid_w), tx1 + 1)
+
+        region = self._resize_prediction(prediction, (ty2 - ty1, tx2 - tx1)).reshape(ty2 - ty1, tx2 - tx1)
+        depth_map = np.full((grid_h, grid_w), region.min(), dtype=region.dtype)
+        depth_map[ty1:ty2, tx1:tx2] = region
+        return depth_map
+
+    def _resize_prediction(self, prediction: torch.Tensor, output_size: Tuple[int, int]) -> np.ndarray:
+        """(H, W) 예측 결과를 원본 이미지 크기로 보간합니다."""
+        prediction = torch.nn.functional.interpolate(
+            prediction[None, None],
+            size=output_size,
+            mode="bicubic",
+            align_corners=False,
+        ).squeeze()
+        return prediction.cpu().numpy()
+
     def get_object_depth_info(self, depth_map: np.ndarray, mask: np.ndarray) -> Dict:
         """
         특정 객체(마스크)의 깊이 정보 추출
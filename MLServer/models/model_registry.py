@@ -0,0 +1,383 @@
+"""
+MiDaS 로컬 모델 저장소 (settings.MODEL_REGISTRY_DIR)
+torch.hub 대신 미리 받아 둔 hubconf 코드와 가중치를 로드하여 서버 시작 시 네트워크에 접근하지 않습니다.
+- manifest.json: 저장소별 ref와 .py 파일의 SHA-256, 모델 종류별 가중치 파일/원본 URL/SHA-256 (커밋하여 고정)
+  릴리스 페이지 등에서 확인한 해시를 채우기 스크립트에 넘기면 그 값과 같을 때만 등록합니다.
+  고정값이 없는 모델은 처음 받은 파일의 해시로 고정하고, 이후에는 항상 그 값으로 검증합니다.
+- repos/, checkpoints/: 실제 코드와 가중치 (scripts/populate_model_registry.py로 채우거나, 서버가 처음 사용할 때 자동으로 채움)
+- .verified.json: 검증을 통과한 파일의 크기/수정 시각 기록. 기록과 같으면 큰 가중치 파일을 다시 해시하지 않음
+가중치는 mmap으로 읽어 state_dict 복사 없이 모델에 연결합니다. (텐서만 담긴 형식만 허용, pickle 전체 로드는 하지 않음)
+"""
+
+import hashlib
+import json
+import logging
+import pickle
+import shutil
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Tuple
+
+import torch
+
+from config.settings import settings
+
+MIDAS_REPO = "intel-isl/MiDaS"
+EFFICIENTNET_REPO = "rwightman/gen-efficientnet-pytorch"
+
+# torch.hub가 기본으로 받는 브랜치
+DEFAULT_REFS = {
+    MIDAS_REPO: "master",
+    EFFICIENTNET_REPO: "master",
+}
+
+# MiDaS hubconf가 내려받는 가중치 (hubconf.py의 URL과 동일)
+MIDAS_WEIGHT_URLS = {
+    "DPT_Large": "https://github.com/isl-org/MiDaS/releases/download/v3/dpt_large_384.pt",
+    "DPT_Hybrid": "https://github.com/isl-org/MiDaS/releases/download/v3/dpt_hybrid_384.pt",
+    "MiDaS_small": "https://github.com/isl-org/MiDaS/releases/download/v2_1/midas_v21_small_256.pt",
+}
+
+# 모델 종류별로 hubconf 안에서 추가로 불러오는 torch.hub 저장소 (MiDaS_small의 EfficientNet 백본)
+MIDAS_REPO_DEPENDENCIES = {
+    "MiDaS_small": (EFFICIENTNET_REPO,),
+}
+
+_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# torch.hub.load를 로컬 저장소로 돌리는 동안 다른 로드와 겹치지 않도록 잡는 잠금
+HUB_LOAD_LOCK = threading.RLock()
+
+
+class ModelRegistryError(Exception):
+    """로컬 모델 저장소에 모델이 없거나 체크섬이 맞지 않을 때 발생"""
+
+
+def sha256_file(path: Path) -> str:
+    """파일의 SHA-256 (큰 가중치 파일도 나누어 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_repo(repo: str, ref: str, workdir: Path) -> Path:
+    """GitHub 저장소 압축 파일을 받아 풀고 hubconf.py가 있는 최상위 폴더를 반환합니다."""
+    archive = workdir / f"{repo.replace('/', '_')}.zip"
+    torch.hub.download_url_to_file(f"https://github.com/{repo}/archive/{ref}.zip", str(archive), progress=False)
+    target = workdir / repo.replace("/", "_")
+    with zipfile.ZipFile(archive) as zf:
+        zf.extractall(target)
+    (top,) = [path for path in target.iterdir() if path.is_dir()]
+    return top
+
+
+def _repo_name(repo: str) -> str:
+    """owner/name[:ref] -> owner/name"""
+    return repo.split(":", 1)[0]
+
+
+class ModelRegistry:
+    """
+    manifest.json으로 고정한 MiDaS 코드와 가중치를 검증하고 로드합니다.
+    - has_midas(): 모델 종류에 필요한 코드/가중치가 모두 등록되어 있는지
+    - load_midas(): 체크섬 검증 후 로컬 코드로 모델과 입력 변환을 만들고 가중치를 연결
+    - populate_midas(): 모델 종류에 필요한 코드/가중치를 받아 채우기 (고정된 해시가 있으면 그 값으로 검증)
+    - add_repo()/add_weights(): 저장소 채우기 (이미 고정된 해시와 다르면 repin=True일 때만 교체)
+    """
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root or settings.MODEL_REGISTRY_DIR)
+        self.manifest_path = self.root / "manifest.json"
+        self.stamps_path = self.root / ".verified.json"
+        self._lock = threading.Lock()
+        self._populate_lock = threading.Lock()
+        self.manifest = self._read_json(self.manifest_path, {"repos": {}, "weights": {}})
+        self.manifest.setdefault("repos", {})
+        self.manifest.setdefault("weights", {})
+        self._stamps = self._read_json(self.stamps_path, {})
+
+    # ---------- 조회 / 검증 ----------
+
+    def repo_dir(self, repo: str) -> Path:
+        return self.root / "repos" / _repo_name(repo).replace("/", "_")
+
+    def pinned_sha256(self, model_type: str) -> str | None:
+        """매니페스트에 고정된 가중치 SHA-256 (등록되지 않았으면 None)"""
+        weights = self.manifest["weights"].get(model_type)
+        return weights["sha256"] if weights is not None else None
+
+    def has_midas(self, model_type: str) -> bool:
+        """코드와 가중치가 매니페스트에 등록되어 있고 파일이 존재하는지 (체크섬은 load_midas에서 검증)"""
+        weights = self.manifest["weights"].get(model_type)
+        repos = (MIDAS_REPO,) + MIDAS_REPO_DEPENDENCIES.get(model_type, ())
+        return (
+            weights is not None
+            and (self.root / weights["file"]).is_file()
+            and all(repo in self.manifest["repos"] and self.repo_dir(repo).is_dir() for repo in repos)
+        )
+
+    def verify_file(self, path: Path, expected_sha256: str) -> None:
+        """
+        파일의 SHA-256이 고정값과 같은지 확인합니다.
+        이전에 검증한 뒤 크기/수정 시각이 바뀌지 않았다면 다시 해시하지 않습니다.
+
+        Raises:
+            ModelRegistryError: 파일이 없거나 체크섬 불일치
+        """
+        if not path.is_file():
+            raise ModelRegistryError(f"모델 저장소 파일이 없습니다: {path}")
+        key = str(path.relative_to(self.root))
+        stat = path.stat()
+        stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": expected_sha256}
+        if self._stamps.get(key) == stamp:
+            return
+
+        actual = sha256_file(path)
+        if actual != expected_sha256:
+            raise ModelRegistryError(
+                f"체크섬이 일치하지 않습니다: {path} (기대값 {expected_sha256[:12]}…, 실제 {actual[:12]}…)"
+            )
+        with self._lock:
+            self._stamps[key] = stamp
+            self._write_json(self.stamps_path, self._stamps)
+
+    def verify_repo(self, repo: str) -> None:
+        """저장소의 등록된 .py 파일을 모두 검증합니다."""
+        entry = self.manifest["repos"].get(repo)
+        if entry is None:
+            raise ModelRegistryError(f"모델 저장소에 등록되지 않은 코드입니다: {repo}")
+        directory = self.repo_dir(repo)
+        for name, sha256 in entry["files"].items():
+            self.verify_file(directory / name, sha256)
+
+    def verify_midas(self, model_type: str) -> Path:
+        """모델 종류에 필요한 코드와 가중치를 검증하고 가중치 경로를 반환합니다."""
+        weights = self.manifest["weights"].get(model_type)
+        if weights is None:
+            raise ModelRegistryError(f"모델 저장소에 등록되지 않은 MiDaS 모델입니다: {model_type}")
+        for repo in (MIDAS_REPO,) + MIDAS_REPO_DEPENDENCIES.get(model_type, ()):
+            self.verify_repo(repo)
+        path = self.root / weights["file"]
+        self.verify_file(path, weights["sha256"])
+        return path
+
+    def verify_all(self) -> Dict[str, str]:
+        """등록된 모든 항목을 검증한 결과 {이름: "ok" | 오류 메시지} (CLI용, 기록을 무시하고 전부 다시 해시)"""
+        self._stamps = {}
+        results = {}
+        for name in list(self.manifest["repos"]) + list(self.manifest["weights"]):
+            try:
+                if name in self.manifest["repos"]:
+                    self.verify_repo(name)
+                else:
+                    entry = self.manifest["weights"][name]
+                    self.verify_file(self.root / entry["file"], entry["sha256"])
+                results[name] = "ok"
+            except ModelRegistryError as e:
+                results[name] = str(e)
+        return results
+
+    # ---------- 로드 ----------
+
+    def load_midas(self, model_type: str, device: str) -> Tuple[torch.nn.Module, object]:
+        """
+        로컬 코드로 MiDaS 모델(가중치 없이)과 입력 변환을 만든 뒤, 검증한 가중치를 mmap으로 읽어 연결합니다.
+
+        Raises:
+            ModelRegistryError: 등록되지 않았거나 체크섬 불일치
+        """
+        weights_path = self.verify_midas(model_type)
+        midas_dir = str(self.repo_dir(MIDAS_REPO))
+        with HUB_LOAD_LOCK, self._local_hub():
+            model = torch.hub.load(midas_dir, model_type, source="local", pretrained=False)
+            transforms = torch.hub.load(midas_dir, "transforms", source="local")
+
+        model.load_state_dict(self._load_state_dict(weights_path), assign=True)
+        model.to(device)
+        model.eval()
+        transform = transforms.dpt_transform if "dpt" in model_type.lower() else transforms.small_transform
+        return model, transform
+
+    @staticmethod
+    def _load_state_dict(path: Path) -> Dict[str, torch.Tensor]:
+        """
+        가중치를 weights_only로 읽습니다. (mmap을 쓸 수 없는 구 직렬화 형식이면 메모리로 읽음)
+
+        Raises:
+            ModelRegistryError: 텐서 외의 객체가 들어 있어 weights_only로 읽을 수 없는 파일
+        """
+        try:
+            try:
+                state = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+            except RuntimeError as e:
+                logging.info(f"가중치를 mmap으로 읽을 수 없어 메모리로 로드합니다: {path.name} ({e})")
+                state = torch.load(path, map_location="cpu", weights_only=True)
+        except pickle.UnpicklingError as e:
+            # 체크섬이 맞더라도 임의 코드를 실행할 수 있는 pickle 전체 로드는 하지 않음
+            raise ModelRegistryError(f"weights_only로 읽을 수 없는 가중치 파일입니다: {path.name} ({e})") from e
+        # 학습 체크포인트 형식이면 모델 가중치만 사용 (MiDaS BaseModel.load와 동일)
+        if "optimizer" in state:
+            state = state["model"]
+        return state
+
+    @contextmanager
+    def _local_hub(self):
+        """
+        hubconf 안에서 호출하는 torch.hub.load(github 저장소)를 로컬 저장소로 돌립니다.
+        백본의 ImageNet 가중치는 MiDaS 가중치로 덮어쓰므로 pretrained=False로 받지 않습니다.
+        등록되지 않은 저장소를 요청하면 네트워크로 받지 않고 실패합니다.
+        torch.hub.load는 전역 함수이므로 HUB_LOAD_LOCK 안에서만 사용하고, 교체한 함수는 이 스레드의 호출만 돌립니다.
+        """
+        original = torch.hub.load
+        owner = threading.get_ident()
+
+        def load(repo_or_dir, model, *args, **kwargs):
+            if threading.get_ident() != owner or kwargs.get("source", "github") != "github":
+                return original(repo_or_dir, model, *args, **kwargs)
+            repo = _repo_name(repo_or_dir)
+            if repo not in self.manifest["repos"]:
+                raise ModelRegistryError(f"모델 저장소에 없는 torch.hub 저장소를 요청했습니다: {repo_or_dir}")
+            self.verify_repo(repo)
+            kwargs.update(source="local", pretrained=False)
+            kwargs.pop("trust_repo", None)
+            return original(str(self.repo_dir(repo)), model, *args, **kwargs)
+
+        torch.hub.load = load
+        try:
+            yield
+        finally:
+            torch.hub.load = original
+
+    # ---------- 채우기 ----------
+
+    def populate_midas(self, model_type: str, expected_sha256: str = None) -> None:
+        """
+        모델 종류에 필요한 코드와 가중치 중 저장소에 없는 것을 받아 추가하고 매니페스트를 저장합니다.
+        가중치는 expected_sha256, 없으면 매니페스트의 고정값과 같아야 하며, 둘 다 없으면 받은 파일의 해시로 고정합니다.
+        코드도 이미 고정된 해시가 있으면 받은 파일이 그 값과 같아야 합니다.
+
+        Raises:
+            ModelRegistryError: 받은 코드/가중치가 고정된 해시와 다름
+        """
+        if model_type not in MIDAS_WEIGHT_URLS:
+            raise ModelRegistryError(f"원본 URL을 알 수 없는 MiDaS 모델입니다: {model_type}")
+        expected_sha256 = expected_sha256 or self.pinned_sha256(model_type)
+        with self._populate_lock, tempfile.TemporaryDirectory() as workdir:
+            workdir = Path(workdir)
+            before = json.dumps(self.manifest, sort_keys=True)
+            try:
+                for repo in (MIDAS_REPO,) + MIDAS_REPO_DEPENDENCIES.get(model_type, ()):
+                    if repo in self.manifest["repos"] and self.repo_dir(repo).is_dir():
+                        continue
+                    ref = self.manifest["repos"].get(repo, {}).get("ref", DEFAULT_REFS[repo])
+                    logging.info(f"모델 저장소에 {repo}@{ref} 코드를 받습니다.")
+                    self.add_repo(repo, ref, download_repo(repo, ref, workdir))
+
+                weights = self.manifest["weights"].get(model_type)
+                if weights is None or not (self.root / weights["file"]).is_file():
+                    url = MIDAS_WEIGHT_URLS[model_type]
+                    source = workdir / Path(url).name
+                    logging.info(f"모델 저장소에 {model_type} 가중치를 받습니다: {url}")
+                    torch.hub.download_url_to_file(url, str(source), progress=False)
+                    if expected_sha256 is None:
+                        logging.warning(
+                            f"{model_type} 가중치의 고정된 해시가 없어 받은 파일의 해시로 고정합니다. "
+                            f"({self.manifest_path}를 커밋하면 다른 환경에서도 같은 파일인지 검증)"
+                        )
+                    self.add_weights(model_type, source, url, expected_sha256=expected_sha256)
+            finally:
+                # 실패 전까지 추가한 항목도 파일과 일치하도록 매니페스트 저장 (추가한 항목이 없으면 쓰지 않음)
+                if json.dumps(self.manifest, sort_keys=True) != before:
+                    self.save_manifest()
+
+    def add_repo(self, repo: str, ref: str, source_dir: Path, repin: bool = False) -> None:
+        """
+        source_dir(hubconf.py가 있는 폴더)의 .py 파일을 복사하고 해시를 고정합니다.
+
+        Raises:
+            ModelRegistryError: hubconf.py가 없거나, 이미 고정된 해시와 다른데 repin=False
+        """
+        source_dir = Path(source_dir)
+        if not (source_dir / "hubconf.py").is_file():
+            raise ModelRegistryError(f"hubconf.py가 없는 폴더입니다: {source_dir}")
+        files = {
+            path.relative_to(source_dir).as_posix(): sha256_file(path)
+            for path in sorted(source_dir.rglob("*.py"))
+        }
+        pinned = self.manifest["repos"].get(repo)
+        if pinned is not None and pinned["files"] != files and not repin:
+            raise ModelRegistryError(f"{repo} 코드가 고정된 해시와 다릅니다. 의도한 변경이면 --repin으로 다시 고정하세요.")
+
+        target = self.repo_dir(repo)
+        if source_dir.resolve() != target.resolve():
+            if target.exists():
+                shutil.rmtree(target)
+            for name in files:
+                (target / name).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source_dir / name, target / name)
+        self.manifest["repos"][repo] = {"ref": ref, "files": files}
+
+    def add_weights(self, model_type: str, source_path: Path, url: str, repin: bool = False,
+                    expected_sha256: str = None) -> None:
+        """
+        가중치 파일을 checkpoints/로 복사하고 해시를 고정합니다.
+        expected_sha256을 주면 (릴리스 페이지 등에서 확인한 값) 파일이 그 값과 같을 때만 등록합니다.
+
+        Raises:
+            ModelRegistryError: expected_sha256과 다르거나, 이미 고정된 해시와 다른데 repin=False
+        """
+        source_path = Path(source_path)
+        sha256 = sha256_file(source_path)
+        if expected_sha256 is not None and sha256 != expected_sha256.lower():
+            raise ModelRegistryError(
+                f"{model_type} 가중치가 지정한 해시와 다릅니다: {source_path.name} "
+                f"(기대값 {expected_sha256[:12]}…, 실제 {sha256[:12]}…)"
+            )
+        pinned = self.manifest["weights"].get(model_type)
+        if pinned is not None and pinned["sha256"] != sha256 and not repin:
+            raise ModelRegistryError(
+                f"{model_type} 가중치가 고정된 해시와 다릅니다. 의도한 변경이면 --repin으로 다시 고정하세요."
+            )
+
+        target = self.root / "checkpoints" / source_path.name
+        if source_path.resolve() != target.resolve():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            partial = target.with_name(target.name + ".partial")
+            shutil.copyfile(source_path, partial)
+            partial.replace(target)
+        self.manifest["weights"][model_type] = {
+            "file": target.relative_to(self.root).as_posix(),
+            "url": url,
+            "sha256": sha256,
+        }
+
+    def save_manifest(self) -> None:
+        self._write_json(self.manifest_path, self.manifest)
+
+    # ---------- 내부 ----------
+
+    @staticmethod
+    def _read_json(path: Path, default: Dict) -> Dict:
+        if not path.is_file():
+            return default
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logging.warning(f"모델 저장소 파일을 읽을 수 없습니다: {path} ({e})")
+            return default
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".partial")
+        partial.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        partial.replace(path)
+
+
+# 싱글톤 인스턴스 생성
+model_registry = ModelRegistry()
@@ -0,0 +1,234 @@
+"""
+ONNX Runtime CPU 추론 백엔드 (settings.INFERENCE_BACKEND == "onnx")
+YOLO와 MiDaS 모델을 처음 사용할 때 ONNX로 한 번 내보내 settings.ONNX_CACHE_DIR에 보관하고,
+onnxruntime의 CPUExecutionProvider로 추론합니다. (그래프 최적화 수준과 스레드 수는 설정에서 지정)
+- YOLO: ultralytics로 내보낸 동적 입력 모델을 ultralytics가 그대로 실행하므로 결과 형식(Results)이 같습니다.
+- MiDaS: 배치/높이/너비가 동적인 입력으로 내보내고, torch 모델처럼 호출할 수 있는 OnnxDepthModel로 감쌉니다.
+  입력 변환은 torch.hub transform과 같이 가로세로 비율을 유지하며 32의 배수로 크기를 맞춥니다.
+onnx/onnxruntime은 선택 의존성입니다: pip install onnx onnxruntime
+"""
+
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from config.settings import settings
+
+# ONNX_GRAPH_OPTIMIZATION 값 -> onnxruntime.GraphOptimizationLevel 이름
+_GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+# MiDaS 종류별 입력 기준 크기, 크기 조정 방식, 정규화 값 (torch.hub의 dpt_transform/small_transform과 동일)
+# - minimal: 원본 크기에서 가장 적게 바뀌는 쪽 배율로 가로세로 비율 유지 (짧은 변이 기준 크기)
+# - upper_bound: 긴 변이 기준 크기를 넘지 않도록 가로세로 비율 유지
+MIDAS_INPUT_SPECS = {
+    "DPT_Large": (384, "minimal", (0.5, 0.5, 0.5), (0.5, 0.5, 0.5)),
+    "DPT_Hybrid": (384, "minimal", (0.5, 0.5, 0.5), (0.5, 0.5, 0.5)),
+    "MiDaS_small": (256, "upper_bound", (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+}
+MIDAS_MULTIPLE_OF = 32  # 입력 높이/너비는 이 값의 배수
+MIDAS_PARITY_TOLERANCE = 1e-3  # 내보낸 모델과 torch 모델 출력의 최대 상대 오차
+
+
+def is_enabled() -> bool:
+    """ONNX 백엔드 사용 여부"""
+    return settings.INFERENCE_BACKEND.strip().lower() == "onnx"
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise RuntimeError(
+            "INFERENCE_BACKEND=onnx를 사용하려면 onnx, onnxruntime 패키지가 필요합니다: pip install onnx onnxruntime"
+        ) from e
+    return onnxruntime
+
+
+def session_options():
+    """설정값(그래프 최적화 수준, 스레드 수)을 적용한 onnxruntime.SessionOptions"""
+    ort = _import_onnxruntime()
+    level = settings.ONNX_GRAPH_OPTIMIZATION.strip().lower()
+    if level not in _GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(
+            f"지원하지 않는 ONNX 그래프 최적화 수준입니다: {level} ({', '.join(_GRAPH_OPTIMIZATION_LEVELS)} 중 선택)"
+        )
+    options = ort.SessionOptions()
+    options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _GRAPH_OPTIMIZATION_LEVELS[level])
+    if settings.ONNX_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+    if settings.ONNX_INTER_OP_THREADS > 0:
+        # 연산 간 스레드는 병렬 실행 모드에서만 사용됨
+        options.inter_op_num_threads = settings.ONNX_INTER_OP_THREADS
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    return options
+
+
+def create_session(path: Path):
+    """CPUExecutionProvider 추론 세션 생성"""
+    ort = _import_onnxruntime()
+    return ort.InferenceSession(str(path), sess_options=session_options(), providers=["CPUExecutionProvider"])
+
+
+def cached_path(name: str) -> Path:
+    """내보낸 ONNX 모델 경로 (settings.ONNX_CACHE_DIR/<name>.onnx)"""
+    settings.ONNX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return settings.ONNX_CACHE_DIR / f"{name}.onnx"
+
+
+def export_yolo(weights_path: Path) -> Path:
+    """
+    YOLO 가중치를 ONNX로 내보냅니다. (입력 크기/배치는 동적이므로 프로필별 imgsz와 배치 추론에 그대로 사용)
+    내보낸 파일이 가중치 파일보다 새로우면 다시 내보내지 않습니다.
+    """
+    target = cached_path(Path(weights_path).stem)
+    if target.exists() and target.stat().st_mtime >= Path(weights_path).stat().st_mtime:
+        return target
+
+    from ultralytics import YOLO
+
+    logging.info(f"YOLO 모델을 ONNX로 내보내는 중: {weights_path} -> {target}")
+    exported = YOLO(weights_path).export(format="onnx", dynamic=True, verbose=False)
+    # ultralytics는 가중치 옆에 파일을 만들므로 캐시 위치로 옮김
+    shutil.move(str(exported), str(target))
+    return target
+
+
+def configure_yolo_session(yolo, onnx_path: Path) -> None:
+    """
+    ultralytics가 만든 onnxruntime 세션을 설정(스레드 수, 최적화 수준)을 적용한 세션으로 교체합니다.
+    예측기(predictor)는 첫 추론 때 만들어지므로 작은 빈 이미지로 한 번 웜업한 뒤 교체합니다.
+    """
+    yolo.predict(np.zeros((64, 64, 3), np.uint8), verbose=False)
+    backend = getattr(getattr(yolo, "predictor", None), "model", None)
+    if backend is None or not hasattr(backend, "session"):
+        logging.warning("ultralytics의 ONNX 세션을 찾지 못해 onnxruntime 스레드/최적화 설정을 적용하지 못했습니다.")
+        return
+    backend.session = create_session(onnx_path)
+
+
+def export_midas(model_type: str, weights_sha256: str, load_model: Callable[[], torch.nn.Module]) -> Path:
+    """
+    MiDaS 모델을 배치/높이/너비가 동적인 ONNX로 내보냅니다.
+    파일 이름에 검증된 가중치의 SHA-256을 넣으므로 가중치가 바뀌면 다시 내보내고, 같으면 load_model을 호출하지 않습니다.
+    내보낸 뒤 기준 크기와 다른 가로세로 비율의 입력으로 torch 모델과 출력을 비교하여, 다르면 파일을 남기지 않고 실패합니다.
+    """
+    target = cached_path(f"midas_{model_type}_{weights_sha256[:16]}")
+    if target.exists():
+        return target
+
+    size = midas_input_spec(model_type)[0]
+    logging.info(f"MiDaS 모델을 ONNX로 내보내는 중: {model_type} (입력 크기 동적, 기준 {size}) -> {target}")
+    model = load_model().cpu().eval()
+    # 중간에 실패한 파일이 캐시로 쓰이지 않도록 임시 디렉터리에 쓴 뒤 옮김 (가중치가 별도 .data 파일로 저장될 수 있음)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.stem}-", dir=target.parent))
+    partial = staging / target.name
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                torch.zeros(1, 3, size, size),
+                str(partial),
+                input_names=["image"],
+                output_names=["depth"],
+                dynamic_axes={
+                    "image": {0: "batch", 2: "height", 3: "width"},
+                    "depth": {0: "batch", 1: "height", 2: "width"},
+                },
+                opset_version=17,
+            )
+        _check_export_parity(model, partial, (size, size + 2 * MIDAS_MULTIPLE_OF))
+        # 모델 파일은 마지막에 옮겨 target이 있으면 외부 데이터 파일도 있도록 함
+        for path in staging.iterdir():
+            if path != partial:
+                path.replace(target.parent / path.name)
+        partial.replace(target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def _check_export_parity(model: torch.nn.Module, onnx_path: Path, input_size: Tuple[int, int]) -> None:
+    """내보낸 모델이 내보낼 때와 다른 크기의 입력에서도 torch 모델과 같은 결과를 내는지 확인합니다."""
+    sample = torch.rand(1, 3, *input_size, generator=torch.Generator().manual_seed(0))
+    with torch.no_grad():
+        expected = model(sample).numpy()
+    actual = OnnxDepthModel(create_session(onnx_path))(sample).numpy()
+    if actual.shape != expected.shape:
+        raise RuntimeError(f"ONNX 출력 크기가 torch 모델과 다릅니다: {actual.shape} != {expected.shape}")
+    error = float(np.abs(actual - expected).max() / max(float(np.abs(expected).max()), 1e-6))
+    if error > MIDAS_PARITY_TOLERANCE:
+        raise RuntimeError(f"ONNX 출력이 torch 모델과 다릅니다 (최대 상대 오차 {error:.2e}, 입력 {input_size})")
+
+
+def midas_input_spec(model_type: str) -> Tuple[int, str, Tuple[float, ...], Tuple[float, ...]]:
+    """(기준 크기, 크기 조정 방식, 평균, 표준편차). 목록에 없는 종류는 이름으로 DPT/small 계열을 판단"""
+    if model_type in MIDAS_INPUT_SPECS:
+        return MIDAS_INPUT_SPECS[model_type]
+    return MIDAS_INPUT_SPECS["DPT_Large" if "dpt" in model_type.lower() else "MiDaS_small"]
+
+
+def midas_input_size(model_type: str, height: int, width: int) -> Tuple[int, int]:
+    """원본 (높이, 너비)에 대한 입력 (높이, 너비) (MiDaS transforms.Resize(keep_aspect_ratio=True)와 같은 계산)"""
+    size, method = midas_input_spec(model_type)[:2]
+    scale_height, scale_width = size / height, size / width
+    if method == "minimal":
+        scale = scale_width if abs(1 - scale_width) < abs(1 - scale_height) else scale_height
+        max_value = None
+    else:
+        scale = min(scale_width, scale_height)
+        max_value = size
+    return (
+        _constrain_to_multiple(scale * height, max_value),
+        _constrain_to_multiple(scale * width, max_value),
+    )
+
+
+def _constrain_to_multiple(value: float, max_value: int = None) -> int:
+    """MIDAS_MULTIPLE_OF의 배수로 반올림 (max_value를 넘으면 내림, np.round와 같은 짝수 반올림)"""
+    result = int(np.round(value / MIDAS_MULTIPLE_OF) * MIDAS_MULTIPLE_OF)
+    if max_value is not None and result > max_value:
+        result = int(np.floor(value / MIDAS_MULTIPLE_OF) * MIDAS_MULTIPLE_OF)
+    if result < MIDAS_MULTIPLE_OF:
+        result = int(np.ceil(value / MIDAS_MULTIPLE_OF) * MIDAS_MULTIPLE_OF)
+    return result
+
+
+def midas_transform(model_type: str) -> Callable[[np.ndarray], torch.Tensor]:
+    """RGB 이미지 -> (1, 3, H, W) 입력 텐서 변환 함수 (torch.hub transform과 같은 크기 계산/보간/정규화)"""
+    _, _, mean, std = midas_input_spec(model_type)
+    mean = np.asarray(mean)
+    std = np.asarray(std)
+
+    def transform(rgb_image: np.ndarray) -> torch.Tensor:
+        height, width = midas_input_size(model_type, *rgb_image.shape[:2])
+        resized = cv2.resize(rgb_image / 255.0, (width, height), interpolation=cv2.INTER_CUBIC)
+        normalized = ((resized - mean) / std).astype(np.float32)
+        return torch.from_numpy(np.ascontiguousarray(normalized.transpose(2, 0, 1)))[None]
+
+    return transform
+
+
+class OnnxDepthModel:
+    """
+    MiDaS ONNX 세션을 torch 모델처럼 호출하는 래퍼.
+    (B, 3, H, W) 텐서를 받아 (B, H, W) 예측 텐서를 반환하므로 기존 후처리(보간, ROI 배치)를 그대로 사용합니다.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        inputs = batch.detach().cpu().numpy().astype(np.float32, copy=False)
+        return torch.from_numpy(self.session.run(None, {self.input_name: inputs})[0])
@@ -0,0 +1,105 @@
+"""
+MiDaS INT8 양자화 (settings.MIDAS_QUANTIZATION)
+- dynamic: Linear 계층(DPT의 어텐션 qkv/proj, MLP)의 가중치를 INT8로 바꾸고 활성값은 실행 중에 양자화
+- static: FX 그래프 모드로 관측기를 넣고 MIDAS_CALIBRATION_DIR의 샘플 식사 사진으로 보정한 뒤 INT8로 변환
+  (모델을 FX로 추적할 수 없거나 보정 이미지가 없으면 dynamic으로 대체)
+양자화된 모델은 CPU에서만 실행됩니다. 정확도/속도 비교는 scripts/benchmark_midas_quantization.py를 사용합니다.
+"""
+
+import copy
+import io
+import logging
+from pathlib import Path
+from typing import Callable, List
+
+import cv2
+import numpy as np
+import torch
+
+from config.settings import settings
+from utils.image_decode import decode_image_file
+
+QUANTIZATION_MODES = ("none", "dynamic", "static")
+
+# 보정 이미지로 사용할 파일 확장자
+CALIBRATION_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def quantization_mode(mode: str = None) -> str:
+    """
+    양자화 방식 이름을 정규화합니다. (None이면 settings.MIDAS_QUANTIZATION)
+
+    Raises:
+        ValueError: 알 수 없는 방식
+    """
+    mode = (mode or settings.MIDAS_QUANTIZATION).strip().lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"알 수 없는 MiDaS 양자화 방식입니다: {mode} ({', '.join(QUANTIZATION_MODES)} 중 선택)")
+    return mode
+
+
+def quantize_model(model: torch.nn.Module, mode: str, transform: Callable[[np.ndarray], torch.Tensor]) -> torch.nn.Module:
+    """
+    CPU 위의 float 모델을 mode 방식으로 양자화한 복사본을 반환합니다. (mode가 none이면 그대로 반환)
+    transform은 정적 양자화 보정 이미지를 모델 입력으로 바꾸는 데 사용합니다.
+    """
+    if mode == "dynamic":
+        return quantize_dynamic(model)
+    if mode == "static":
+        try:
+            return quantize_static(model, transform)
+        except Exception as e:
+            logging.warning(f"MiDaS 정적 양자화 실패, 동적 양자화로 대체합니다: {e}")
+            return quantize_dynamic(model)
+    return model
+
+
+def quantize_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """Linear 계층 동적 INT8 양자화 (합성곱 위주인 MiDaS_small은 효과가 작음)"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static(model: torch.nn.Module, transform: Callable[[np.ndarray], torch.Tensor]) -> torch.nn.Module:
+    """
+    FX 그래프 모드 정적 INT8 양자화.
+    보정 이미지로 활성값 범위를 관측한 뒤 합성곱/Linear 계층을 INT8 연산으로 변환합니다.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    inputs = calibration_inputs(transform)
+    if not inputs:
+        raise ValueError(f"보정 이미지가 없습니다: {settings.MIDAS_CALIBRATION_DIR}")
+
+    prepared = prepare_fx(copy.deepcopy(model).eval(), get_default_qconfig_mapping("x86"), example_inputs=(inputs[0],))
+    with torch.no_grad():
+        for tensor in inputs:
+            prepared(tensor)
+    logging.info(f"MiDaS 정적 양자화 보정 완료: 이미지 {len(inputs)}장")
+    return convert_fx(prepared)
+
+
+def calibration_inputs(transform: Callable[[np.ndarray], torch.Tensor], directory: Path = None,
+                       limit: int = None) -> List[torch.Tensor]:
+    """보정 폴더의 이미지를 이름 순으로 최대 limit장 읽어 모델 입력 텐서로 변환합니다."""
+    directory = Path(directory or settings.MIDAS_CALIBRATION_DIR)
+    limit = settings.MIDAS_CALIBRATION_MAX_IMAGES if limit is None else limit
+    if not directory.is_dir():
+        return []
+
+    paths = sorted(path for path in directory.iterdir() if path.suffix.lower() in CALIBRATION_SUFFIXES)[:limit]
+    inputs = []
+    for path in paths:
+        image, _ = decode_image_file(path, settings.MAX_IMAGE_SIZE)
+        if image is None:
+            logging.warning(f"보정 이미지를 읽을 수 없습니다: {path}")
+            continue
+        inputs.append(transform(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+    return inputs
+
+
+def state_dict_size_mb(model: torch.nn.Module) -> float:
+    """직렬화한 state_dict 크기 (MB). 양자화 전후 모델 메모리 비교용"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
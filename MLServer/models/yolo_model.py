@@ -3,13 +3,15 @@ import cv2
 import numpy as np
 import torch
 from pathlib import Path
-from PIL import Image, ImageOps
 from ultralytics import YOLO
 from typing import Dict, Tuple, List
 
 # 프로젝트 루트를 기준으로 config.settings를 임포트
 from config.settings import settings
 from utils.base_model import BaseModel
+from models import onnx_backend
+from utils.image_decode import decode_image_file
+from utils.mask import Mask
 
 class YOLOSegmentationModel(BaseModel):
     """
@@ -30,8 +32,14 @@ class YOLOSegmentationModel(BaseModel):
         return "YOLO 세그멘테이션 모델"
     
     def _initialize_model(self) -> None:
-        """YOLO 모델 초기화"""
+        """YOLO 모델 초기화 (INFERENCE_BACKEND=onnx이면 ONNX로 내보낸 모델을 onnxruntime CPU로 실행)"""
         try:
+            if onnx_backend.is_enabled():
+                onnx_path = onnx_backend.export_yolo(settings.YOLO_MODEL_PATH)
+                self._model = YOLO(str(onnx_path), task="segment")
+                onnx_backend.configure_yolo_session(self._model, onnx_path)
+                self._log_success(f"로딩 성공: {onnx_path} -> onnxruntime CPU")
+                return
             self._model = YOLO(settings.YOLO_MODEL_PATH)
             self._model.to(self.device)
             self._log_success(f"로딩 성공: {settings.YOLO_MODEL_PATH} -> {self.device}")
@@ -39,12 +47,13 @@ class YOLOSegmentationModel(BaseModel):
             self._log_error("로딩 실패", e)
             self._model = None
     
-    def segment_image(self, image: np.ndarray) -> Dict:
+    def segment_image(self, image: np.ndarray, image_size: int = None) -> Dict:
         """
         이미지에서 객체 세그멘테이션 수행
         
         Args:
             image: 입력 이미지 (numpy array)
+            image_size: YOLO 추론 입력 크기 (None이면 모델 기본값, 파이프라인 프로필에서 지정)
             
         Returns:
             세그멘테이션 결과 딕셔너리
@@ -55,22 +64,81 @@ class YOLOSegmentationModel(BaseModel):
         try:
             # 모델 예측 (confidence threshold는 _parse_results에서 처리)
             verbose = not settings.DEBUG_MODE
-            results = self._model(image, verbose=verbose)
+            results = self._model(image, verbose=verbose, **self._predict_options(image_size))
             
-            # 결과 파싱
-            segmentation_results = self._parse_results(results[0], results[0].masks.data.shape[1:] if results[0].masks is not None else image.shape[:2])
-            
-            return {
-                "image_shape": image.shape,
-                "food_objects": segmentation_results["food_objects"],
-                "reference_objects": segmentation_results["reference_objects"],
-                "all_objects": segmentation_results["all_objects"]
-            }
+            return self._build_segmentation_output(image, results[0])
             
         except Exception as e:
             logging.error(f"세그멘테이션 실행 중 오류: {e}")
             raise
 
+    def segment_images(self, images: List[np.ndarray], image_size: int = None) -> List[Dict]:
+        """
+        여러 이미지를 배치로 세그멘테이션합니다.
+        YOLO가 각 이미지를 공통 크기로 레터박스하여 하나의 텐서 배치로 추론하며,
+        결과는 이미지별로 분리되어 segment_image()와 같은 형식으로 반환됩니다.
+
+        Args:
+            images: 입력 이미지 리스트 (BGR numpy array)
+            image_size: YOLO 추론 입력 크기 (None이면 모델 기본값)
+
+        Returns:
+            이미지 순서와 같은 세그멘테이션 결과 리스트
+        """
+        if self._model is None:
+            self._load_model()
+
+        batch_size = max(1, settings.BATCH_SIZE)
+        verbose = not settings.DEBUG_MODE
+        outputs = []
+        try:
+            for start in range(0, len(images), batch_size):
+                chunk = images[start:start + batch_size]
+                results = self._model(chunk, verbose=verbose, **self._predict_options(image_size))
+                for image, result in zip(chunk, results):
+                    outputs.append(self._build_segmentation_output(image, result))
+            return outputs
+
+        except Exception as e:
+            logging.error(f"배치 세그멘테이션 실행 중 오류: {e}")
+            raise
+
+    @staticmethod
+    def _predict_options(image_size: int = None) -> Dict:
+        """추론 옵션 (입력 크기를 지정한 경우에만 imgsz 전달)"""
+        return {"imgsz": image_size} if image_size else {}
+
+    def _build_segmentation_output(self, image: np.ndarray, result) -> Dict:
+        """단일 이미지의 YOLO 결과를 세그멘테이션 결과 딕셔너리로 변환"""
+        if result.masks is not None:
+            self._remove_letterbox_padding(result, image.shape[:2])
+
+        # 결과 파싱
+        segmentation_results = self._parse_results(result, result.masks.data.shape[1:] if result.masks is not None else image.shape[:2])
+
+        return {
+            "image_shape": image.shape,
+            "food_objects": segmentation_results["food_objects"],
+            "reference_objects": segmentation_results["reference_objects"],
+            "all_objects": segmentation_results["all_objects"]
+        }
+
+    def _remove_letterbox_padding(self, result, original_shape: Tuple) -> None:
+        """
+        마스크에서 레터박스 패딩 영역을 잘라냅니다.
+        배치 추론 시 서로 다른 비율의 이미지가 같은 크기로 패딩되므로,
+        마스크가 원본 이미지와 같은 비율을 갖도록 보정해야 깊이 맵과 정렬됩니다.
+        """
+        mask_h, mask_w = result.masks.data.shape[1:]
+        orig_h, orig_w = original_shape
+        gain = min(mask_h / orig_h, mask_w / orig_w)
+        pad_w = (mask_w - round(orig_w * gain)) / 2
+        pad_h = (mask_h - round(orig_h * gain)) / 2
+        top, left = int(round(pad_h - 0.1)), int(round(pad_w - 0.1))
+        bottom, right = int(round(pad_h + 0.1)), int(round(pad_w + 0.1))
+        if top or left or bottom or right:
+            result.masks.data = result.masks.data[:, top:mask_h - bottom, left:mask_w - right]
+
     def _parse_results(self, result, image_shape: Tuple) -> Dict:
         """
         YOLO 결과를 파싱하여 구조화된 데이터로 변환 (사용자 제공 안정 버전 기반)
@@ -132,8 +200,9 @@ class YOLOSegmentationModel(BaseModel):
             # 바운딩 박스 좌표
             x1, y1, x2, y2 = box[:4].astype(int)
             
-            # 픽셀 면적 계산
-            pixel_area = np.sum(mask_binary)
+            # bbox로 잘라 비트 압축한 마스크로 보관 (전체 프레임 배열은 여기서 버림)
+            mask_compact = Mask.from_dense(mask_binary)
+            pixel_area = mask_compact.area
             
             if settings.DEBUG_MODE:
                 print(f"객체 {i} ({self._get_class_name(class_id)}): 픽셀 면적 {pixel_area:,}")
@@ -145,7 +214,7 @@ class YOLOSegmentationModel(BaseModel):
                 "confidence": float(confidence),
                 "bbox": [x1, y1, x2, y2],
                 "pixel_area": int(pixel_area),
-                "mask": mask_binary,
+                "mask": mask_compact,
                 "center": [(x1 + x2) // 2, (y1 + y2) // 2],
                 "position": {
                     "x": (x1 + x2) // 2,
@@ -178,12 +247,6 @@ class YOLOSegmentationModel(BaseModel):
 yolo_model = YOLOSegmentationModel()
 
 def load_image(image_path: str | Path) -> np.ndarray | None:
-    """EXIF 정보를 처리하며 이미지를 로드하고 BGR 형식으로 변환"""
-    try:
-        pil_image = Image.open(image_path)
-        pil_image = ImageOps.exif_transpose(pil_image)
-        # RGB -> BGR로 변환
-        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-    except Exception as e:
-        logging.error(f"이미지 로드 실패: {image_path}, 오류: {e}")
-        return None 
\ No newline at end of file
+    """EXIF 정보를 처리하며 이미지를 로드하고 BGR 형식으로 변환 (긴 변 MAX_IMAGE_SIZE 이하로 축소 디코딩)"""
+    image, _ = decode_image_file(image_path, settings.MAX_IMAGE_SIZE)
+    return image 
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+MiDaS 양자화 정확도/속도 비교 스크립트
+고정된 이미지 세트에서 float 모델과 양자화 모델(dynamic, static)의 깊이 추정 결과를 비교합니다.
+- 정확도: 객체별 mean_depth, depth_variation과 음식별 최종 volume_cm3의 float 대비 상대 오차 (평균/최대)
+- 속도: 이미지별 깊이 추정 소요시간의 중앙값 합계와 float 대비 배속
+- 메모리: 직렬화한 state_dict 크기 (MB)
+세그멘테이션은 이미지마다 한 번만 실행해 모든 방식에 같은 마스크를 사용하고, 깊이는 전체 프레임으로 추정합니다.
+
+사용법 (MLServer 디렉토리에서):
+    python scripts/benchmark_midas_quantization.py
+    python scripts/benchmark_midas_quantization.py --images data --model-type DPT_Hybrid --modes dynamic static --repeats 5
+    python scripts/benchmark_midas_quantization.py --output results/midas_quantization.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import numpy as np
+
+from config.settings import settings
+from models.midas_model import midas_model
+from models.quantization import CALIBRATION_SUFFIXES, state_dict_size_mb
+from models.yolo_model import load_image, yolo_model
+from utils.feature_extraction import FeatureExtractor
+
+METRICS = ("mean_depth", "depth_variation", "volume_cm3")
+
+
+def collect_images(directory: Path, limit: int):
+    """이름 순으로 정렬한 이미지 경로 (실행마다 같은 세트)"""
+    return sorted(path for path in directory.iterdir() if path.suffix.lower() in CALIBRATION_SUFFIXES)[:limit]
+
+
+def timed_depth(image: np.ndarray, model_type: str, mode: str, repeats: int):
+    """웜업 1회 후 repeats번 추정한 (마지막 깊이 맵, 소요시간 중앙값 ms)"""
+    depth_map = midas_model.estimate_depth(image, model_type=model_type, quantization=mode)
+    elapsed = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        depth_map = midas_model.estimate_depth(image, model_type=model_type, quantization=mode)
+        elapsed.append((time.perf_counter() - start) * 1000.0)
+    return depth_map, statistics.median(elapsed)
+
+
+def object_metrics(features: dict):
+    """객체별 비교 값 (음식은 volume_cm3 포함, 기준 물체는 깊이 값만)"""
+    values = []
+    for food in features.get("food_objects", []):
+        depth_info = food.get("depth_info", {})
+        values.append({
+            "mean_depth": depth_info.get("mean_depth", 0.0),
+            "depth_variation": depth_info.get("depth_variation", 0.0),
+            "volume_cm3": food.get("volume_estimate", {}).get("volume_cm3", 0.0),
+        })
+    for ref in features.get("reference_objects", []):
+        depth_info = ref.get("depth_info", {})
+        values.append({
+            "mean_depth": depth_info.get("mean_depth", 0.0),
+            "depth_variation": depth_info.get("depth_variation", 0.0),
+        })
+    return values
+
+
+def relative_error(value: float, reference: float) -> float:
+    return abs(value - reference) / max(abs(reference), 1e-6)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="MiDaS 양자화 정확도/속도 비교")
+    parser.add_argument("--images", type=Path, default=settings.DATA_DIR, help="비교에 사용할 이미지 폴더")
+    parser.add_argument("--limit", type=int, default=20, help="사용할 최대 이미지 수")
+    parser.add_argument("--model-type", default=settings.MIDAS_MODEL_TYPE, help="MiDaS 모델 종류")
+    parser.add_argument("--modes", nargs="+", default=["dynamic", "static"], choices=["dynamic", "static"],
+                        help="비교할 양자화 방식")
+    parser.add_argument("--repeats", type=int, default=3, help="이미지별 반복 측정 횟수")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if settings.INFERENCE_BACKEND.strip().lower() != "torch":
+        print("❌ 양자화 비교는 INFERENCE_BACKEND=torch에서만 실행할 수 있습니다.")
+        return 1
+    if not args.images.is_dir():
+        print(f"❌ 이미지 폴더를 찾을 수 없습니다: {args.images}")
+        return 1
+    paths = collect_images(args.images, args.limit)
+    if not paths:
+        print(f"❌ 이미지가 없습니다: {args.images}")
+        return 1
+
+    modes = ["none"] + list(dict.fromkeys(args.modes))
+    sizes = {}
+    for mode in modes:
+        variant = midas_model.load_variant(args.model_type, mode)
+        if variant is None:
+            print(f"❌ 모델을 로드할 수 없습니다: {args.model_type} ({mode})")
+            return 1
+        sizes[mode] = state_dict_size_mb(variant[0])
+
+    extractor = FeatureExtractor()
+    latency = {mode: 0.0 for mode in modes}
+    errors = {mode: {metric: [] for metric in METRICS} for mode in modes[1:]}
+    for path in paths:
+        image = load_image(path)
+        if image is None:
+            print(f"⚠️  이미지를 읽을 수 없어 제외: {path}")
+            continue
+        segmentation = yolo_model.segment_image(image)
+        baseline = None
+        for mode in modes:
+            depth_map, elapsed_ms = timed_depth(image, args.model_type, mode, args.repeats)
+            latency[mode] += elapsed_ms
+            metrics = object_metrics(extractor.extract_features(segmentation, depth_map))
+            if mode == "none":
+                baseline = metrics
+                continue
+            for value, reference in zip(metrics, baseline):
+                for metric in METRICS:
+                    if metric in reference:
+                        errors[mode][metric].append(relative_error(value[metric], reference[metric]))
+        print(f"  {path.name}: 객체 {len(baseline or [])}개")
+
+    report = {"model_type": args.model_type, "images": len(paths), "modes": {}}
+    print(f"\n=== MiDaS 양자화 비교: {args.model_type}, 이미지 {len(paths)}장 ===")
+    print(f"{'방식':<8} {'크기(MB)':>9} {'지연(ms)':>10} {'배속':>6}  " + "  ".join(f"{m} 오차(평균/최대)" for m in METRICS))
+    for mode in modes:
+        entry = {
+            "size_mb": round(sizes[mode], 1),
+            "latency_ms": round(latency[mode], 1),
+            "speedup": round(latency["none"] / latency[mode], 2) if latency[mode] > 0 else None,
+        }
+        columns = []
+        for metric in METRICS:
+            values = errors.get(mode, {}).get(metric, [])
+            if mode == "none" or not values:
+                columns.append(f"{'-':>24}")
+                continue
+            entry[f"{metric}_rel_error_mean"] = round(float(np.mean(values)), 4)
+            entry[f"{metric}_rel_error_max"] = round(float(np.max(values)), 4)
+            columns.append(f"{entry[f'{metric}_rel_error_mean']:>11.2%} / {entry[f'{metric}_rel_error_max']:<10.2%}")
+        report["modes"][mode] = entry
+        speedup = f"{entry['speedup']:.2f}x" if entry["speedup"] else "-"
+        print(f"{mode:<8} {entry['size_mb']:>9.1f} {entry['latency_ms']:>10.1f} {speedup:>6}  " + "  ".join(columns))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n✅ 결과 저장: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+로컬 음식 밀도 테이블 생성 스크립트
+backend의 음식 영양 CSV(식품명, 식품대분류명)를 읽어 음식별 밀도(g/cm³) 테이블을 만듭니다.
+CSV에는 밀도 값이 없으므로 식품대분류별 대표 밀도를 적용하되,
+여러 종류가 섞인 분류(빵 및 과자류)는 세부 종류(식품명의 '_' 앞 부분)별 대표 밀도를 우선 적용하고
+떡은 별도 분류(떡류)로 옮깁니다.
+
+사용법 (MLServer 디렉토리에서):
+    python scripts/build_density_table.py
+    python scripts/build_density_table.py --sources ../backend/a.csv ../backend/b.csv --output data/food_density_table.csv
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_SOURCES = [
+    ROOT_DIR.parent / "backend" / "korean_food_nutri_score_final.csv",
+    ROOT_DIR.parent / "backend" / "음식만개등급화.csv",
+]
+DEFAULT_OUTPUT = ROOT_DIR / "data" / "food_density_table.csv"
+
+# 식품대분류명 -> (대표 밀도 g/cm³, 신뢰도)
+# 국물/음료처럼 물에 가까운 분류는 신뢰도를 높게, 공기 함량 편차가 큰 분류(빵, 튀김, 생채)는 낮게 설정
+CATEGORY_DENSITIES = {
+    "밥류": (1.3, 0.7),
+    "죽 및 스프류": (1.1, 0.7),
+    "국 및 탕류": (1.0, 0.75),
+    "찌개 및 전골류": (1.0, 0.75),
+    "음료 및 차류": (1.0, 0.8),
+    "면 및 만두류": (1.1, 0.6),
+    "빵 및 과자류": (0.35, 0.5),
+    "구이류": (0.95, 0.6),
+    "찜류": (1.0, 0.6),
+    "볶음류": (0.9, 0.6),
+    "튀김류": (0.7, 0.5),
+    "조림류": (1.05, 0.6),
+    "전·적 및 부침류": (0.85, 0.6),
+    "생채·무침류": (0.7, 0.5),
+    "나물·숙채류": (0.75, 0.55),
+    "김치류": (0.9, 0.65),
+    "장아찌·절임류": (1.0, 0.6),
+    "젓갈류": (1.1, 0.6),
+    "장류, 양념류": (1.15, 0.6),
+    "유제품류 및 빙과류": (0.8, 0.55),
+    "수·조·어·육류": (1.0, 0.6),
+    "곡류, 서류 제품": (1.0, 0.5),
+    "두류, 견과 및 종실류": (0.65, 0.55),
+    "채소, 해조류": (0.6, 0.5),
+    "과일류": (0.85, 0.6),
+}
+
+# 식품대분류명 -> {세부 종류: (대표 밀도 g/cm³, 신뢰도)}
+# 빵 및 과자류에는 피자, 버거, 케이크, 초콜릿처럼 밀도가 크게 다른 종류가 섞여 있어 분류 대표값을 그대로 쓰지 않음
+SUBGROUP_DENSITIES = {
+    "빵 및 과자류": {
+        "피자": (0.65, 0.55),
+        "피자빵": (0.5, 0.5),
+        "버거": (0.6, 0.55),
+        "햄버거": (0.6, 0.55),
+        "샌드위치": (0.55, 0.55),
+        "햄샌드위치": (0.55, 0.55),
+        "핫도그": (0.6, 0.55),
+        "토스트": (0.45, 0.5),
+        "케이크": (0.5, 0.5),
+        "카스텔라": (0.3, 0.55),
+        "와플": (0.4, 0.5),
+        "크로플": (0.4, 0.5),
+        "도넛": (0.4, 0.5),
+        "마카롱": (0.55, 0.5),
+        "비스킷/쿠키/크래커": (0.6, 0.5),
+        "크로켓(고로케)": (0.6, 0.5),
+        "파이/만주": (0.65, 0.5),
+        "타르트": (0.7, 0.5),
+        "츄러스": (0.45, 0.5),
+        "머핀": (0.4, 0.55),
+        "스콘": (0.5, 0.55),
+        "베이글": (0.55, 0.6),
+        "프레즐": (0.45, 0.5),
+        "호떡": (0.65, 0.5),
+        "약과": (1.0, 0.55),
+        "다식": (1.1, 0.55),
+        "초콜릿": (1.25, 0.6),
+        "젤리": (1.3, 0.6),
+        "캔디": (1.4, 0.6),
+    },
+}
+
+# 빵 및 과자류로 분류된 떡 (쌀가루를 쪄서 빚어 빵보다 훨씬 무거움)
+RICE_CAKE_SOURCE_CATEGORY = "빵 및 과자류"
+RICE_CAKE_CATEGORY = "떡류"
+RICE_CAKE_DENSITY = (1.2, 0.65)
+RICE_CAKE_NAMES = {"송편", "모싯잎송편", "인절미", "경단", "수수경단", "절편", "증편", "백설기", "약식", "기피편", "수수부꾸미"}
+# 이름이 '떡'으로 끝나지만 떡이 아닌 음식 (밀가루 반죽, 메밀 전병)
+NOT_RICE_CAKE_NAMES = {"호떡", "빙떡"}
+
+FIELDNAMES = ["food_name", "category", "density_g_per_cm3", "confidence"]
+
+
+def read_source(path: Path):
+    """CSV에서 (식품명, 세부 종류, 식품대분류명) 목록을 읽습니다. (세부 종류는 '세부종류_제품명' 형식의 앞 부분)"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("식품명") or "").strip()
+            category = (row.get("식품대분류명") or "").strip()
+            if name:
+                yield name.replace("_", " "), name.split("_", 1)[0].strip(), category
+
+
+def is_rice_cake(subgroup: str, category: str) -> bool:
+    """빵 및 과자류 중 떡인지 (괄호 안의 별칭은 무시: '개피떡(바람떡)' -> '개피떡')"""
+    base = subgroup.split("(", 1)[0].strip()
+    if category != RICE_CAKE_SOURCE_CATEGORY or base in NOT_RICE_CAKE_NAMES:
+        return False
+    return base in RICE_CAKE_NAMES or base.endswith("떡")
+
+
+def resolve_density(subgroup: str, category: str):
+    """(분류, 밀도, 신뢰도). 떡 > 세부 종류 > 식품대분류 순으로 적용하고, 정의되지 않은 분류면 None"""
+    if is_rice_cake(subgroup, category):
+        return (RICE_CAKE_CATEGORY,) + RICE_CAKE_DENSITY
+    subgroups = SUBGROUP_DENSITIES.get(category, {})
+    if subgroup in subgroups:
+        return (category,) + subgroups[subgroup]
+    if category in CATEGORY_DENSITIES:
+        return (category,) + CATEGORY_DENSITIES[category]
+    return None
+
+
+def build_table(sources):
+    """식품명 기준으로 중복을 제거하며 테이블 행을 만듭니다. (먼저 나온 소스 우선)"""
+    rows = {}
+    skipped_categories = {}
+    for source in sources:
+        for name, subgroup, source_category in read_source(source):
+            if name in rows:
+                continue
+            resolved = resolve_density(subgroup, source_category)
+            if resolved is None:
+                skipped_categories[source_category] = skipped_categories.get(source_category, 0) + 1
+                continue
+            category, density, confidence = resolved
+            rows[name] = {
+                "food_name": name,
+                "category": category,
+                "density_g_per_cm3": density,
+                "confidence": confidence,
+            }
+    return list(rows.values()), skipped_categories
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="로컬 음식 밀도 테이블 생성")
+    parser.add_argument("--sources", nargs="+", type=Path, default=DEFAULT_SOURCES, help="입력 CSV 파일 목록")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="출력 CSV 경로")
+    args = parser.parse_args()
+
+    missing = [str(path) for path in args.sources if not path.exists()]
+    if missing:
+        print(f"❌ 입력 파일을 찾을 수 없습니다: {', '.join(missing)}")
+        return 1
+
+    rows, skipped_categories = build_table(args.sources)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"✅ 밀도 테이블 생성 완료: {args.output} ({len(rows)}개 음식)")
+    if skipped_categories:
+        print(f"⚠️  밀도가 정의되지 않은 분류 제외: {skipped_categories}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+MiDaS 로컬 모델 저장소 채우기 스크립트
+hubconf 코드(intel-isl/MiDaS, MiDaS_small은 EfficientNet 백본 코드 포함)와 가중치를 settings.MODEL_REGISTRY_DIR에
+복사하고 SHA-256을 manifest.json에 고정합니다. 이후 서버는 torch.hub 네트워크 접근 없이 MiDaS를 로드합니다.
+가중치는 manifest.json에 이미 고정된 값이나 --sha256으로 넘긴 값(MiDaS GitHub 릴리스 페이지의 파일별 digest 등
+별도 경로로 확인한 값)과 같을 때만 등록합니다. 둘 다 없으면 받은 파일의 해시로 고정하므로 (서버가 자동으로 채울 때와 동일)
+처음 채운 뒤 manifest.json을 커밋해 두면 다른 환경에서도 같은 파일인지 검증할 수 있습니다.
+
+사용법 (MLServer 디렉토리에서):
+    python scripts/populate_model_registry.py
+    python scripts/populate_model_registry.py --sha256 DPT_Large=<SHA-256> --sha256 DPT_Hybrid=<SHA-256> ...
+    python scripts/populate_model_registry.py --models DPT_Hybrid MiDaS_small
+    python scripts/populate_model_registry.py --from-hub-cache          # 이미 받아 둔 torch.hub 캐시에서 복사
+    python scripts/populate_model_registry.py --from-hub-cache /opt/torch_hub
+    python scripts/populate_model_registry.py --verify                  # 등록된 파일 전체 체크섬 검증
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import torch
+
+from config.settings import settings
+from models.model_registry import (
+    DEFAULT_REFS,
+    MIDAS_REPO,
+    MIDAS_REPO_DEPENDENCIES,
+    MIDAS_WEIGHT_URLS,
+    ModelRegistry,
+    ModelRegistryError,
+    download_repo,
+)
+
+
+def hub_cache_repo(hub_dir: Path, repo: str, ref: str) -> Path:
+    """torch.hub 캐시의 저장소 폴더 (<hub_dir>/<owner>_<name>_<ref>)"""
+    owner, name = repo.split("/")
+    return hub_dir / f"{owner}_{name}_{ref}"
+
+
+def parse_sha256_pins(values) -> dict:
+    """--sha256 MODEL=HEX 목록 -> {모델 종류: 소문자 해시}"""
+    pins = {}
+    for value in values or []:
+        model_type, _, digest = value.partition("=")
+        digest = digest.strip().lower().removeprefix("sha256:")
+        if model_type not in MIDAS_WEIGHT_URLS or len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"--sha256 형식이 올바르지 않습니다: {value} (예: DPT_Hybrid=<64자리 16진수>)")
+        pins[model_type] = digest
+    return pins
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="MiDaS 로컬 모델 저장소 채우기")
+    parser.add_argument("--models", nargs="+", default=list(MIDAS_WEIGHT_URLS), choices=list(MIDAS_WEIGHT_URLS),
+                        help="저장할 MiDaS 모델 종류")
+    parser.add_argument("--root", type=Path, default=settings.MODEL_REGISTRY_DIR, help="모델 저장소 경로")
+    parser.add_argument("--from-hub-cache", type=Path, nargs="?", const=Path(torch.hub.get_dir()),
+                        help="네트워크 대신 torch.hub 캐시 폴더에서 복사 (경로 생략 시 torch.hub 기본 경로)")
+    parser.add_argument("--midas-ref", default=DEFAULT_REFS[MIDAS_REPO], help="intel-isl/MiDaS 브랜치/태그")
+    parser.add_argument("--repin", action="store_true", help="이미 고정된 해시와 다른 파일로 교체 허용")
+    parser.add_argument("--verify", action="store_true", help="채우지 않고 등록된 파일 전체를 검증")
+    parser.add_argument("--sha256", action="append", metavar="MODEL=HEX",
+                        help="가중치의 기대 SHA-256 (릴리스 페이지 등에서 확인한 값, 모델마다 반복 지정)")
+    args = parser.parse_args()
+    try:
+        sha256_pins = parse_sha256_pins(args.sha256)
+    except ValueError as e:
+        parser.error(str(e))
+
+    registry = ModelRegistry(args.root)
+    if args.verify:
+        results = registry.verify_all()
+        if not results:
+            print(f"❌ 등록된 항목이 없습니다: {registry.manifest_path}")
+            return 1
+        for name, result in results.items():
+            print(f"{'✅' if result == 'ok' else '❌'} {name}: {result}")
+        return 0 if all(result == "ok" for result in results.values()) else 1
+
+    # 받기 전에 모든 가중치의 기대 해시를 정함 (매니페스트 고정값 > --sha256)
+    expected = {}
+    for model_type in args.models:
+        pinned = registry.pinned_sha256(model_type)
+        requested = sha256_pins.get(model_type)
+        if pinned is not None and requested is not None and pinned != requested and not args.repin:
+            print(f"❌ {model_type}: --sha256 값이 manifest.json의 고정값과 다릅니다. 의도한 변경이면 --repin을 함께 지정하세요.")
+            return 1
+        expected[model_type] = requested or pinned
+
+    refs = {**DEFAULT_REFS, MIDAS_REPO: args.midas_ref}
+    repos = list(dict.fromkeys(
+        [MIDAS_REPO] + [repo for model_type in args.models for repo in MIDAS_REPO_DEPENDENCIES.get(model_type, ())]
+    ))
+    hub_dir = args.from_hub_cache
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            workdir = Path(workdir)
+            for repo in repos:
+                if hub_dir is not None:
+                    source = hub_cache_repo(hub_dir, repo, refs[repo])
+                    if not source.is_dir():
+                        print(f"❌ torch.hub 캐시에 저장소가 없습니다: {source}")
+                        return 1
+                else:
+                    print(f"⬇️  {repo}@{refs[repo]} 코드 다운로드 중...")
+                    source = download_repo(repo, refs[repo], workdir)
+                registry.add_repo(repo, refs[repo], source, repin=args.repin)
+                print(f"✅ {repo}@{refs[repo]}: .py 파일 {len(registry.manifest['repos'][repo]['files'])}개")
+
+            for model_type in args.models:
+                url = MIDAS_WEIGHT_URLS[model_type]
+                if hub_dir is not None:
+                    source = hub_dir / "checkpoints" / Path(url).name
+                    if not source.is_file():
+                        print(f"❌ torch.hub 캐시에 가중치가 없습니다: {source}")
+                        return 1
+                else:
+                    print(f"⬇️  {model_type} 가중치 다운로드 중: {url}")
+                    source = workdir / Path(url).name
+                    torch.hub.download_url_to_file(url, str(source), progress=True)
+                if expected[model_type] is None:
+                    print(f"⚠️  {model_type}: 기대 해시가 없어 받은 파일의 해시로 고정합니다. (--sha256으로 지정 가능)")
+                registry.add_weights(model_type, source, url, repin=args.repin, expected_sha256=expected[model_type])
+                entry = registry.manifest["weights"][model_type]
+                print(f"✅ {model_type}: {entry['file']} (sha256 {entry['sha256'][:12]}…)")
+    except ModelRegistryError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        # 실패 전까지 추가한 항목도 파일과 일치하도록 매니페스트 저장
+        registry.save_manifest()
+
+    print(f"\n✅ 모델 저장소 준비 완료: {registry.root}")
+    print("   서버에서 네트워크 접근을 막으려면 MODEL_REGISTRY_OFFLINE=True로 설정하세요.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""AdmissionController: 실행/대기 한도, 429 거절, 슬롯 반환"""
+
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, AdmissionRejected
+
+
+def test_reserve_rejects_beyond_in_flight_plus_queued():
+    controller = AdmissionController(max_in_flight=1, max_queued=2)
+    tickets = [controller.reserve() for _ in range(3)]
+
+    with pytest.raises(AdmissionRejected):
+        controller.reserve()
+
+    assert controller.queued == 3
+    assert controller.snapshot()["rejected_total"] == 1
+    tickets[0].release()
+    controller.reserve()
+
+
+def test_release_is_idempotent():
+    controller = AdmissionController(max_in_flight=1, max_queued=1)
+    ticket = controller.reserve()
+
+    ticket.release()
+    ticket.release()
+
+    assert controller.queued == 0
+    assert controller.in_flight == 0
+
+
+def test_running_slots_are_limited_and_handed_over():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queued=1)
+        first, second = controller.reserve(), controller.reserve()
+        order = []
+
+        async def run(name, ticket, hold):
+            async with ticket:
+                order.append(f"{name}:start")
+                assert controller.in_flight == 1
+                await hold
+            order.append(f"{name}:end")
+
+        release_first = asyncio.get_running_loop().create_future()
+        first_task = asyncio.create_task(run("first", first, release_first))
+        await asyncio.sleep(0)
+        second_task = asyncio.create_task(run("second", second, asyncio.sleep(0)))
+        await asyncio.sleep(0.01)
+        assert order == ["first:start"]
+        assert (controller.in_flight, controller.queued) == (1, 1)
+
+        release_first.set_result(None)
+        await asyncio.gather(first_task, second_task)
+        return controller, order
+
+    controller, order = asyncio.run(scenario())
+
+    assert order == ["first:start", "first:end", "second:start", "second:end"]
+    assert (controller.in_flight, controller.queued) == (0, 0)
+
+
+def test_cancelled_waiter_returns_its_reservation():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queued=1)
+        running, waiting = controller.reserve(), controller.reserve()
+        await running.__aenter__()
+
+        async def wait_for_slot():
+            async with waiting:
+                pass
+
+        task = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert (controller.in_flight, controller.queued) == (1, 0)
+
+        await running.__aexit__(None, None, None)
+        return controller
+
+    controller = asyncio.run(scenario())
+
+    assert (controller.in_flight, controller.queued) == (0, 0)
+    controller.reserve()
+    controller.reserve()
@@ -0,0 +1,128 @@
+"""MicroBatchScheduler: 시간 창/최대 크기/프로필별 배치 묶음과 결과 전달"""
+
+import asyncio
+
+import numpy as np
+
+from config.profiles import get_profile
+from core.batch_scheduler import MicroBatchScheduler
+from core.degradation import degrade_profile
+
+
+class RecordingService:
+    """배치 크기와 호출 순서를 기록하는 MassEstimationService 대역"""
+
+    def __init__(self, cached=None, fail_batch=False):
+        self.batches = []
+        self.batch_profiles = []
+        self.cached = cached or {}
+        self.fail_batch = fail_batch
+
+    def lookup_cached_result(self, image, profile):
+        key = f"{profile.name}:{int(image[0, 0, 0])}"
+        return key, self.cached.get(key)
+
+    def run_batched_inference(self, images, profile):
+        if self.fail_batch:
+            raise RuntimeError("batch failed")
+        self.batches.append((profile.name, [int(image[0, 0, 0]) for image in images]))
+        self.batch_profiles.append(profile)
+        return [{"image_id": int(image[0, 0, 0])} for image in images], {"segmentation": 1.0}
+
+    def run_pipeline(self, image, image_path, precomputed=None, precomputed_timings=None, cache_key=None,
+                     profile=None):
+        return {
+            "image_path": image_path,
+            "image_id": precomputed["image_id"],
+            "cache_key": cache_key,
+            "profile": profile.name,
+            "midas_model_type": profile.midas_model_type,
+        }
+
+
+def make_image(value: int) -> np.ndarray:
+    return np.full((4, 4, 3), value, np.uint8)
+
+
+async def submit_all(scheduler, requests):
+    try:
+        return await asyncio.gather(*[
+            scheduler.submit(make_image(value), f"{value}.jpg", get_profile(profile)) for value, profile in requests
+        ])
+    finally:
+        await scheduler.stop()
+
+
+def test_requests_within_window_share_one_batch():
+    service = RecordingService()
+    scheduler = MicroBatchScheduler(service, window_ms=50, max_batch_size=8)
+
+    results = asyncio.run(submit_all(scheduler, [(1, "fast"), (2, "fast"), (3, "fast")]))
+
+    assert service.batches == [("fast", [1, 2, 3])]
+    assert [result["image_id"] for result in results] == [1, 2, 3]
+    assert [result["image_path"] for result in results] == ["1.jpg", "2.jpg", "3.jpg"]
+    assert results[0]["cache_key"] == "fast:1"
+
+
+def test_batches_are_split_at_max_batch_size():
+    service = RecordingService()
+    scheduler = MicroBatchScheduler(service, window_ms=50, max_batch_size=2)
+
+    results = asyncio.run(submit_all(scheduler, [(value, "fast") for value in range(5)]))
+
+    assert sorted(len(images) for _, images in service.batches) == [1, 2, 2]
+    assert [result["image_id"] for result in results] == list(range(5))
+    assert scheduler.snapshot()["batch_size"]["count"] == 3
+
+
+def test_profiles_are_batched_separately():
+    service = RecordingService()
+    scheduler = MicroBatchScheduler(service, window_ms=50, max_batch_size=8)
+
+    results = asyncio.run(submit_all(scheduler, [(1, "fast"), (2, "accurate"), (3, "fast")]))
+
+    assert sorted(service.batches) == [("accurate", [2]), ("fast", [1, 3])]
+    assert [result["profile"] for result in results] == ["fast", "accurate", "fast"]
+
+
+def test_degraded_profile_with_same_name_is_batched_separately():
+    service = RecordingService()
+    scheduler = MicroBatchScheduler(service, window_ms=50, max_batch_size=8)
+    normal = get_profile("accurate")
+    degraded = degrade_profile(normal, 1)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*[
+                scheduler.submit(make_image(value), f"{value}.jpg", profile)
+                for value, profile in [(1, normal), (2, degraded), (3, normal)]
+            ])
+        finally:
+            await scheduler.stop()
+
+    results = asyncio.run(scenario())
+
+    assert sorted(images for _, images in service.batches) == [[1, 3], [2]]
+    assert set(service.batch_profiles) == {normal, degraded}
+    assert [result["midas_model_type"] for result in results] == [
+        normal.midas_model_type, degraded.midas_model_type, normal.midas_model_type
+    ]
+
+
+def test_cached_result_skips_the_batch():
+    service = RecordingService(cached={"fast:7": {"cached": True}})
+    scheduler = MicroBatchScheduler(service, window_ms=10, max_batch_size=4)
+
+    results = asyncio.run(submit_all(scheduler, [(7, "fast")]))
+
+    assert results == [{"cached": True}]
+    assert service.batches == []
+
+
+def test_batch_failure_resolves_every_request_with_error():
+    scheduler = MicroBatchScheduler(RecordingService(fail_batch=True), window_ms=50, max_batch_size=4)
+
+    results = asyncio.run(submit_all(scheduler, [(1, "fast"), (2, "fast")]))
+
+    assert all("batch failed" in result["error"] for result in results)
@@ -0,0 +1,100 @@
+"""DegradationController: 프로필별 기준 소요시간 대비 p95, 대기열 비율에 따른 단계 전환과 단계별 프로필"""
+
+import pytest
+
+from config.profiles import get_profile
+from config.settings import settings
+from core.degradation import DegradationController, degrade_profile
+
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(settings, "DEGRADATION_MIN_DWELL_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "DEGRADATION_QUEUE_HIGH_RATIO", 0.75)
+    monkeypatch.setattr(settings, "DEGRADATION_QUEUE_LOW_RATIO", 0.25)
+    monkeypatch.setattr(settings, "DEGRADATION_P95_HIGH_FACTOR", 2.0)
+    monkeypatch.setattr(settings, "DEGRADATION_P95_LOW_FACTOR", 1.3)
+    monkeypatch.setattr(settings, "DEGRADATION_BASELINE_MS", {"fast": 1000.0, "accurate": 10000.0})
+    monkeypatch.setattr(settings, "DEGRADATION_BASELINE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(settings, "DEGRADATION_WINDOW_SECONDS", 60.0)
+
+
+def observe(controller, profile_name, total_ms, count=1):
+    for _ in range(count):
+        controller.observe({"total": total_ms}, get_profile(profile_name))
+
+
+def test_slow_profile_at_its_normal_latency_does_not_degrade():
+    controller = DegradationController(enabled=True)
+    # accurate 프로필의 평소 소요시간 (고정 ms 임계값이었다면 단계를 낮췄을 값)
+    observe(controller, "accurate", 12000.0, count=10)
+
+    assert controller.update_load(queue_depth=0, capacity=20) == "normal"
+
+
+def test_latency_above_profile_baseline_degrades_and_recovers():
+    controller = DegradationController(enabled=True)
+    # 대기열이 어느 정도 찬 상태의 소요시간은 기준값 측정에 쓰이지 않음
+    assert controller.update_load(queue_depth=10, capacity=20) == "normal"
+    observe(controller, "fast", 2500.0, count=5)
+
+    assert controller.update_load(10, 20) == "reduced"
+    assert controller.update_load(10, 20) == "minimal"
+    assert controller.update_load(10, 20) == "minimal"
+
+    controller._profile_samples.clear()
+    observe(controller, "fast", 1000.0)
+    assert controller.update_load(0, 20) == "reduced"
+    assert controller.update_load(0, 20) == "normal"
+
+
+def test_queue_ratio_degrades_without_latency_samples():
+    controller = DegradationController(enabled=True)
+
+    assert controller.update_load(queue_depth=15, capacity=20) == "reduced"
+
+
+def test_baseline_is_measured_only_while_idle_and_undegraded():
+    controller = DegradationController(enabled=True)
+    assert controller.baseline_ms("fast") == 1000.0
+    assert controller.baseline_ms("balanced") == 10000.0
+
+    observe(controller, "fast", 400.0, count=2)
+    assert controller.baseline_ms("fast") == 1000.0
+    observe(controller, "fast", 500.0)
+    assert controller.baseline_ms("fast") == 400.0
+
+    # 대기열이 긴 동안이나 낮춘 프로필의 소요시간은 기준값에 넣지 않음
+    controller.update_load(queue_depth=10, capacity=20)
+    observe(controller, "fast", 5000.0, count=5)
+    controller.observe({"total": 5000.0}, degrade_profile(get_profile("fast"), 1))
+    assert controller.baseline_ms("fast") == 400.0
+
+    snapshot = controller.snapshot()
+    assert snapshot["baseline_ms"] == {"fast": 400.0}
+    assert snapshot["profile_p95_ms"]["fast"] == pytest.approx(5000.0)
+
+
+def test_disabled_controller_keeps_normal():
+    controller = DegradationController(enabled=False)
+    observe(controller, "fast", 100000.0)
+
+    assert controller.update_load(20, 20) == "normal"
+    profile, tier = controller.apply(get_profile("accurate"))
+    assert (profile, tier) == (get_profile("accurate"), "normal")
+
+
+def test_degraded_profiles():
+    accurate = get_profile("accurate")
+
+    reduced = degrade_profile(accurate, 1)
+    assert reduced.name == "accurate"
+    assert reduced.enable_multimodal is False
+    assert reduced.max_llm_calls == accurate.max_llm_calls
+
+    minimal = degrade_profile(accurate, 2)
+    assert minimal.midas_model_type == "MiDaS_small"
+    # 최소 단계도 통합 요청 1회로 음식 식별과 밀도 조회를 수행 (기본 밀도만 반환하지 않음)
+    assert (minimal.request_mode, minimal.max_llm_calls) == ("combined", 1)
+    assert minimal.fingerprint() != accurate.fingerprint()
+    assert degrade_profile(get_profile("fast"), 2).max_llm_calls == 1
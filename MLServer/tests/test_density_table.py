@@ -0,0 +1,137 @@
+"""로컬 밀도 테이블: 자모 퍼지 매칭, 신뢰도 기준, 테이블 생성 규칙, 조회 집계"""
+
+import csv
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from utils.density_table import DensityTable, decompose_hangul, normalize_food_name
+
+ROWS = [
+    ("가래떡", "떡류", 1.2, 0.65),
+    ("김치찌개", "찌개 및 전골류", 1.0, 0.75),
+    ("크림빵", "빵 및 과자류", 0.35, 0.5),
+    ("쌀밥", "밥류", 1.3, 0.7),
+]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "density.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["food_name", "category", "density_g_per_cm3", "confidence"])
+        writer.writerows(ROWS)
+    return DensityTable(path, min_score=0.75, min_confidence=0.6)
+
+
+def load_build_script():
+    path = Path(__file__).resolve().parent.parent / "scripts" / "build_density_table.py"
+    spec = importlib.util.spec_from_file_location("build_density_table", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_hangul_decomposition_and_normalization():
+    assert decompose_hangul("김치") == "ㄱㅣㅁㅊㅣ"
+    assert decompose_hangul("떡a") == "ㄸㅓㄱa"
+    assert normalize_food_name(" 김치_찌개 (1인) ") == "김치찌개1인"
+
+
+def test_exact_match_is_confident(table):
+    result = table.lookup("가래떡")
+
+    assert result["density_g_per_cm3"] == 1.2
+    assert result["match_score"] == 1.0
+    assert result["confidence"] == 0.65
+    assert result["confident"] is True
+    assert result["source"] == "local_table"
+
+
+def test_fuzzy_match_tolerates_typos(table):
+    result = table.lookup("김치찌게")
+
+    assert result["food_name"] == "김치찌개"
+    assert 0.75 <= result["match_score"] < 1.0
+    assert result["confidence"] == pytest.approx(0.75 * result["match_score"], abs=1e-3)
+
+
+def test_low_confidence_category_guess_does_not_replace_llm(table):
+    result = table.lookup("크림빵")
+
+    assert result["match_score"] == 1.0
+    assert result["confident"] is False
+    snapshot = table.snapshot()
+    assert (snapshot["hits"], snapshot["weak_matches"], snapshot["misses"]) == (0, 1, 0)
+
+
+def test_confidence_threshold_uses_confidence_times_score(tmp_path):
+    path = tmp_path / "density.csv"
+    path.write_text("food_name,category,density_g_per_cm3,confidence\n김치찌개,찌개 및 전골류,1.0,0.75\n", encoding="utf-8")
+    strict = DensityTable(path, min_score=0.5, min_confidence=0.7)
+
+    assert strict.lookup("김치찌개")["confident"] is True
+    # 유사도는 min_score를 넘지만 0.75 × 유사도가 0.7 미만
+    assert strict.lookup("김치찌게")["confident"] is False
+
+
+def test_unrelated_and_generic_names_are_not_looked_up(table):
+    assert table.lookup("스테이크") is None
+    assert table.lookup("food") is None
+    assert table.lookup("음식") is None
+
+    snapshot = table.snapshot()
+    assert snapshot["lookups"] == 1
+    assert snapshot["misses"] == 1
+    assert snapshot["skipped_generic"] == 2
+
+
+def test_missing_table_file_only_misses(tmp_path):
+    table = DensityTable(tmp_path / "missing.csv")
+
+    assert len(table) == 0
+    assert table.lookup("가래떡") is None
+
+
+@pytest.mark.parametrize("subgroup, expected", [
+    ("가래떡", ("떡류", 1.2)),
+    ("개피떡(바람떡)", ("떡류", 1.2)),
+    ("송편", ("떡류", 1.2)),
+    ("인절미", ("떡류", 1.2)),
+    ("호떡", ("빵 및 과자류", 0.65)),
+    ("찰떡빵", ("빵 및 과자류", 0.35)),
+    ("피자", ("빵 및 과자류", 0.65)),
+])
+def test_build_script_splits_bakery_category(subgroup, expected):
+    build = load_build_script()
+
+    category, density, _ = build.resolve_density(subgroup, "빵 및 과자류")
+
+    assert (category, density) == expected
+
+
+def test_build_script_only_moves_rice_cakes_out_of_bakery():
+    build = load_build_script()
+
+    assert build.resolve_density("장떡", "전·적 및 부침류")[0] == "전·적 및 부침류"
+    assert build.resolve_density("알수없는분류음식", "없는 분류") is None
+
+
+def test_fallback_reuses_first_lookup(table, monkeypatch):
+    pytest.importorskip("google.generativeai")
+    from utils import density_calculator as module
+
+    monkeypatch.setattr(module, "density_table", table)
+    calculator = module.DensityCalculator.__new__(module.DensityCalculator)
+    calculator.llm_model = None
+    calculator.default_densities = {"default": 1.0}
+
+    local_density = calculator.lookup_local_density("크림빵")
+    assert not calculator.is_confident(local_density)
+    fallback = calculator.get_food_density_from_llm("크림빵", local_density=local_density)
+
+    assert fallback["density_g_per_cm3"] == 0.35
+    assert fallback["fallback"] is True
+    assert table.snapshot()["lookups"] == 1
@@ -0,0 +1,87 @@
+"""MiDaS ROI 추론: 잘라낸 영역 예측의 전체 프레임 격자 배치와 마스크 좌표 정합"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from config.settings import settings
+from models.midas_model import MiDaSDepthModel
+from utils.mask import Mask
+
+FRAME = (80, 100)
+ROI = (20, 10, 60, 50)  # (x1, y1, x2, y2)
+
+
+@pytest.fixture
+def estimator():
+    return MiDaSDepthModel.__new__(MiDaSDepthModel)
+
+
+def gradient(h, w):
+    return torch.arange(h * w, dtype=torch.float32).reshape(h, w) + 1.0
+
+
+def test_full_resolution_places_roi_at_frame_coordinates(estimator, monkeypatch):
+    monkeypatch.setattr(settings, "DEPTH_NATIVE_RESOLUTION", False)
+    prediction = gradient(16, 16)
+
+    depth_map = estimator._place_roi(prediction, FRAME, ROI)
+
+    x1, y1, x2, y2 = ROI
+    assert depth_map.shape == FRAME
+    expected = estimator._resize_prediction(prediction, (y2 - y1, x2 - x1))
+    assert np.allclose(depth_map[y1:y2, x1:x2], expected)
+    # 영역 밖은 예측의 최솟값(가장 먼 깊이)
+    outside = np.ones(FRAME, bool)
+    outside[y1:y2, x1:x2] = False
+    assert np.all(depth_map[outside] == expected.min())
+
+
+def test_native_resolution_keeps_frame_aspect_ratio(estimator, monkeypatch):
+    monkeypatch.setattr(settings, "DEPTH_NATIVE_RESOLUTION", True)
+
+    # 40x40 영역을 16x16으로 예측 -> 0.4배 격자
+    depth_map = estimator._place_roi(gradient(16, 16), FRAME, ROI)
+    assert depth_map.shape == (32, 40)
+
+    # 예측이 영역보다 커도 원본보다 큰 격자는 만들지 않음
+    assert estimator._place_roi(gradient(64, 64), FRAME, ROI).shape == FRAME
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_mask_over_roi_reads_only_predicted_depths(estimator, monkeypatch, native):
+    monkeypatch.setattr(settings, "DEPTH_NATIVE_RESOLUTION", native)
+    x1, y1, x2, y2 = ROI
+    prediction = gradient(16, 16)
+    depth_map = estimator._place_roi(prediction, FRAME, ROI)
+
+    dense = np.zeros(FRAME, np.uint8)
+    dense[y1:y2, x1:x2] = 1
+    mask = Mask.from_dense(dense)
+    (ty1, ty2, tx1, tx2), crop = mask.placement(depth_map.shape)
+    values = mask.values(depth_map)
+
+    assert crop.all()
+    assert values.size == (ty2 - ty1) * (tx2 - tx1)
+    # 마스크 영역이 배치된 예측 영역과 정확히 겹쳐 채움값(최솟값)만 있는 테두리를 읽지 않음
+    fill = depth_map.min()
+    assert np.count_nonzero(depth_map != fill) <= values.size
+    assert values.max() == depth_map.max()
+
+
+def test_depth_roi_covers_boxes_and_masks_with_margin(monkeypatch):
+    pytest.importorskip("ultralytics")
+    from core.estimation_service import MassEstimationService
+
+    monkeypatch.setattr(settings, "DEPTH_ROI_MARGIN_RATIO", 0.1)
+    dense = np.zeros(FRAME, np.uint8)
+    dense[40:70, 50:90] = 1
+    segmentation = {
+        "food_objects": [{"bbox": [10, 10, 30, 20], "mask": None}],
+        "reference_objects": [{"bbox": [55, 45, 85, 65], "mask": Mask.from_dense(dense)}],
+    }
+
+    # 합집합 (10, 10, 90, 70), 긴 변 80의 10% 여백, 프레임 범위로 자름
+    assert MassEstimationService._depth_roi(segmentation, FRAME) == (2, 2, 98, 78)
+    assert MassEstimationService._depth_roi({"food_objects": [], "reference_objects": []}, FRAME) is None
@@ -0,0 +1,98 @@
+"""TieredCache: 메모리/디스크 계층 조회, TTL, 디스크 LRU 정리"""
+
+import time
+
+from utils.disk_cache import TieredCache
+
+VALUE_BYTES = 1000
+
+
+def value(tag: str) -> bytes:
+    return tag.encode() * VALUE_BYTES
+
+
+def disk_keys(path) -> set:
+    """메모리 계층 없이 같은 파일을 열어 디스크에 남은 키 확인"""
+    reader = TieredCache("reader", path, max_memory_entries=0)
+    try:
+        return {key for (key,) in reader._conn.execute("SELECT key FROM cache")}
+    finally:
+        reader.close()
+
+
+def test_memory_and_disk_hits(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = TieredCache("test", path, max_memory_entries=1)
+    cache.set("a", {"mass": 1})
+    cache.set("b", {"mass": 2})
+
+    assert cache.get("b") == {"mass": 2}
+    assert cache.get("a") == {"mass": 1}
+    assert cache.get("missing") is None
+    snapshot = cache.snapshot()
+    assert (snapshot["memory_hits"], snapshot["disk_hits"], snapshot["misses"]) == (1, 1, 1)
+    cache.close()
+
+    reopened = TieredCache("test", path, max_memory_entries=4)
+    assert reopened.get("b") == {"mass": 2}
+    reopened.close()
+
+
+def test_returned_values_are_independent_copies():
+    cache = TieredCache("test", None)
+    cache.set("a", {"foods": [1]})
+    cache.get("a")["foods"].append(2)
+
+    assert cache.get("a") == {"foods": [1]}
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = TieredCache("test", tmp_path / "cache.sqlite3", ttl_seconds=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.snapshot()["misses"] == 1
+    cache.close()
+
+
+def test_disk_eviction_removes_least_recently_used(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = TieredCache("test", path, max_memory_entries=0, max_disk_bytes=int(VALUE_BYTES * 3.5))
+    for tag in "abc":
+        cache.set(tag, value(tag))
+        time.sleep(0.01)
+    assert cache.get("a") == value("a")
+    time.sleep(0.01)
+    cache.set("d", value("d"))
+
+    assert cache.snapshot()["evictions"] == 1
+    assert cache.snapshot()["disk_bytes"] <= cache.max_disk_bytes
+    cache.close()
+    assert disk_keys(path) == {"a", "c", "d"}
+
+
+def test_memory_hits_keep_entries_hot_on_disk(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = TieredCache("test", path, max_memory_entries=8, max_disk_bytes=int(VALUE_BYTES * 3.5))
+    for tag in "abc":
+        cache.set(tag, value(tag))
+        time.sleep(0.01)
+    # "a"는 메모리 계층에서만 적중하지만 디스크 정리 순서에도 반영되어야 함
+    assert cache.get("a") == value("a")
+    assert cache.snapshot()["memory_hits"] == 1
+    time.sleep(0.01)
+    cache.set("d", value("d"))
+    cache.close()
+
+    assert disk_keys(path) == {"a", "c", "d"}
+
+
+def test_memory_only_mode_limits_entries():
+    cache = TieredCache("test", None, max_memory_entries=2)
+    for tag in "abc":
+        cache.set(tag, tag)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    assert cache.snapshot()["disk_bytes"] == 0
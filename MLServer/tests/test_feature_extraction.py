@@ -0,0 +1,56 @@
+"""FeatureExtractor 일괄 깊이 통계(reduceat)가 객체별 계산과 같은 결과를 내는지"""
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.feature_extraction import FeatureExtractor
+from utils.mask import Mask
+
+GRID = (96, 128)
+
+
+@pytest.fixture
+def extractor():
+    return FeatureExtractor()
+
+
+@pytest.fixture
+def masks():
+    rng = np.random.default_rng(0)
+    masks = []
+    for _ in range(6):
+        dense = np.zeros(GRID, np.uint8)
+        center = (int(rng.integers(10, GRID[1] - 10)), int(rng.integers(10, GRID[0] - 10)))
+        cv2.circle(dense, center, int(rng.integers(3, 30)), 1, -1)
+        masks.append(Mask.from_dense(dense))
+    # 겹치는 마스크, 빈 마스크, 한 픽셀 마스크
+    overlap = masks[0].to_full() | masks[1].to_full()
+    single = np.zeros(GRID, np.uint8)
+    single[50, 60] = 1
+    masks += [Mask.from_dense(overlap), Mask.from_dense(np.zeros(GRID, np.uint8)), Mask.from_dense(single)]
+    return masks
+
+
+@pytest.mark.parametrize("depth_shape", [GRID, (384, 512), (48, 64), (200, 150)])
+def test_batch_depth_stats_match_per_object(extractor, masks, depth_shape):
+    depth_map = np.random.default_rng(1).random(depth_shape, dtype=np.float32) * 10
+
+    batch = extractor._get_batch_depth_infos(depth_map, masks)
+    single = [extractor._get_basic_depth_info(depth_map, mask) for mask in masks]
+
+    assert len(batch) == len(masks)
+    for got, expected in zip(batch, single):
+        assert got["mean_depth"] == pytest.approx(expected["mean_depth"], rel=1e-5)
+        assert got["depth_variation"] == pytest.approx(expected["depth_variation"], rel=1e-6)
+
+
+def test_empty_inputs(extractor):
+    depth_map = np.ones(GRID, np.float32)
+
+    assert extractor._get_batch_depth_infos(depth_map, []) == []
+    empty = Mask.from_dense(np.zeros(GRID, np.uint8))
+    assert extractor._get_batch_depth_infos(depth_map, [empty, empty]) == [
+        {"mean_depth": 0.0, "depth_variation": 0.0},
+        {"mean_depth": 0.0, "depth_variation": 0.0},
+    ]
@@ -0,0 +1,134 @@
+"""LLMMassEstimator._fan_out: 요청별 동시 실행 수 제한, 실행 시작 기준 시간 초과, 대기 시간 초과, 요청 타임아웃 전달"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from config.settings import settings
+from models.llm_model import LLMMassEstimator
+from utils.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "LLM_CALL_TIMEOUT_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "LLM_QUEUE_TIMEOUT_SECONDS", 5.0)
+    estimator = LLMMassEstimator.__new__(LLMMassEstimator)
+    estimator._llm_executor = ThreadPoolExecutor(max_workers=2)
+    yield estimator
+    estimator._llm_executor.shutdown(wait=True)
+
+
+def test_results_keep_input_order_and_running_calls_are_limited(estimator):
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def call(value):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02 * (5 - value))
+        with lock:
+            running["now"] -= 1
+        return value * 10
+
+    results = estimator._fan_out(call, [(i,) for i in range(5)], on_timeout=lambda value: None)
+
+    assert results == [0, 10, 20, 30, 40]
+    assert running["max"] == 2
+
+
+def test_queued_calls_do_not_inherit_the_timeout(estimator):
+    # 호출마다 0.2s씩 걸리면 6개 전체는 0.3s를 넘지만 각 호출은 제한 안에 끝남
+    results = estimator._fan_out(
+        lambda value: time.sleep(0.2) or value,
+        [(i,) for i in range(6)],
+        on_timeout=lambda value: "timeout",
+    )
+
+    assert results == list(range(6))
+
+
+def test_call_running_past_timeout_uses_fallback(estimator):
+    release = threading.Event()
+
+    def call(value):
+        if value == 1:
+            release.wait(5)
+        return value
+
+    started = time.monotonic()
+    results = estimator._fan_out(call, [(0,), (1,), (2,)], on_timeout=lambda value: f"timeout:{value}")
+    release.set()
+
+    assert results == [0, "timeout:1", 2]
+    assert time.monotonic() - started < 2
+
+
+def test_call_that_never_starts_is_cancelled_after_queue_timeout(estimator, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_QUEUE_TIMEOUT_SECONDS", 0.2)
+    release = threading.Event()
+    # 다른 요청의 호출이 풀의 스레드를 모두 점유한 상황
+    blockers = [estimator._llm_executor.submit(release.wait, 5) for _ in range(2)]
+    calls = []
+
+    results = estimator._fan_out(lambda value: calls.append(value), [(0,)], on_timeout=lambda value: "queued")
+    release.set()
+    for blocker in blockers:
+        blocker.result()
+
+    assert results == ["queued"]
+    assert calls == []
+
+
+class SlowModel:
+    """요청 타임아웃(request_options)이 지나면 예외를 내는 Gemini 모델 대역"""
+    model_name = "slow"
+
+    def __init__(self):
+        self.timeouts = []
+
+    def generate_content(self, contents, generation_config=None, request_options=None):
+        timeout = (request_options or {}).get("timeout")
+        self.timeouts.append(timeout)
+        time.sleep(min(timeout or 5, 5))
+        raise TimeoutError("deadline exceeded")
+
+
+def test_timed_out_call_releases_its_worker(estimator):
+    model = SlowModel()
+    cache = LLMResponseCache(enabled=False)
+
+    def call(value):
+        try:
+            return cache.generate_text(model, f"prompt {value}", {"temperature": 0.0})
+        except TimeoutError:
+            return "sdk-timeout"
+
+    results = estimator._fan_out(call, [(0,), (1,)], on_timeout=lambda value: "timeout")
+    started = time.monotonic()
+    # 시간 초과된 두 호출이 스레드를 놓아야 새 작업이 바로 실행됨
+    assert estimator._llm_executor.submit(lambda: "free").result(timeout=1) == "free"
+
+    # SDK 타임아웃과 _fan_out의 시간 초과 판정은 같은 시각이므로 어느 쪽이든 기본값으로 대체됨
+    assert set(results) <= {"timeout", "sdk-timeout"}
+    assert all(0 < timeout <= settings.LLM_CALL_TIMEOUT_SECONDS for timeout in model.timeouts)
+    assert time.monotonic() - started < 0.5
+
+
+def test_calls_outside_fan_out_have_no_request_timeout():
+    class RecordingModel:
+        model_name = "recording"
+        request_options = "unset"
+
+        def generate_content(self, contents, generation_config=None, request_options=None):
+            RecordingModel.request_options = request_options
+            return type("Response", (), {"text": "ok"})()
+
+    assert LLMResponseCache(enabled=False).generate_text(RecordingModel(), "prompt", {}) == "ok"
+    assert RecordingModel.request_options is None
@@ -0,0 +1,57 @@
+"""encode_with_budget: JPEG 품질 탐색, 예산 초과 시 반복 축소, 축소 후에도 초과하면 경고"""
+
+import base64
+import logging
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.llm_payload import MIN_DOWNSCALE_SIDE, encode_with_budget
+
+
+@pytest.fixture
+def noise():
+    return np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+
+def decoded_size(payload: str) -> int:
+    return len(base64.b64decode(payload))
+
+
+def test_small_image_keeps_max_quality():
+    image = np.full((64, 64, 3), 128, dtype=np.uint8)
+
+    payload, quality = encode_with_budget(image, max_bytes=100_000, max_quality=90, min_quality=50)
+
+    assert quality == 90
+    assert decoded_size(payload) <= 100_000
+
+
+def test_quality_is_lowered_to_fit_budget(noise):
+    full, _ = encode_with_budget(noise, max_bytes=0, max_quality=90)
+    budget = decoded_size(full) * 3 // 4
+
+    payload, quality = encode_with_budget(noise, max_bytes=budget, max_quality=90, min_quality=10)
+
+    assert 10 <= quality < 90
+    assert decoded_size(payload) <= budget
+
+
+def test_downscales_until_within_budget(noise, caplog):
+    with caplog.at_level(logging.WARNING):
+        payload, quality = encode_with_budget(noise, max_bytes=20_000, max_quality=90, min_quality=50)
+
+    assert quality == 50
+    assert decoded_size(payload) <= 20_000
+    assert "예산 초과" not in caplog.text
+
+
+def test_reports_when_budget_cannot_be_met(noise, caplog):
+    with caplog.at_level(logging.WARNING):
+        payload, _ = encode_with_budget(noise, max_bytes=200, max_quality=90, min_quality=50)
+
+    assert decoded_size(payload) > 200
+    assert "축소 후에도 예산 초과" in caplog.text
+    image = np.frombuffer(base64.b64decode(payload), dtype=np.uint8)
+    assert min(cv2.imdecode(image, cv2.IMREAD_COLOR).shape[:2]) >= MIN_DOWNSCALE_SIDE
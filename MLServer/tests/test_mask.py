@@ -0,0 +1,100 @@
+"""Mask: 비트 압축/복원, 크기 변환 배치, 영역 추출, 형태 분석"""
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.mask import Mask
+
+
+@pytest.fixture
+def dense():
+    dense = np.zeros((60, 80), np.uint8)
+    cv2.circle(dense, (30, 25), 12, 1, -1)
+    dense[40:50, 55:70] = 1
+    return dense
+
+
+def test_pack_and_unpack_round_trip(dense):
+    mask = Mask.from_dense(dense)
+
+    assert mask.shape == (60, 80)
+    assert mask.box == (18, 13, 70, 50)
+    assert mask.area == int(dense.sum())
+    assert np.array_equal(mask.to_full(), dense)
+    assert np.array_equal(mask.crop, dense[13:50, 18:70])
+    # 잘라낸 영역만 비트 단위로 보관
+    assert mask.nbytes == (37 * 52 + 7) // 8
+
+
+def test_bool_input_and_odd_sizes_round_trip():
+    dense = np.random.default_rng(0).random((7, 13)) > 0.5
+
+    assert np.array_equal(Mask.from_dense(dense).to_full(), dense.astype(np.uint8))
+
+
+def test_empty_mask():
+    mask = Mask.from_dense(np.zeros((10, 10), np.uint8))
+
+    assert mask.box is None
+    assert mask.area == 0
+    assert mask.to_full((20, 20)).shape == (20, 20)
+    assert not mask.to_full().any()
+    assert mask.values(np.ones((10, 10))).size == 0
+    assert mask.shape_metrics["circularity"] == 0.0
+
+
+@pytest.mark.parametrize("target", [(120, 160), (180, 240), (30, 40), (45, 100)])
+def test_resized_placement_matches_nearest_resize(dense, target):
+    mask = Mask.from_dense(dense)
+    expected = cv2.resize(dense, (target[1], target[0]), interpolation=cv2.INTER_NEAREST)
+
+    assert np.array_equal(mask.to_full(target), expected)
+
+
+def test_tiny_object_survives_downscale():
+    dense = np.zeros((100, 100), np.uint8)
+    dense[51, 51] = 1
+
+    assert Mask.from_dense(dense).to_full((10, 10)).sum() == 1
+
+
+def test_values_and_crop_of_use_only_the_box(dense):
+    mask = Mask.from_dense(dense)
+    depth = np.arange(120 * 160, dtype=np.float32).reshape(120, 160)
+    full = mask.to_full(depth.shape)
+
+    assert np.array_equal(np.sort(mask.values(depth)), np.sort(depth[full > 0]))
+    region, crop = mask.crop_of(depth)
+    assert region.shape == crop.shape
+    assert region.size < depth.size
+
+
+def test_window_pads_outside_the_box(dense):
+    mask = Mask.from_dense(dense)
+
+    assert np.array_equal(mask.window(10, 5, 40, 30), dense[5:30, 10:40])
+    assert np.array_equal(mask.window(-5, -5, 5, 5), np.zeros((5, 5), np.uint8))
+    assert mask.window(75, 55, 200, 200).shape == (5, 5)
+
+
+def test_shape_metrics_match_full_frame_contours(dense):
+    mask = Mask.from_dense(dense)
+    contours, _ = cv2.findContours(dense, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    largest = max(contours, key=cv2.contourArea)
+
+    metrics = mask.shape_metrics
+    assert len(metrics["contours"]) == 2
+    assert metrics["contour_area"] == cv2.contourArea(largest)
+    assert metrics["perimeter"] == pytest.approx(cv2.arcLength(largest, True))
+    assert 0.8 < metrics["circularity"] <= 1.0
+    assert mask.shape_metrics is metrics
+
+
+def test_contours_scale_to_target_shape(dense):
+    mask = Mask.from_dense(dense)
+
+    scaled = mask.contours((120, 160))
+    original = mask.contours()
+    assert len(scaled) == len(original)
+    assert np.array_equal(scaled[0], original[0] * 2)
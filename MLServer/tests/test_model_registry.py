@@ -0,0 +1,260 @@
+"""ModelRegistry: 매니페스트 체크섬 고정/검증, 로컬 hubconf 로드, weights_only 로드, torch.hub 대체 범위"""
+
+import shutil
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from config.settings import settings
+from models import model_registry as registry_module
+from models.model_registry import EFFICIENTNET_REPO, MIDAS_REPO, ModelRegistry, ModelRegistryError, sha256_file
+
+MIDAS_HUBCONF = '''
+import torch
+
+class Transforms:
+    small_transform = staticmethod(lambda image: image)
+    dpt_transform = staticmethod(lambda image: image)
+
+def MiDaS_small(pretrained=True):
+    backbone = torch.hub.load("rwightman/gen-efficientnet-pytorch", "backbone", pretrained=True)
+    return torch.nn.Sequential(backbone, torch.nn.Linear(4, 1))
+
+def DPT_Large(pretrained=True):
+    return torch.nn.Sequential(torch.nn.Linear(3, 4), torch.nn.Linear(4, 1))
+
+DPT_Hybrid = DPT_Large
+
+def transforms():
+    return Transforms()
+'''
+
+BACKBONE_HUBCONF = '''
+import torch
+
+def backbone(pretrained=False):
+    assert not pretrained, "백본 가중치는 받지 않아야 함"
+    return torch.nn.Linear(3, 4)
+'''
+
+
+class NotATensor:
+    """weights_only 로드에서 허용되지 않는 객체"""
+
+
+def write_repo(directory, hubconf):
+    directory.mkdir(parents=True)
+    (directory / "hubconf.py").write_text(hubconf, encoding="utf-8")
+    return directory
+
+
+def reference_state():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(torch.nn.Linear(3, 4), torch.nn.Linear(4, 1)).state_dict()
+
+
+@pytest.fixture
+def sources(tmp_path):
+    weights = tmp_path / "src" / "midas_v21_small_256.pt"
+    weights.parent.mkdir()
+    torch.save(reference_state(), weights)
+    return {
+        "midas": write_repo(tmp_path / "src" / "midas", MIDAS_HUBCONF),
+        "backbone": write_repo(tmp_path / "src" / "backbone", BACKBONE_HUBCONF),
+        "weights": weights,
+    }
+
+
+@pytest.fixture
+def registry(tmp_path, sources):
+    registry = ModelRegistry(tmp_path / "registry")
+    registry.add_repo(MIDAS_REPO, "master", sources["midas"])
+    registry.add_repo(EFFICIENTNET_REPO, "master", sources["backbone"])
+    registry.add_weights("MiDaS_small", sources["weights"], "https://example.invalid/midas_v21_small_256.pt",
+                         expected_sha256=sha256_file(sources["weights"]))
+    registry.save_manifest()
+    return ModelRegistry(registry.root)
+
+
+def test_load_verified_weights_through_local_hubconf(registry):
+    assert registry.has_midas("MiDaS_small")
+    assert not registry.has_midas("DPT_Large")
+
+    model, transform = registry.load_midas("MiDaS_small", "cpu")
+
+    for name, tensor in reference_state().items():
+        assert torch.equal(model.state_dict()[name], tensor)
+    assert transform("image") == "image"
+    assert not model.training
+
+
+def test_tampered_weights_are_rejected(registry):
+    registry.load_midas("MiDaS_small", "cpu")
+    weights = registry.root / registry.manifest["weights"]["MiDaS_small"]["file"]
+    weights.write_bytes(weights.read_bytes() + b"tampered")
+
+    with pytest.raises(ModelRegistryError, match="체크섬"):
+        registry.load_midas("MiDaS_small", "cpu")
+    assert registry.verify_all()["MiDaS_small"] != "ok"
+
+
+def test_tampered_code_is_rejected(registry):
+    hubconf = registry.repo_dir(EFFICIENTNET_REPO) / "hubconf.py"
+    hubconf.write_text(BACKBONE_HUBCONF + "\nprint('injected')\n", encoding="utf-8")
+
+    with pytest.raises(ModelRegistryError, match="체크섬"):
+        registry.verify_midas("MiDaS_small")
+
+
+def test_unchanged_files_are_not_hashed_again(registry, monkeypatch):
+    registry.verify_midas("MiDaS_small")
+    calls = []
+    monkeypatch.setattr(registry_module, "sha256_file", lambda path: calls.append(path))
+
+    ModelRegistry(registry.root).verify_midas("MiDaS_small")
+
+    assert calls == []
+
+
+def test_weights_must_match_expected_and_pinned_hashes(registry, tmp_path):
+    other = tmp_path / "other.pt"
+    torch.save({"weight": torch.ones(1)}, other)
+
+    with pytest.raises(ModelRegistryError, match="지정한 해시"):
+        registry.add_weights("DPT_Hybrid", other, "https://example.invalid/dpt.pt", expected_sha256="0" * 64)
+    with pytest.raises(ModelRegistryError, match="--repin"):
+        registry.add_weights("MiDaS_small", other, "https://example.invalid/midas.pt")
+
+    registry.add_weights("MiDaS_small", other, "https://example.invalid/midas.pt", repin=True)
+    assert registry.pinned_sha256("MiDaS_small") == sha256_file(other)
+
+
+def test_pickled_objects_are_not_loaded(tmp_path):
+    path = tmp_path / "weights.pt"
+    torch.save({"weight": torch.ones(1), "extra": NotATensor()}, path)
+
+    with pytest.raises(ModelRegistryError, match="weights_only"):
+        ModelRegistry._load_state_dict(path)
+
+
+def test_hub_redirect_only_applies_to_the_loading_thread(registry, monkeypatch):
+    calls = []
+    monkeypatch.setattr(torch.hub, "load", lambda repo_or_dir, model, *args, **kwargs: calls.append(repo_or_dir))
+    entered, release = threading.Event(), threading.Event()
+
+    def hold_redirect():
+        with registry._local_hub():
+            entered.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_redirect)
+    holder.start()
+    entered.wait(5)
+    try:
+        # 다른 스레드의 github 저장소 요청은 로컬 저장소로 돌리지 않고 등록 여부도 검사하지 않음
+        torch.hub.load("someone/unregistered", "model")
+    finally:
+        release.set()
+        holder.join()
+
+    assert calls == ["someone/unregistered"]
+
+
+def test_unregistered_hub_repo_is_refused(registry):
+    with registry._local_hub():
+        with pytest.raises(ModelRegistryError, match="없는 torch.hub 저장소"):
+            torch.hub.load("someone/unregistered", "model")
+
+
+@pytest.fixture
+def remote(sources, monkeypatch):
+    """네트워크 대신 sources에서 복사하는 다운로드 (받은 URL 기록)"""
+    downloads = []
+
+    def download_repo(repo, ref, workdir):
+        downloads.append(repo)
+        return sources["backbone" if repo == EFFICIENTNET_REPO else "midas"]
+
+    def download_url_to_file(url, dst, progress=True):
+        downloads.append(url)
+        shutil.copyfile(sources["weights"], dst)
+
+    monkeypatch.setattr(registry_module, "download_repo", download_repo)
+    monkeypatch.setattr(torch.hub, "download_url_to_file", download_url_to_file)
+    monkeypatch.setattr(torch.hub, "load", _forbid_hub_load(torch.hub.load))
+    return downloads
+
+
+def _forbid_hub_load(original):
+    """로컬 저장소가 아닌 github 소스로 torch.hub.load를 부르면 실패"""
+    def load(repo_or_dir, model, *args, **kwargs):
+        if kwargs.get("source", "github") == "github":
+            pytest.fail(f"torch.hub에서 직접 받으면 안 됨: {repo_or_dir}")
+        return original(repo_or_dir, model, *args, **kwargs)
+    return load
+
+
+@pytest.fixture
+def midas(monkeypatch, tmp_path):
+    from models import midas_model
+
+    registry = ModelRegistry(tmp_path / "fresh")
+    monkeypatch.setattr(midas_model, "model_registry", registry)
+    model = midas_model.MiDaSDepthModel.__new__(midas_model.MiDaSDepthModel)
+    model._device = "cpu"
+    return model, registry
+
+
+def test_default_model_loads_through_registry_on_fresh_install(midas, remote):
+    from config.profiles import get_profile
+
+    model, registry = midas
+    model_type = get_profile().midas_model_type
+
+    loaded, transform = model._load_torch_variant(model_type)
+
+    assert registry.has_midas(model_type)
+    assert registry.pinned_sha256(model_type) is not None
+    assert torch.equal(loaded.state_dict()["1.weight"], reference_state()["1.weight"])
+    assert transform("image") == "image"
+    # 이후 로드는 받지 않고 고정된 해시로 검증
+    remote.clear()
+    ModelRegistry(registry.root).load_midas(model_type, "cpu")
+    assert remote == []
+
+
+def test_pinned_hash_is_enforced_when_populating(midas, remote):
+    model, registry = midas
+    registry.manifest["weights"]["MiDaS_small"] = {"file": "checkpoints/missing.pt", "url": "", "sha256": "0" * 64}
+
+    with pytest.raises(ModelRegistryError, match="지정한 해시"):
+        model._load_torch_variant("MiDaS_small")
+    assert not (registry.root / "checkpoints" / "midas_v21_small_256.pt").exists()
+
+
+def test_failed_download_leaves_no_manifest(midas, remote, monkeypatch):
+    model, registry = midas
+
+    def unreachable(repo, ref, workdir):
+        raise OSError("network unreachable")
+
+    monkeypatch.setattr(registry_module, "download_repo", unreachable)
+
+    with pytest.raises(OSError):
+        model._load_torch_variant("MiDaS_small")
+    assert not registry.manifest_path.exists()
+
+
+def test_offline_and_require_pinned_do_not_download(midas, remote, monkeypatch):
+    model, _ = midas
+
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_REQUIRE_PINNED", True)
+    with pytest.raises(ModelRegistryError, match="고정되지 않았습니다"):
+        model._load_torch_variant("MiDaS_small")
+
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_OFFLINE", True)
+    with pytest.raises(ModelRegistryError, match="없습니다"):
+        model._load_torch_variant("MiDaS_small")
+    assert remote == []
@@ -0,0 +1,124 @@
+"""ONNX 백엔드 MiDaS: torch transform과 같은 입력 크기, 가중치 해시별 내보내기 캐시, torch 출력과의 비교"""
+
+import threading
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from config.settings import settings
+from models import midas_model, onnx_backend
+
+SHA_A = "a" * 64
+SHA_B = "b" * 64
+
+
+@pytest.mark.parametrize("model_type, frame, expected", [
+    # DPT (minimal): 짧은 변이 384가 되도록 비율 유지
+    ("DPT_Large", (480, 640), (384, 512)),
+    ("DPT_Hybrid", (3024, 4032), (384, 512)),
+    ("DPT_Large", (1080, 1920), (384, 672)),
+    ("DPT_Large", (300, 200), (384, 256)),
+    # MiDaS_small (upper_bound): 긴 변이 256을 넘지 않도록 비율 유지 (144/32=4.5는 짝수 반올림)
+    ("MiDaS_small", (480, 640), (192, 256)),
+    ("MiDaS_small", (1080, 1920), (128, 256)),
+    ("MiDaS_small", (1000, 1000), (256, 256)),
+])
+def test_input_size_matches_midas_resize(model_type, frame, expected):
+    assert onnx_backend.midas_input_size(model_type, *frame) == expected
+
+
+def test_transform_keeps_aspect_ratio_and_normalizes():
+    image = np.full((480, 640, 3), 255, np.uint8)
+
+    tensor = onnx_backend.midas_transform("MiDaS_small")(image)
+
+    assert tensor.shape == (1, 3, 192, 256)
+    assert tensor.dtype == torch.float32
+    mean, std = np.array([0.485, 0.456, 0.406]), np.array([0.229, 0.224, 0.225])
+    np.testing.assert_allclose(tensor[0, :, 0, 0].numpy(), (1 - mean) / std, rtol=1e-5)
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ONNX_CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_export_is_cached_per_weights_hash(cache_dir):
+    cached = onnx_backend.cached_path(f"midas_MiDaS_small_{SHA_A[:16]}")
+    cached.write_bytes(b"onnx")
+    loads = []
+
+    def load_model():
+        loads.append(True)
+        raise RuntimeError("loaded")
+
+    assert onnx_backend.export_midas("MiDaS_small", SHA_A, load_model) == cached
+    assert loads == []
+    with pytest.raises(RuntimeError, match="loaded"):
+        onnx_backend.export_midas("MiDaS_small", SHA_B, load_model)
+    assert loads == [True]
+
+
+class ConvDepth(torch.nn.Module):
+    """입력 크기를 그대로 따르는 깊이 모델 대역 (B, 3, H, W) -> (B, H, W)"""
+
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv2d(3, 1, 3, padding=1)
+
+    def forward(self, x):
+        return self.conv(x)[:, 0]
+
+
+class ExportMismatchDepth(ConvDepth):
+    """내보낸 그래프가 torch 실행과 다른 결과를 내는 모델"""
+
+    def forward(self, x):
+        depth = super().forward(x)
+        return depth * 2 if torch.onnx.is_in_onnx_export() else depth
+
+
+def test_exported_model_matches_torch_on_non_square_input(cache_dir):
+    pytest.importorskip("onnxruntime")
+    model = ConvDepth().eval()
+
+    path = onnx_backend.export_midas("MiDaS_small", SHA_A, lambda: model)
+    image = onnx_backend.midas_transform("MiDaS_small")(np.random.default_rng(0).integers(0, 255, (480, 640, 3), np.uint8))
+    onnx_output = onnx_backend.OnnxDepthModel(onnx_backend.create_session(path))(image)
+
+    with torch.no_grad():
+        expected = model(image)
+    assert onnx_output.shape == (1, 192, 256)
+    np.testing.assert_allclose(onnx_output.numpy(), expected.numpy(), rtol=1e-4, atol=1e-5)
+
+
+def test_export_that_differs_from_torch_is_not_cached(cache_dir):
+    pytest.importorskip("onnxruntime")
+
+    with pytest.raises(RuntimeError, match="torch"):
+        onnx_backend.export_midas("MiDaS_small", SHA_A, lambda: ExportMismatchDepth())
+
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_failed_onnx_export_falls_back_to_torch(monkeypatch):
+    model = midas_model.MiDaSDepthModel.__new__(midas_model.MiDaSDepthModel)
+    model._device = "cpu"
+    model._variants = {}
+    model._variant_lock = threading.Lock()
+    model._quantization_warned = False
+    torch_variant = (ConvDepth(), onnx_backend.midas_transform("MiDaS_small"))
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "onnx")
+    monkeypatch.setattr(model, "_ensure_registered", lambda model_type: None)
+    monkeypatch.setattr(model, "_load_torch_variant", lambda model_type: torch_variant)
+    monkeypatch.setattr(midas_model.model_registry, "pinned_sha256", lambda model_type: SHA_A)
+
+    def fail_export(model_type, weights_sha256, load_model):
+        raise RuntimeError("ONNX 출력이 torch 모델과 다릅니다")
+
+    monkeypatch.setattr(onnx_backend, "export_midas", fail_export)
+
+    assert model.load_variant("MiDaS_small") is torch_variant
@@ -0,0 +1,90 @@
+"""ResultCache: 캐시 키가 이미지, 프로필, 결과에 영향을 주는 설정에 따라 달라지는지"""
+
+import numpy as np
+import pytest
+
+from config.profiles import get_profile
+from config.settings import settings
+from core.result_cache import ResultCache
+from utils.disk_cache import TieredCache
+
+
+@pytest.fixture
+def cache():
+    return ResultCache(enabled=True, cache=TieredCache("test", None))
+
+
+@pytest.fixture
+def image():
+    return np.arange(4 * 4 * 3, dtype=np.uint8).reshape(4, 4, 3)
+
+
+def test_key_depends_on_pixels_and_profile(cache, image):
+    key = cache.key_for(image, get_profile("fast"))
+
+    assert key == cache.key_for(image.copy(), get_profile("fast"))
+    assert key != cache.key_for(image, get_profile("accurate"))
+    changed = image.copy()
+    changed[0, 0, 0] += 1
+    assert key != cache.key_for(changed, get_profile("fast"))
+
+
+@pytest.mark.parametrize("name, new_value", [
+    ("DENSITY_TABLE_ENABLED", not settings.DENSITY_TABLE_ENABLED),
+    ("DENSITY_TABLE_MIN_SCORE", settings.DENSITY_TABLE_MIN_SCORE + 0.1),
+    ("LLM_CROP_MARGIN_RATIO", settings.LLM_CROP_MARGIN_RATIO + 0.1),
+    ("LLM_PAYLOAD_MAX_BYTES", settings.LLM_PAYLOAD_MAX_BYTES // 2),
+    ("DEPTH_ROI_ENABLED", not settings.DEPTH_ROI_ENABLED),
+    ("MIDAS_QUANTIZATION", "dynamic"),
+])
+def test_key_changes_with_result_affecting_settings(cache, image, monkeypatch, name, new_value):
+    key = cache.key_for(image)
+    monkeypatch.setattr(settings, name, new_value)
+
+    assert cache.key_for(image) != key
+
+
+def test_density_table_file_is_part_of_the_key(cache, image, monkeypatch, tmp_path):
+    table = tmp_path / "density.csv"
+    table.write_text("food_name,density\n떡,1.2\n", encoding="utf-8")
+    monkeypatch.setattr(settings, "DENSITY_TABLE_PATH", table)
+    key = cache.key_for(image)
+    table.write_text("food_name,density\n떡,1.25\n", encoding="utf-8")
+
+    assert cache.key_for(image) != key
+
+
+def test_only_successful_results_are_stored(cache, image):
+    key = cache.key_for(image)
+    cache.put(key, {"error": "failed"})
+    assert cache.get(key) is None
+
+    cache.put(key, {"mass_estimation": {"total_mass_g": 150}})
+    result = cache.get(key)
+    assert result["cache_hit"] is True
+    assert result["mass_estimation"] == {"total_mass_g": 150}
+
+
+@pytest.mark.parametrize("mass_estimation", [
+    {"error": "LLM 모델이 초기화되지 않았습니다."},
+    {"food_estimations": [
+        {"estimated_mass_g": 210.0, "calculation_method": "volume_density_based"},
+        {"error": "Gemini 500", "estimated_mass_g": 100.0, "confidence": 0.2},
+    ]},
+    {"food_estimations": [{"error": "LLM 호출 시간 초과 (30s)", "estimated_mass_g": 100.0, "confidence": 0.2}]},
+    {"food_estimations": [{"error": "LLM 호출 한도 초과", "estimated_mass_g": 100.0, "confidence": 0.2}]},
+    {"food_estimations": [{"estimated_mass_g": 180.0, "density_info": {"density_g_per_cm3": 1.0, "fallback": True}}]},
+    {"food_estimations": [{"estimated_mass_g": 100.0, "calculation_method": "fallback"}]},
+])
+def test_results_with_fallback_values_are_not_stored(cache, image, mass_estimation):
+    key = cache.key_for(image)
+    cache.put(key, {"mass_estimation": mass_estimation})
+
+    assert cache.get(key) is None
+
+
+def test_verified_result_built_on_fallback_estimate_is_not_stored(cache, image):
+    key = cache.key_for(image)
+    cache.put(key, {"mass_estimation": {"food_verifications": [{"verified_mass_g": 120.0}]}, "fallback_used": True})
+
+    assert cache.get(key) is None
@@ -0,0 +1,148 @@
+"""TaskStore 백엔드(memory, sqlite, redis): 생성/조회/갱신/만료/정리"""
+
+import asyncio
+import time
+
+import pytest
+
+from core.task_store import MemoryTaskStore, RedisTaskStore, SQLiteTaskStore, run_sweeper
+
+TTL = 0.2
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def factory(active_ttl_seconds=60.0, result_ttl_seconds=60.0):
+        ttls = {"active_ttl_seconds": active_ttl_seconds, "result_ttl_seconds": result_ttl_seconds}
+        if request.param == "memory":
+            store = MemoryTaskStore(max_entries=100, **ttls)
+        elif request.param == "sqlite":
+            store = SQLiteTaskStore(path=tmp_path / f"tasks{len(stores)}.sqlite3", **ttls)
+        else:
+            fakeredis = pytest.importorskip("fakeredis")
+            store = RedisTaskStore(client=fakeredis.FakeRedis(), prefix=f"test{len(stores)}:", **ttls)
+        stores.append(store)
+        return store
+
+    yield factory
+    for store in stores:
+        store.close()
+
+
+def pending(message="작업이 시작되었습니다."):
+    return {"status": "pending", "progress": 0.0, "message": message, "result": None}
+
+
+def test_create_get_update(make_store):
+    store = make_store()
+    store.create("a", pending())
+
+    assert store.get("a") == pending()
+    assert store.get("missing") is None
+    assert "a" in store
+
+    updated = store.update("a", status="processing", progress=0.5)
+    assert updated["status"] == "processing"
+    assert store.get("a")["progress"] == 0.5
+    assert store.get("a")["message"] == "작업이 시작되었습니다."
+    assert store.update("missing", progress=1.0) is None
+    assert store.size() == 1
+
+
+def test_returned_record_is_a_copy(make_store):
+    store = make_store()
+    record = pending()
+    store.create("a", record)
+    record["status"] = "mutated"
+    store.get("a")["status"] = "mutated"
+
+    assert store.get("a")["status"] == "pending"
+
+
+def test_delete(make_store):
+    store = make_store()
+    store.create("a", pending())
+    store.delete("a")
+
+    assert store.get("a") is None
+    assert store.size() == 0
+
+
+def test_active_task_expires(make_store):
+    store = make_store(active_ttl_seconds=TTL)
+    store.create("a", pending())
+    time.sleep(TTL + 0.1)
+
+    assert store.get("a") is None
+    assert store.update("a", progress=0.5) is None
+
+
+def test_finished_task_uses_result_ttl(make_store):
+    store = make_store(active_ttl_seconds=60.0, result_ttl_seconds=TTL)
+    store.create("done", pending())
+    store.create("running", pending())
+    store.update("done", status="completed", result={"total_mass_g": 120})
+    time.sleep(TTL + 0.1)
+
+    assert store.get("done") is None
+    assert store.get("running") is not None
+
+
+def test_sweep_removes_only_expired(make_store):
+    store = make_store(active_ttl_seconds=TTL)
+    store.create("old", pending())
+    time.sleep(TTL + 0.1)
+    store.active_ttl_seconds = 60.0
+    store.create("new", pending())
+
+    assert store.sweep() == 1
+    assert store.size() == 1
+    assert store.get("new") is not None
+    assert store.swept_total == 1
+    assert store.snapshot()["size"] == 1
+
+
+def test_async_methods_run_off_the_event_loop(make_store):
+    store = make_store()
+
+    async def scenario():
+        await store.acreate("a", pending())
+        updated = await store.aupdate("a", progress=0.3)
+        return updated, await store.aget("a"), await store.asnapshot()
+
+    updated, fetched, snapshot = asyncio.run(scenario())
+
+    assert updated["progress"] == 0.3
+    assert fetched == updated
+    assert snapshot["size"] == 1
+
+
+def test_sweeper_loop_cleans_up_periodically(make_store):
+    store = make_store(active_ttl_seconds=0.05)
+    store.create("a", pending())
+
+    async def scenario():
+        sweeper = asyncio.create_task(run_sweeper(store, interval_seconds=0.1))
+        await asyncio.sleep(0.3)
+        sweeper.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sweeper
+
+    asyncio.run(scenario())
+
+    assert store.size() == 0
+    assert store.swept_total == 1
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryTaskStore(max_entries=2, active_ttl_seconds=60.0, result_ttl_seconds=60.0)
+    store.create("a", pending())
+    store.create("b", pending())
+    store.get("a")
+    store.create("c", pending())
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
@@ -12,6 +12,7 @@ import cv2
 from datetime import datetime
 
 from config.settings import settings
+from utils.debug_writer import debug_writer
 
 class DebugHelper:
     """
@@ -598,81 +599,94 @@ class DebugHelper:
             print(f"{'='*60}") 
     
     def save_segmentation_visualization(self, image: np.ndarray, segmentation_results: Dict) -> None:
-        """세그멘테이션 결과를 시각화하여 이미지 파일로 저장"""
+        """세그멘테이션 결과 시각화를 백그라운드 저장 큐에 넣습니다. (합성과 저장은 작업 스레드에서 수행)"""
         if not self.enable_debug:
             return
 
-        # 원본 이미지 복사본 생성 (원본 수정 방지)
-        vis_image = image.copy()
-        
-        all_objects = segmentation_results.get("all_objects", [])
+        objects = self._snapshot_objects(segmentation_results)
+        save_path = settings.RESULTS_DIR / f"{self.file_basename}_segmentation.jpg"
+        debug_writer.submit(save_path, lambda: self._render_segmentation(image, objects))
+
+    def save_depth_map_visualization(self, image: np.ndarray, depth_map: np.ndarray, segmentation_results: Dict = None) -> None:
+        """깊이 맵 시각화를 백그라운드 저장 큐에 넣습니다. (합성과 저장은 작업 스레드에서 수행)"""
+        if not self.enable_debug:
+            return
+
+        objects = self._snapshot_objects(segmentation_results) if segmentation_results else []
+        save_path = settings.RESULTS_DIR / f"{self.file_basename}_depth.jpg"
+        debug_writer.submit(save_path, lambda: self._render_depth_map(image, depth_map, objects))
 
+    @staticmethod
+    def _snapshot_objects(segmentation_results: Dict) -> List[Dict]:
+        """
+        시각화에 필요한 객체 정보만 복사합니다.
+        이후 단계가 결과 딕셔너리를 수정해도 저장 작업에 영향이 없도록 합니다.
+        (이미지, 깊이 맵, Mask는 파이프라인에서 수정하지 않으므로 참조만 보관)
+        """
+        return [
+            {
+                "class_name": obj.get("class_name", "default"),
+                "confidence": obj.get("confidence", 0),
+                "bbox": tuple(obj.get("bbox")),
+                "mask": obj.get("mask"),
+            }
+            for obj in segmentation_results.get("all_objects", [])
+        ]
+
+    @staticmethod
+    def _render_segmentation(image: np.ndarray, objects: List[Dict]) -> np.ndarray:
+        """
+        모든 객체의 마스크 오버레이를 한 번에 합성합니다.
+        객체별 색상(0.5배)을 box 영역에만 누적한 뒤 원본과 한 번 더해 포화 처리하므로
+        객체마다 전체 프레임을 합성하던 방식과 결과가 같습니다.
+        """
         # 클래스별 색상 정의 (BGR)
         class_colors = {
             "food": (255, 178, 102),  # Light Blue
             "earphone_case": (102, 102, 255),  # Light Red
             "default": (128, 128, 128) # Gray
         }
-        
-        for obj in all_objects:
-            class_name = obj.get("class_name", "default")
+
+        overlay = np.zeros(image.shape, np.uint16)
+        for obj in objects:
+            mask = obj["mask"]
+            if mask is None or mask.box is None:
+                continue
+            color = class_colors.get(obj["class_name"], class_colors["default"])
+            (y1, y2, x1, x2), crop = mask.placement(image.shape[:2])
+            overlay[y1:y2, x1:x2][crop > 0] += np.round(np.array(color) * 0.5).astype(np.uint16)
+        vis_image = cv2.add(image, np.minimum(overlay, 255).astype(np.uint8))
+
+        for obj in objects:
+            class_name = obj["class_name"]
             color = class_colors.get(class_name, class_colors["default"])
-            
-            # 마스크 오버레이
-            mask = obj.get("mask")
-            if mask is not None:
-                # 마스크 크기를 이미지 크기에 맞게 조정
-                if mask.shape[:2] != vis_image.shape[:2]:
-                    mask = cv2.resize(mask, (vis_image.shape[1], vis_image.shape[0]), interpolation=cv2.INTER_NEAREST)
-                
-                # 3채널 컬러 마스크 생성
-                colored_mask = np.zeros_like(vis_image)
-                colored_mask[mask > 0] = color
-                # 원본 이미지와 합성 (복사본에만 적용)
-                vis_image = cv2.addWeighted(vis_image, 1.0, colored_mask, 0.5, 0)
-            
+
             # 바운딩 박스
-            x1, y1, x2, y2 = obj.get("bbox")
+            x1, y1, x2, y2 = obj["bbox"]
             cv2.rectangle(vis_image, (x1, y1), (x2, y2), color, 2)
-            
+
             # 텍스트
-            label = f"{class_name} ({obj.get('confidence', 0):.2f})"
+            label = f"{class_name} ({obj['confidence']:.2f})"
             cv2.putText(vis_image, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            
-        try:
-            save_path = settings.RESULTS_DIR / f"{self.file_basename}_segmentation.jpg"
-            cv2.imwrite(str(save_path), vis_image)
-            logging.info(f"🖼️  세그멘테이션 시각화 저장: {save_path}")
-        except Exception as e:
-            logging.error(f"❌ 세그멘테이션 시각화 저장 실패: {e}", exc_info=True)
 
-            
-    def save_depth_map_visualization(self, image: np.ndarray, depth_map: np.ndarray, segmentation_results: Dict = None) -> None:
-        """깊이 맵을 시각화하여 이미지 파일로 저장"""
-        if not self.enable_debug:
-            return
+        return vis_image
+
+    @staticmethod
+    def _render_depth_map(image: np.ndarray, depth_map: np.ndarray, objects: List[Dict]) -> np.ndarray:
+        """깊이 맵 컬러 시각화와 객체 윤곽선을 원본 이미지 옆에 붙입니다."""
+        # MiDaS 출력 해상도로 유지된 깊이 맵은 시각화할 때만 원본 크기로 보간
+        h, w, _ = image.shape
+        if depth_map.shape[:2] != (h, w):
+            depth_map = cv2.resize(depth_map, (w, h), interpolation=cv2.INTER_CUBIC)
 
         # 깊이 맵 정규화 (0-255) 및 컬러맵 적용
         normalized_depth = cv2.normalize(depth_map, None, 255, 0, cv2.NORM_MINMAX, cv2.CV_8U)
         colored_depth = cv2.applyColorMap(normalized_depth, cv2.COLORMAP_JET)
 
-        # 객체 경계선 그리기 (옵션)
-        if segmentation_results:
-            all_objects = segmentation_results.get("all_objects", [])
-            for obj in all_objects:
-                mask = obj.get("mask")
-                if mask is not None:
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    cv2.drawContours(colored_depth, contours, -1, (255, 255, 255), 2) # White
-        
-        # 원본 이미지와 깊이 맵 병합 (원본 이미지 복사본 사용)
-        h, w, _ = image.shape
-        colored_depth_resized = cv2.resize(colored_depth, (w, h))
-        combined_image = cv2.hconcat([image.copy(), colored_depth_resized])  # 원본 이미지 복사본 사용
-        
-        try:
-            save_path = settings.RESULTS_DIR / f"{self.file_basename}_depth.jpg"
-            cv2.imwrite(str(save_path), combined_image)
-            logging.info(f"🖼️  깊이 맵 시각화 저장: {save_path}")
-        except Exception as e:
-            logging.error(f"❌ 깊이 맵 시각화 저장 실패: {e}", exc_info=True)
\ No newline at end of file
+        # 객체 경계선 그리기 (부피 추정 때 계산해 둔 윤곽선 재사용)
+        contours = [contour for obj in objects if obj["mask"] is not None for contour in obj["mask"].contours((h, w))]
+        if contours:
+            cv2.drawContours(colored_depth, contours, -1, (255, 255, 255), 2) # White
+
+        # 원본 이미지와 깊이 맵 병합 (hconcat이 새 배열을 만들므로 원본은 수정되지 않음)
+        return cv2.hconcat([image, colored_depth])
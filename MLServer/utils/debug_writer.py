@@ -0,0 +1,115 @@
+"""
+디버그 시각화 백그라운드 저장
+시각화 이미지 합성과 cv2.imwrite를 요청 스레드가 아닌 작업 스레드에서 수행합니다.
+큐가 가득 차면 새 작업은 버리므로 요청이 진단용 디스크 I/O를 기다리지 않습니다.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+
+
+class DebugWriter:
+    """
+    크기가 제한된 큐와 작업 스레드 1개로 디버그 이미지를 저장합니다.
+    - submit(): 저장 경로와 이미지를 만드는 함수(render)를 큐에 넣고 바로 반환 (가득 차면 버림)
+    - flush(): 큐에 남은 작업이 끝날 때까지 대기 (프로세스 종료 시 자동 호출)
+    render는 작업 스레드에서 실행되므로 요청이 끝난 뒤 수정될 수 있는 값을 참조하면 안 됩니다.
+    """
+
+    def __init__(self, max_queue_size: int = None):
+        """
+        Args:
+            max_queue_size: 대기 가능한 최대 작업 수 (기본값: settings.DEBUG_WRITER_QUEUE_SIZE)
+        """
+        self.max_queue_size = max(1, max_queue_size or settings.DEBUG_WRITER_QUEUE_SIZE)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def submit(self, save_path: Path, render: Callable[[], np.ndarray]) -> bool:
+        """
+        저장 작업을 큐에 넣습니다.
+
+        Returns:
+            큐에 들어갔으면 True, 큐가 가득 차서 버렸으면 False
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((save_path, render))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            logging.warning(f"디버그 저장 큐가 가득 차서 시각화를 건너뜁니다: {save_path}")
+            return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """큐의 작업이 모두 끝날 때까지 최대 timeout초 대기합니다. (모두 끝났으면 True)"""
+        timeout = settings.DEBUG_WRITER_FLUSH_TIMEOUT_S if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning(f"디버그 저장 대기 시간 초과: 남은 작업 {self._queue.unfinished_tasks}개")
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def snapshot(self) -> Dict:
+        """모니터링용 상태 정보"""
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_queue_size": self.max_queue_size,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+    def _ensure_worker(self) -> None:
+        """작업 스레드를 처음 사용할 때 시작합니다."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        """큐에서 작업을 꺼내 이미지를 합성하고 저장하는 루프"""
+        while True:
+            save_path, render = self._queue.get()
+            try:
+                image = render()
+                if image is not None:
+                    if not cv2.imwrite(str(save_path), image):
+                        raise IOError("cv2.imwrite 실패")
+                    logging.info(f"🖼️  디버그 시각화 저장: {save_path}")
+                with self._stats_lock:
+                    self._written += 1
+            except Exception as e:
+                with self._stats_lock:
+                    self._failed += 1
+                logging.error(f"❌ 디버그 시각화 저장 실패: {save_path}, 오류: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+# 싱글톤 인스턴스 생성
+debug_writer = DebugWriter()
+atexit.register(debug_writer.flush)
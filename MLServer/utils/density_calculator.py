@@ -7,11 +7,15 @@ import logging
 import json
 import re
 import cv2
-import base64
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 import google.generativeai as genai
 from config.settings import settings
+from utils.llm_cache import llm_response_cache
+from utils.density_table import density_table
+from utils.image_context import ImageContext
+from utils.mask import Mask
+from utils.llm_payload import build_food_payload, encode_with_budget
 
 class DensityCalculator:
     """
@@ -48,7 +52,27 @@ class DensityCalculator:
             logging.error(f"밀도 계산용 LLM 초기화 실패: {e}")
             self.llm_model = None
     
-    def get_food_density_from_llm(self, food_name: str, food_class: str = None, image: np.ndarray = None, food_mask: np.ndarray = None) -> Dict:
+    def lookup_local_density(self, food_name: str) -> Optional[Dict]:
+        """
+        로컬 밀도 테이블에서 음식 밀도를 조회합니다.
+        "food"와 같은 일반 클래스명이거나 유사한 음식이 없으면 None을 반환합니다.
+        신뢰도가 낮은 후보(confident=False)도 반환하므로, LLM 조회 여부는 is_confident()로 판단하고
+        결과는 LLM이 실패했을 때를 위해 _get_fallback_density()까지 그대로 전달합니다. (같은 음식을 다시 조회하지 않음)
+        """
+        if not settings.DENSITY_TABLE_ENABLED:
+            return None
+        density_info = density_table.lookup(food_name)
+        if self.is_confident(density_info):
+            logging.info(f"음식 '{food_name}' 밀도 정보 (로컬 테이블): {density_info['density_g_per_cm3']:.2f} g/cm³")
+        return density_info
+
+    @staticmethod
+    def is_confident(density_info: Optional[Dict]) -> bool:
+        """LLM 조회를 대신할 수 있을 만큼 신뢰도가 높은 로컬 테이블 결과인지"""
+        return density_info is not None and density_info.get("confident", False)
+
+    def get_food_density_from_llm(self, food_name: str, food_class: str = None, image: np.ndarray | ImageContext = None,
+                                  food_mask: Mask = None, food_bbox: List = None, local_density: Dict = None) -> Dict:
         """
         LLM으로부터 음식의 밀도 정보를 얻음
         
@@ -57,31 +81,34 @@ class DensityCalculator:
             food_class: YOLO에서 감지된 클래스명 (선택사항)
             image: 원본 이미지 (음식 식별용)
             food_mask: 음식 마스크 (음식 영역 강조용)
+            food_bbox: 음식 bbox (이 영역만 잘라서 전송)
+            local_density: 호출자가 먼저 조회한 로컬 테이블 결과 (LLM 실패 시 기본 밀도 대신 사용)
             
         Returns:
             밀도 정보 딕셔너리
         """
         if not self.llm_model:
-            return self._get_fallback_density(food_name, food_class)
+            return self._get_fallback_density(food_name, food_class, local_density)
         
         try:
             # 이미지가 있으면 멀티모달로 음식 식별 + 밀도 조회
             if image is not None:
-                return self._get_density_with_image_identification(food_name, image, food_mask)
+                return self._get_density_with_image_identification(food_name, image, food_mask, food_bbox, local_density)
             else:
                 # 텍스트만으로 밀도 조회
                 prompt = self._build_density_prompt(food_name, food_class)
                 
-                response = self.llm_model.generate_content(
+                response_text = llm_response_cache.generate_text(
+                    self.llm_model,
                     prompt,
-                    generation_config=genai.types.GenerationConfig(
+                    generation_config=dict(
                         temperature=0.1,  # 일관된 결과를 위해 낮은 온도
                         top_p=0.8,
                         candidate_count=1
                     ),
                 )
                 
-                density_info = self._parse_density_response(response.text)
+                density_info = self._parse_density_response(response_text)
                 
                 # 검증 및 보정
                 density_info = self._validate_density(density_info, food_name)
@@ -91,9 +118,11 @@ class DensityCalculator:
             
         except Exception as e:
             logging.error(f"LLM 밀도 조회 실패 ({food_name}): {e}")
-            return self._get_fallback_density(food_name, food_class)
+            return self._get_fallback_density(food_name, food_class, local_density)
     
-    def _get_density_with_image_identification(self, yolo_class: str, image: np.ndarray, food_mask: np.ndarray = None) -> Dict:
+    def _get_density_with_image_identification(self, yolo_class: str, image: np.ndarray | ImageContext,
+                                               food_mask: Mask = None, food_bbox: List = None,
+                                               local_density: Dict = None) -> Dict:
         """
         이미지를 보고 구체적인 음식을 식별한 후 밀도 조회
         
@@ -101,13 +130,14 @@ class DensityCalculator:
             yolo_class: YOLO에서 감지된 클래스명 (예: "food")
             image: 원본 이미지
             food_mask: 음식 영역 마스크 (선택사항)
+            food_bbox: 음식 bbox (선택사항, 있으면 여백을 포함해 잘라냄)
             
         Returns:
             밀도 정보 딕셔너리
         """
         try:
             # 이미지 전처리
-            processed_image = self._prepare_image_for_llm(image, food_mask)
+            processed_image = self._prepare_image_for_llm(image, food_mask, food_bbox)
             
             # 음식 식별 + 밀도 조회 프롬프트
             prompt = self._build_image_density_prompt(yolo_class)
@@ -120,16 +150,17 @@ class DensityCalculator:
                 ]}
             ]
             
-            response = self.llm_model.generate_content(
+            response_text = llm_response_cache.generate_text(
+                self.llm_model,
                 multimodal_content,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=dict(
                     temperature=0.1,
                     top_p=0.8,
                     candidate_count=1
                 ),
             )
             
-            density_info = self._parse_density_response(response.text)
+            density_info = self._parse_density_response(response_text)
             density_info = self._validate_density(density_info, density_info.get("food_name", yolo_class))
             
             logging.info(f"이미지 기반 음식 식별: '{density_info.get('food_name', 'unknown')}' → 밀도: {density_info['density_g_per_cm3']:.2f} g/cm³")
@@ -137,37 +168,166 @@ class DensityCalculator:
             
         except Exception as e:
             logging.error(f"이미지 기반 밀도 조회 실패: {e}")
-            return self._get_fallback_density(yolo_class)
+            return self._get_fallback_density(yolo_class, local_density=local_density)
     
-    def _prepare_image_for_llm(self, image: np.ndarray, food_mask: np.ndarray = None) -> str:
-        """LLM 입력용 이미지 전처리"""
-        try:
-            # BGR → RGB 변환
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    def get_food_densities_combined(self, food_objects: List[Dict], image: np.ndarray | ImageContext,
+                                    local_densities: List[Optional[Dict]] = None) -> List[Dict]:
+        """
+        한 번의 멀티모달 요청으로 이미지 속 모든 음식을 식별하고 밀도/질량을 조회합니다. (LLM_REQUEST_MODE="combined")
+        
+        Args:
+            food_objects: 세그멘테이션 결과의 음식 객체 목록 (bbox, mask 포함)
+            image: 원본 이미지
+            local_densities: food_objects와 같은 순서의 로컬 테이블 조회 결과 (LLM 실패 시 사용)
             
-            # 크기 조정 (최대 1536px)
-            max_size = 1536
-            h, w = image_rgb.shape[:2]
-            if max(h, w) > max_size:
-                scale = max_size / max(h, w)
-                new_h, new_w = int(h * scale), int(w * scale)
-                image_rgb = cv2.resize(image_rgb, (new_w, new_h))
+        Returns:
+            food_objects와 같은 순서의 밀도 정보 리스트 (LLM이 추정한 질량은 llm_mass_g에 포함)
+        """
+        if not food_objects:
+            return []
+        local_densities = local_densities or [None] * len(food_objects)
+        if not self.llm_model or image is None:
+            return [
+                self._get_fallback_density(food.get("class_name", "알수없음"), local_density=local_density)
+                for food, local_density in zip(food_objects, local_densities)
+            ]
+        
+        try:
+            # 원본 크기가 아닌 LLM 입력 크기 이미지 복사본에 번호 상자를 표시
+            context = ImageContext.of(image)
+            annotated = self._annotate_food_boxes(context.llm_bgr, food_objects, context.llm_scale)
+            processed_image, _ = encode_with_budget(annotated)
+            prompt = self._build_combined_density_prompt(food_objects, context.shape[:2])
             
-            # 음식 영역 강조 (마스크가 있는 경우)
-            if food_mask is not None:
-                # 마스크 크기 조정
-                mask_resized = cv2.resize(food_mask.astype(np.uint8), (image_rgb.shape[1], image_rgb.shape[0]))
-                
-                # 음식 영역 외부를 약간 어둡게 처리
-                background_mask = mask_resized == 0
-                image_rgb[background_mask] = (image_rgb[background_mask] * 0.7).astype(np.uint8)
+            multimodal_content = [
+                {"parts": [
+                    {"text": prompt},
+                    {"inline_data": {"mime_type": "image/jpeg", "data": processed_image}}
+                ]}
+            ]
             
-            # JPEG 인코딩
-            image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
-            _, buffer = cv2.imencode('.jpg', image_bgr, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            image_base64 = base64.b64encode(buffer).decode('utf-8')
+            response_text = llm_response_cache.generate_text(
+                self.llm_model,
+                multimodal_content,
+                generation_config=dict(
+                    temperature=0.1,
+                    top_p=0.8,
+                    candidate_count=1
+                ),
+            )
             
-            return image_base64
+            entries = self._parse_combined_density_response(response_text)
+        except Exception as e:
+            logging.error(f"통합 밀도 조회 실패: {e}")
+            entries = {}
+        
+        density_infos = []
+        for i, food in enumerate(food_objects):
+            yolo_class = food.get("class_name", "알수없음")
+            entry = entries.get(i)
+            if entry is None:
+                logging.warning(f"통합 응답에 음식 {i} 결과가 없어 기본 밀도 사용")
+                density_infos.append(self._get_fallback_density(yolo_class, local_density=local_densities[i]))
+                continue
+            try:
+                density_info = self._validate_density(entry, entry.get("food_name", yolo_class))
+            except Exception as e:
+                logging.warning(f"통합 응답의 음식 {i} 밀도 검증 실패, 기본 밀도 사용: {e}")
+                density_infos.append(self._get_fallback_density(yolo_class, local_density=local_densities[i]))
+                continue
+            density_infos.append(density_info)
+            logging.info(f"통합 조회 음식 {i}: '{density_info.get('food_name', 'unknown')}' → 밀도: {density_info['density_g_per_cm3']:.2f} g/cm³")
+        return density_infos
+    
+    def _annotate_food_boxes(self, image: np.ndarray, food_objects: List[Dict], scale: float = 1.0) -> np.ndarray:
+        """음식 bbox(원본 좌표 × scale)와 번호를 이미지 복사본에 표시 (LLM이 food_index와 영역을 대응시킬 수 있도록)"""
+        annotated = image.copy()
+        thickness = max(2, int(max(image.shape[:2]) / 400))
+        for i, food in enumerate(food_objects):
+            bbox = food.get("bbox") or []
+            if len(bbox) != 4:
+                continue
+            x1, y1, x2, y2 = [int(v * scale) for v in bbox]
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 255), thickness)
+            cv2.putText(annotated, str(i), (x1 + thickness, y1 + 12 * thickness), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.4 * thickness, (0, 255, 255), thickness)
+        return annotated
+    
+    def _build_combined_density_prompt(self, food_objects: List[Dict], image_shape: Tuple[int, int]) -> str:
+        """여러 음식 통합 식별 + 밀도/질량 조회 프롬프트"""
+        h, w = image_shape
+        food_lines = []
+        for i, food in enumerate(food_objects):
+            bbox = food.get("bbox") or [0, 0, 0, 0]
+            mask = food.get("mask")
+            mask_size = mask.shape[0] * mask.shape[1] if mask is not None else h * w
+            area_ratio = food.get("pixel_area", 0) / mask_size if mask_size else 0.0
+            food_lines.append(
+                f"- food_index {i}: bbox(이미지 대비 %) x={bbox[0] / w * 100:.1f}~{bbox[2] / w * 100:.1f}, "
+                f"y={bbox[1] / h * 100:.1f}~{bbox[3] / h * 100:.1f}, 마스크 면적 {area_ratio * 100:.1f}%, "
+                f"YOLO 클래스 {food.get('class_name', 'food')}"
+            )
+        food_list = "\n".join(food_lines)
+        
+        prompt = f"""여러 음식 식별 및 밀도/질량 정보 조회:
+
+🎯 작업 목표:
+이미지에 번호가 표시된 각 음식 영역을 보고 구체적인 음식을 식별한 후, 음식별 밀도와 질량을 제공해주세요.
+
+📋 YOLO 감지 정보 (이미지의 노란 상자와 번호가 food_index에 해당):
+{food_list}
+
+📊 밀도 참고 범위:
+- 액체류 (물, 우유): 1.0 g/cm³
+- 밥, 죽류: 1.2-1.5 g/cm³  
+- 빵, 케이크: 0.2-0.5 g/cm³
+- 고기, 생선: 0.9-1.1 g/cm³
+- 채소, 과일: 0.8-1.0 g/cm³
+- 견과류: 0.6-0.8 g/cm³
+- 면류: 1.0-1.2 g/cm³
+
+📋 응답 형식 (JSON 배열, 모든 food_index 포함):
+[
+    {{
+        "food_index": <번호>,
+        "food_name": "<구체적인 음식명>",
+        "density_g_per_cm3": <밀도값>,
+        "mass_g": <추정 질량(g)>,
+        "food_category": "<음식 카테고리>",
+        "confidence": <신뢰도(0.0~1.0)>,
+        "reasoning": "<식별 및 밀도/질량 결정 근거>"
+    }}
+]"""
+        
+        return prompt.strip()
+    
+    def _parse_combined_density_response(self, response_text: str) -> Dict[int, Dict]:
+        """통합 응답(JSON 배열)을 food_index별 딕셔너리로 변환"""
+        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
+        if not json_match:
+            raise ValueError("JSON 배열 응답을 찾을 수 없음")
+        parsed = json.loads(json_match.group())
+        
+        entries = {}
+        for item in parsed:
+            if not isinstance(item, dict) or item.get("food_index") is None:
+                continue
+            entry = dict(item)
+            mass = entry.pop("mass_g", None)
+            if isinstance(mass, (int, float)) and mass > 0:
+                entry["llm_mass_g"] = float(mass)
+            entry["source"] = "llm_combined"
+            entries[int(item["food_index"])] = entry
+        return entries
+    
+    def _prepare_image_for_llm(self, image: np.ndarray | ImageContext, food_mask: Mask = None,
+                               food_bbox: List = None) -> str:
+        """
+        LLM 입력용 이미지 전처리
+        bbox가 있으면 여백을 포함한 음식 영역만 잘라내고, JPEG 품질은 LLM_PAYLOAD_MAX_BYTES에 맞춥니다.
+        """
+        try:
+            return build_food_payload(image, food_bbox, food_mask)
             
         except Exception as e:
             logging.error(f"이미지 전처리 실패: {e}")
@@ -319,8 +479,17 @@ class DensityCalculator:
         
         return density_info
     
-    def _get_fallback_density(self, food_name: str, food_class: str = None) -> Dict:
-        """LLM 사용 불가시 기본 밀도 반환"""
+    def _get_fallback_density(self, food_name: str, food_class: str = None, local_density: Dict = None) -> Dict:
+        """
+        LLM 사용 불가시 기본 밀도 반환
+        local_density는 호출자가 먼저 조회한 로컬 테이블 결과입니다. (신뢰도가 낮은 후보도 키워드 추정보다 우선)
+        """
+        
+        # 로컬 밀도 테이블 후보가 있으면 우선 사용
+        if local_density is not None:
+            local_density = dict(local_density, fallback=True)
+            logging.info(f"음식 '{food_name}' 밀도 정보 (로컬 테이블, LLM 대체): {local_density['density_g_per_cm3']:.2f} g/cm³")
+            return local_density
         
         # 음식명에서 키워드 매칭
         food_lower = food_name.lower()
@@ -427,7 +596,11 @@ class DensityCalculator:
         densities = {}
         
         for food_name in food_list:
-            densities[food_name] = self.get_food_density_from_llm(food_name)
+            local_density = self.lookup_local_density(food_name)
+            if self.is_confident(local_density):
+                densities[food_name] = local_density
+            else:
+                densities[food_name] = self.get_food_density_from_llm(food_name, local_density=local_density)
         
         return densities
 
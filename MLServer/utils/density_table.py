@@ -0,0 +1,211 @@
+"""
+로컬 음식 밀도 테이블
+scripts/build_density_table.py로 생성한 CSV를 한 번만 읽어 음식명 n-gram 색인을 만들고,
+한글 자모 단위 퍼지 매칭으로 음식 밀도를 찾습니다. (LLM 밀도 조회 전에 먼저 사용)
+"""
+
+import csv
+import logging
+import re
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+# 구체적인 음식명이 아니므로 테이블을 조회하지 않는 클래스명
+GENERIC_FOOD_NAMES = {"food", "foods", "음식", "알수없음", "unknown", "파싱실패", ""}
+
+# 한글 호환 자모 (초성 19, 중성 21, 종성 27 + 없음)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+_NON_WORD = re.compile(r"[\s_\-·,./()\[\]]+")
+
+NGRAM_SIZE = 3
+
+
+def normalize_food_name(name: str) -> str:
+    """공백/구분자를 제거하고 소문자로 변환"""
+    return _NON_WORD.sub("", (name or "").strip().lower())
+
+
+def decompose_hangul(text: str) -> str:
+    """한글 음절을 자모로 분해합니다. (예: '김치' -> 'ㄱㅣㅁㅊㅣ')"""
+    jamo = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            index = code - _HANGUL_BASE
+            jamo.append(_CHOSEONG[index // 588])
+            jamo.append(_JUNGSEONG[(index % 588) // 28])
+            if index % 28:
+                jamo.append(_JONGSEONG[index % 28])
+        else:
+            jamo.append(char)
+    return "".join(jamo)
+
+
+def _ngrams(jamo: str) -> set:
+    padded = f"^{jamo}$"
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class DensityTable:
+    """
+    음식명 -> 밀도 테이블과 자모 n-gram 역색인.
+    - 정규화한 이름이 정확히 일치하면 점수 1.0
+    - 그 외에는 n-gram을 공유하는 후보들의 Dice 계수로 점수를 계산
+    - 유사도가 min_score 이상이면 후보로 반환하고, 항목 신뢰도 × 유사도가 min_confidence 이상일 때만
+      LLM 조회를 대신할 수 있는 적중(confident=True)으로 봅니다.
+    """
+
+    def __init__(self, path: Path = None, min_score: float = None, min_confidence: float = None):
+        self.path = Path(path or settings.DENSITY_TABLE_PATH)
+        self.min_score = settings.DENSITY_TABLE_MIN_SCORE if min_score is None else min_score
+        self.min_confidence = settings.DENSITY_TABLE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+
+        self._names: List[str] = []
+        self._categories: List[str] = []
+        self._densities = array("f")
+        self._confidences = array("f")
+        self._ngram_counts = array("H")
+        self._exact: Dict[str, int] = {}
+        self._index: Dict[str, array] = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.weak_matches = 0
+        self.misses = 0
+        self.skipped_generic = 0
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                self._load()
+            except Exception as e:
+                logging.error(f"로컬 밀도 테이블 로딩 실패 ({self.path}): {e}")
+            self._loaded = True
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            logging.warning(f"로컬 밀도 테이블이 없습니다: {self.path} (scripts/build_density_table.py로 생성)")
+            return
+        index: Dict[str, List[int]] = {}
+        with open(self.path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                key = normalize_food_name(row["food_name"])
+                if not key or key in self._exact:
+                    continue
+                entry_id = len(self._names)
+                self._names.append(row["food_name"])
+                self._categories.append(row["category"])
+                self._densities.append(float(row["density_g_per_cm3"]))
+                self._confidences.append(float(row["confidence"]))
+                self._exact[key] = entry_id
+                grams = _ngrams(decompose_hangul(key))
+                self._ngram_counts.append(len(grams))
+                for gram in grams:
+                    index.setdefault(gram, []).append(entry_id)
+        self._index = {gram: array("I", ids) for gram, ids in index.items()}
+        logging.info(f"로컬 밀도 테이블 로딩 완료: {len(self._names)}개 음식, n-gram {len(self._index)}개")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._names)
+
+    def lookup(self, food_name: str) -> Optional[Dict]:
+        """
+        음식명으로 밀도를 조회합니다.
+
+        Returns:
+            밀도 정보 딕셔너리 (density_calculator의 LLM 조회 결과와 같은 키) 또는 None (미스/낮은 점수/일반 클래스명)
+            confidence는 항목 신뢰도 × 유사도이며, min_confidence 미만이면 confident=False인 약한 후보입니다.
+            (분류 대표 밀도로 추정한 항목이 LLM 추정을 대신하지 않도록 호출자가 LLM 실패 시에만 사용)
+        """
+        key = normalize_food_name(food_name)
+        if key in GENERIC_FOOD_NAMES:
+            with self._stats_lock:
+                self.skipped_generic += 1
+            return None
+
+        self._ensure_loaded()
+        entry_id, score = self._match(key)
+        confidence = float(self._confidences[entry_id]) * score if entry_id is not None else 0.0
+        confident = confidence >= self.min_confidence
+        with self._stats_lock:
+            self.lookups += 1
+            if entry_id is None or score < self.min_score:
+                self.misses += 1
+                return None
+            if confident:
+                self.hits += 1
+            else:
+                self.weak_matches += 1
+
+        return {
+            "food_name": self._names[entry_id],
+            "density_g_per_cm3": round(float(self._densities[entry_id]), 3),
+            "food_category": self._categories[entry_id],
+            "confidence": round(confidence, 3),
+            "reasoning": f"로컬 밀도 테이블 매칭: '{food_name}' → '{self._names[entry_id]}' ({self._categories[entry_id]}, 유사도 {score:.2f})",
+            "match_score": round(score, 3),
+            "confident": confident,
+            "source": "local_table",
+        }
+
+    def _match(self, key: str):
+        """(가장 유사한 항목 id, 점수) 반환"""
+        if key in self._exact:
+            return self._exact[key], 1.0
+        if not self._index:
+            return None, 0.0
+
+        query = _ngrams(decompose_hangul(key))
+        shared = Counter()
+        for gram in query:
+            ids = self._index.get(gram)
+            if ids is not None:
+                shared.update(ids)
+        if not shared:
+            return None, 0.0
+
+        best_id, best_score = None, 0.0
+        for entry_id, common in shared.most_common(50):
+            score = 2.0 * common / (len(query) + self._ngram_counts[entry_id])
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    def snapshot(self) -> Dict:
+        """모니터링용 상태 정보 (적중률 포함)"""
+        with self._stats_lock:
+            return {
+                "entries": len(self._names),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "weak_matches": self.weak_matches,
+                "misses": self.misses,
+                "skipped_generic": self.skipped_generic,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "min_score": self.min_score,
+                "min_confidence": self.min_confidence,
+            }
+
+
+# 싱글톤 인스턴스 (첫 조회 시 로딩)
+density_table = DensityTable()
@@ -0,0 +1,214 @@
+"""
+2단계(메모리 LRU + SQLite 디스크) 캐시
+값은 pickle로 직렬화되어 저장되므로 조회할 때마다 원본과 독립된 사본이 반환됩니다.
+"""
+
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 메모리 적중의 디스크 사용 시각 갱신을 모아서 반영하는 단위
+TOUCH_BATCH_SIZE = 64
+
+
+class TieredCache:
+    """
+    메모리 LRU 앞단과 SQLite 디스크 계층으로 구성된 키-값 캐시.
+    - 메모리 계층: 최근 사용한 max_memory_entries개를 직렬화된 상태로 보관
+    - 디스크 계층: 전체 크기가 max_disk_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    - ttl_seconds가 지난 항목은 조회 시 미스로 처리되고 삭제됩니다.
+    """
+
+    def __init__(self, name: str, path: Path, max_memory_entries: int = 256,
+                 max_disk_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = None):
+        """
+        Args:
+            name: 로그/모니터링에 표시할 캐시 이름
+            path: SQLite 파일 경로 (None이면 메모리 계층만 사용)
+            max_memory_entries: 메모리 계층 최대 항목 수
+            max_disk_bytes: 디스크 계층 최대 크기 (바이트)
+            ttl_seconds: 항목 유효 시간 (None이면 만료 없음)
+        """
+        self.name = name
+        self.max_memory_entries = max(0, max_memory_entries)
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (생성 시각, 직렬화된 값)
+        self._pending_touches: Dict[str, float] = {}  # 메모리 적중으로 디스크에 아직 반영하지 않은 key -> 사용 시각
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path is not None:
+            try:
+                self._open_disk(Path(path))
+            except Exception as e:
+                # 디스크 계층을 열 수 없어도 메모리 계층만으로 동작
+                logging.error(f"[{self.name}] 디스크 캐시를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+                self._conn = None
+
+    def _open_disk(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시된 값을 반환합니다. 없거나 만료된 경우 None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, blob = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self._touch_disk(key, now)
+                    return pickle.loads(blob)
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        blob, created_at = row
+                        if not self._is_expired(created_at, now):
+                            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                            self._pending_touches.pop(key, None)
+                            self._remember(key, created_at, blob)
+                            self.disk_hits += 1
+                            return pickle.loads(blob)
+                        self._delete_disk(key)
+                except sqlite3.Error as e:
+                    logging.error(f"[{self.name}] 디스크 캐시 조회 실패: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """값을 저장합니다."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, blob)
+            if self._conn is None:
+                return
+            try:
+                self._delete_disk(key)
+                self._conn.execute(
+                    "INSERT INTO cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now)
+                )
+                self._disk_bytes += len(blob)
+                self._evict_disk()
+            except sqlite3.Error as e:
+                logging.error(f"[{self.name}] 디스크 캐시 저장 실패: {e}")
+
+    def clear(self) -> None:
+        """모든 항목을 삭제합니다."""
+        with self._lock:
+            self._memory.clear()
+            self._pending_touches.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM cache")
+                self._disk_bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """모니터링용 상태 정보"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches()
+                self._conn.close()
+                self._conn = None
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, blob: bytes) -> None:
+        """메모리 계층에 저장 (락을 잡은 상태에서 호출)"""
+        if self.max_memory_entries == 0:
+            return
+        self._memory[key] = (created_at, blob)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch_disk(self, key: str, now: float) -> None:
+        """
+        메모리 적중도 디스크 LRU 순서에 반영되도록 사용 시각을 모아 두었다가 한 번에 갱신합니다.
+        (락을 잡은 상태에서 호출, 디스크 정리 직전과 TOUCH_BATCH_SIZE개가 모일 때마다 반영)
+        """
+        if self._conn is None:
+            return
+        self._pending_touches[key] = now
+        if len(self._pending_touches) >= TOUCH_BATCH_SIZE:
+            self._flush_touches()
+
+    def _flush_touches(self) -> None:
+        if not self._pending_touches:
+            return
+        touches = [(accessed_at, key) for key, accessed_at in self._pending_touches.items()]
+        self._pending_touches.clear()
+        try:
+            self._conn.executemany("UPDATE cache SET accessed_at = ? WHERE key = ?", touches)
+        except sqlite3.Error as e:
+            logging.error(f"[{self.name}] 디스크 캐시 사용 시각 갱신 실패: {e}")
+
+    def _delete_disk(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._disk_bytes -= row[0]
+
+    def _evict_disk(self) -> None:
+        """디스크 계층 크기 제한 초과 시 만료된 항목, 이후 오래 사용되지 않은 항목 순으로 제거"""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        self._flush_touches()
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC").fetchall()
+        total = sum(size for _, size in rows)
+        # 매 저장마다 정리하지 않도록 최대 크기의 90%까지 비움
+        target = self.max_disk_bytes * 0.9
+        evicted = []
+        for key, size in rows:
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        if evicted:
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+            self.evictions += len(evicted)
+        self._disk_bytes = total
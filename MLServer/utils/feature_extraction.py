@@ -1,5 +1,4 @@
 import numpy as np
-import cv2
 from typing import Dict, List, Tuple, Optional
 import logging
 import math
@@ -8,6 +7,7 @@ import math
 from .camera_info_extractor import CameraInfoExtractor
 from .reference_objects import ReferenceObjectManager
 from config.settings import settings
+from .mask import Mask
 
 class FeatureExtractor:
     """
@@ -26,23 +26,33 @@ class FeatureExtractor:
         
         Args:
             segmentation_results: yolo_model.segment_image()의 결과.
-            depth_map: midas_model.estimate_depth()의 결과.
+            depth_map: midas_model.estimate_depth()의 결과. (원본 크기 또는 MiDaS 출력 해상도)
             image_path: 이미지 경로 (EXIF 정보 추출용).
             
         Returns:
             LLM에 전달될 구조화된 특징 딕셔너리.
         """
         try:
+            food_objects = segmentation_results.get("food_objects", [])
+            reference_objects = segmentation_results.get("reference_objects", [])
+            
+            # 모든 객체의 깊이 통계를 한 번에 계산 (객체 수와 관계없이 깊이 맵을 한 번만 순회)
+            depth_infos = self._get_batch_depth_infos(
+                depth_map, [obj["mask"] for obj in food_objects + reference_objects]
+            )
+            
             # 1. 음식 객체 기본 특징 추출
             food_features = self._extract_basic_food_features(
-                segmentation_results.get("food_objects", []), 
-                depth_map
+                food_objects, 
+                depth_map,
+                depth_infos[:len(food_objects)]
             )
             
             # 2. 기준 물체 기본 특징 추출
             reference_features = self._extract_basic_reference_features(
-                segmentation_results.get("reference_objects", []), 
-                depth_map
+                reference_objects, 
+                depth_map,
+                depth_infos[len(food_objects):]
             )
             
             # 3. 깊이 스케일 계산 (기준 물체 기반)
@@ -87,16 +97,16 @@ class FeatureExtractor:
                 "image_shape": (640, 480)
             }
     
-    def _extract_basic_food_features(self, food_objects: List[Dict], depth_map: np.ndarray) -> List[Dict]:
-        """음식 객체의 기본 특징만 추출"""
+    def _extract_basic_food_features(self, food_objects: List[Dict], depth_map: np.ndarray,
+                                     depth_infos: List[Dict] = None) -> List[Dict]:
+        """음식 객체의 기본 특징만 추출 (depth_infos: 미리 계산한 객체별 깊이 정보)"""
         features = []
+        if depth_infos is None:
+            depth_infos = self._get_batch_depth_infos(depth_map, [obj["mask"] for obj in food_objects])
         
-        for food_obj in food_objects:
+        for food_obj, depth_info in zip(food_objects, depth_infos):
             mask = food_obj["mask"]
             
-            # 기본 깊이 정보만 추출
-            depth_info = self._get_basic_depth_info(depth_map, mask)
-            
             # 간단한 부피 추정
             volume_estimate = self._estimate_basic_volume(mask, depth_info)
             
@@ -147,17 +157,17 @@ class FeatureExtractor:
         
         return enhanced_features
     
-    def _extract_basic_reference_features(self, reference_objects: List[Dict], depth_map: np.ndarray) -> List[Dict]:
-        """기준 물체의 기본 특징만 추출"""
+    def _extract_basic_reference_features(self, reference_objects: List[Dict], depth_map: np.ndarray,
+                                          depth_infos: List[Dict] = None) -> List[Dict]:
+        """기준 물체의 기본 특징만 추출 (depth_infos: 미리 계산한 객체별 깊이 정보)"""
         features = []
+        if depth_infos is None:
+            depth_infos = self._get_batch_depth_infos(depth_map, [obj["mask"] for obj in reference_objects])
         
-        for ref_obj in reference_objects:
+        for ref_obj, depth_info in zip(reference_objects, depth_infos):
             mask = ref_obj["mask"]
             class_name = ref_obj["class_name"]
             
-            # 기본 깊이 정보만 추출
-            depth_info = self._get_basic_depth_info(depth_map, mask)
-            
             # 기준 물체 정보 가져오기
             real_size = self.reference_manager.get_reference_object(class_name)
             if not real_size:
@@ -180,17 +190,55 @@ class FeatureExtractor:
         
         return features
     
-    def _get_basic_depth_info(self, depth_map: np.ndarray, mask: np.ndarray) -> Dict:
-        """기본 깊이 정보만 추출"""
+    def _get_batch_depth_infos(self, depth_map: np.ndarray, masks: List[Mask]) -> List[Dict]:
+        """
+        여러 객체의 깊이 정보를 한 번의 벡터 연산으로 계산합니다.
+        각 마스크의 box 영역에서 깊이 값을 모아 객체별로 연속된 구간으로 이어 붙인 뒤,
+        add/minimum/maximum.reduceat으로 개수·합·최소·최대를 한 번에 구합니다.
+        여러 마스크가 겹치는 픽셀은 각 객체의 구간에 모두 포함되므로 객체별 계산(_get_basic_depth_info)과 결과가 같습니다.
+        """
+        if not masks:
+            return []
+        try:
+            segments = []
+            for mask in masks:
+                if mask.box is None:
+                    segments.append(np.empty(0, depth_map.dtype))
+                    continue
+                (y1, y2, x1, x2), crop = mask.placement(depth_map.shape[:2])
+                segments.append(depth_map[y1:y2, x1:x2][crop > 0])
+
+            counts = np.array([segment.size for segment in segments], dtype=np.int64)
+            depth_infos = [{"mean_depth": 0.0, "depth_variation": 0.0} for _ in masks]
+            non_empty = np.flatnonzero(counts)
+            if non_empty.size == 0:
+                return depth_infos
+
+            values = np.concatenate([segments[i] for i in non_empty])
+            starts = np.concatenate(([0], np.cumsum(counts[non_empty])[:-1]))
+            sums = np.add.reduceat(values, starts, dtype=np.float64)
+            mins = np.minimum.reduceat(values, starts)
+            maxs = np.maximum.reduceat(values, starts)
+
+            for i, total, low, high in zip(non_empty, sums, mins, maxs):
+                depth_infos[i] = {
+                    "mean_depth": float(total / counts[i]),
+                    "depth_variation": float(high - low)
+                }
+            return depth_infos
+
+        except Exception as e:
+            logging.error(f"일괄 깊이 정보 추출 오류, 객체별 계산으로 대체: {e}")
+            return [self._get_basic_depth_info(depth_map, mask) for mask in masks]
+
+    def _get_basic_depth_info(self, depth_map: np.ndarray, mask: Mask) -> Dict:
+        """
+        기본 깊이 정보만 추출
+        깊이 맵이 마스크 격자와 크기가 달라도 (MiDaS 출력 해상도 등) 마스크 box 영역만 변환해 계산합니다.
+        """
         try:
-            # 마스크 크기 조정
-            if mask.shape[:2] != depth_map.shape[:2]:
-                mask = cv2.resize(mask.astype(np.uint8), 
-                                (depth_map.shape[1], depth_map.shape[0]), 
-                                interpolation=cv2.INTER_NEAREST)
-            
             # 마스크 영역의 깊이 값만 추출
-            object_depths = depth_map[mask > 0]
+            object_depths = mask.values(depth_map)
             
             if len(object_depths) == 0:
                 return {
@@ -210,11 +258,11 @@ class FeatureExtractor:
                 "depth_variation": 0.0
             }
     
-    def _estimate_basic_volume(self, mask: np.ndarray, depth_info: Dict) -> Dict:
+    def _estimate_basic_volume(self, mask: Mask, depth_info: Dict) -> Dict:
         """개선된 부피 추정 로직"""
         try:
             # 픽셀 면적
-            pixel_area = np.sum(mask > 0)
+            pixel_area = mask.area
             
             # 깊이 정보 활용
             mean_depth = depth_info.get("mean_depth", 0.0)
@@ -313,7 +361,7 @@ class FeatureExtractor:
         
         return relative_info
     
-    def _calculate_volume_with_reference_scaling(self, mask: np.ndarray, depth_info: Dict, 
+    def _calculate_volume_with_reference_scaling(self, mask: Mask, depth_info: Dict, 
                                               reference_features: List[Dict]) -> Dict:
         """개선된 기준 물체 기반 부피 계산"""
         try:
@@ -335,7 +383,7 @@ class FeatureExtractor:
                 return self._estimate_basic_volume(mask, depth_info)
             
             # 음식 객체의 실제 면적 계산
-            food_pixel_area = np.sum(mask > 0)
+            food_pixel_area = mask.area
             food_real_area_cm2 = food_pixel_area / pixel_per_cm2
             
             # 높이 계산 개선
@@ -388,24 +436,18 @@ class FeatureExtractor:
             logging.error(f"개선된 기준 물체 기반 부피 계산 오류: {e}")
             return self._estimate_basic_volume(mask, depth_info)
     
-    def _get_shape_factor_by_food_type(self, mask: np.ndarray) -> float:
+    def _get_shape_factor_by_food_type(self, mask: Mask) -> float:
         """음식 종류별 형태 보정 계수"""
         try:
-            # 마스크의 형태 분석
-            contours, _ = cv2.findContours(mask.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # 마스크의 형태 분석 (잘라낸 영역에서 한 번 계산해 마스크에 보관된 결과 사용)
+            metrics = mask.shape_metrics
             
-            if not contours:
+            if not metrics["contours"]:
                 return 0.6  # 기본값
             
-            # 가장 큰 컨투어 선택
-            largest_contour = max(contours, key=cv2.contourArea)
-            
-            # 원형도 계산
-            area = cv2.contourArea(largest_contour)
-            perimeter = cv2.arcLength(largest_contour, True)
-            
-            if perimeter > 0:
-                circularity = 4 * math.pi * area / (perimeter * perimeter)
+            # 가장 큰 컨투어의 원형도
+            if metrics["perimeter"] > 0:
+                circularity = metrics["circularity"]
                 
                 # 원형도에 따른 형태 보정
                 if circularity > 0.7:  # 원형에 가까움
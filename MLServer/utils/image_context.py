@@ -0,0 +1,77 @@
+"""
+요청 단위 이미지 컨텍스트
+한 요청 안에서 여러 단계(MiDaS, 밀도 조회, 멀티모달 검증)가 같은 이미지를 각자 변환/인코딩하지 않도록
+RGB 변환, LLM 입력 크기 축소, 인코딩된 LLM 페이로드(utils/llm_payload)를 처음 요청될 때 한 번만 계산해 보관합니다.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import cv2
+import numpy as np
+
+# LLM 입력 이미지의 긴 변 최대 크기
+LLM_IMAGE_MAX_SIZE = 1536
+
+
+class ImageContext:
+    """
+    원본 BGR 이미지와 지연 계산되는 파생 이미지들.
+    단계들이 서로 다른 스레드에서 동시에 접근하므로 계산은 잠금 안에서 한 번만 수행합니다.
+    파생 이미지는 공유되므로 호출자는 수정하지 말고 필요하면 복사해서 사용해야 합니다.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.bgr = image
+        self._lock = threading.Lock()
+        self._rgb = None
+        self._llm_bgr = None
+        self._llm_scale = 1.0
+        self._cached: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def of(cls, image) -> "ImageContext":
+        """ImageContext는 그대로, numpy 이미지는 새 컨텍스트로 감싸서 반환"""
+        return image if isinstance(image, cls) else cls(image)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.bgr.shape
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB 변환 이미지 (MiDaS 입력용)"""
+        if self._rgb is None:
+            with self._lock:
+                if self._rgb is None:
+                    self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def llm_bgr(self) -> np.ndarray:
+        """긴 변이 LLM_IMAGE_MAX_SIZE 이하로 축소된 BGR 이미지"""
+        if self._llm_bgr is None:
+            with self._lock:
+                if self._llm_bgr is None:
+                    h, w = self.bgr.shape[:2]
+                    if max(h, w) > LLM_IMAGE_MAX_SIZE:
+                        scale = LLM_IMAGE_MAX_SIZE / max(h, w)
+                        self._llm_scale = scale
+                        self._llm_bgr = cv2.resize(self.bgr, (int(w * scale), int(h * scale)))
+                    else:
+                        self._llm_bgr = self.bgr
+        return self._llm_bgr
+
+    @property
+    def llm_scale(self) -> float:
+        """원본 좌표 -> LLM 입력 이미지 좌표 배율"""
+        self.llm_bgr
+        return self._llm_scale
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """key별로 compute() 결과를 한 번만 계산해 보관합니다. (예: 인코딩된 LLM 페이로드)"""
+        if key not in self._cached:
+            value = compute()
+            with self._lock:
+                self._cached.setdefault(key, value)
+        return self._cached[key]
@@ -0,0 +1,91 @@
+"""
+해상도 제한 이미지 디코딩
+업로드/CLI 이미지를 긴 변이 MAX_IMAGE_SIZE 이하가 되도록 디코딩합니다.
+JPEG는 PIL draft 모드(DCT 스케일링, 1/2·1/4·1/8)로 처음부터 축소 디코딩하므로
+12MP 사진도 전체 해상도 배열을 만들지 않습니다. EXIF 회전은 load_image와 같이 적용합니다.
+"""
+
+import io
+import logging
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from config.settings import settings
+
+
+def decode_image_bytes(contents: bytes, max_size: int = None) -> Tuple[Optional[np.ndarray], Dict]:
+    """
+    이미지 바이트를 OpenCV BGR 이미지로 디코딩합니다.
+
+    Args:
+        contents: 업로드된 이미지 바이트
+        max_size: 긴 변의 최대 픽셀 수 (None이면 settings.MAX_IMAGE_SIZE, 0 이하면 제한 없음)
+
+    Returns:
+        (BGR 이미지 또는 None, 디코딩 정보 딕셔너리)
+        디코딩 정보: original_size/decoded_size (가로, 세로), scale (디코딩 크기 / 원본 크기), method
+    """
+    try:
+        with Image.open(io.BytesIO(contents)) as pil_image:
+            return _decode_pil(pil_image, max_size)
+    except Exception as e:
+        logging.warning(f"PIL 디코딩 실패, OpenCV로 재시도: {e}")
+
+    image = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, {}
+    return _cap_resolution(image, (image.shape[1], image.shape[0]), max_size, "opencv")
+
+
+def decode_image_file(image_path, max_size: int = None) -> Tuple[Optional[np.ndarray], Dict]:
+    """파일 경로에서 이미지를 해상도 제한 디코딩합니다. (decode_image_bytes와 같은 반환값)"""
+    try:
+        with Image.open(image_path) as pil_image:
+            return _decode_pil(pil_image, max_size)
+    except Exception as e:
+        logging.error(f"이미지 로드 실패: {image_path}, 오류: {e}")
+        return None, {}
+
+
+def _decode_pil(pil_image: Image.Image, max_size: int = None) -> Tuple[np.ndarray, Dict]:
+    """PIL 이미지를 draft 모드로 축소 디코딩한 뒤 EXIF 회전을 적용하고 BGR로 변환합니다."""
+    max_size = settings.MAX_IMAGE_SIZE if max_size is None else max_size
+    stored_w, stored_h = pil_image.size
+    method = "pil"
+
+    # JPEG: 목표 크기 이상을 유지하는 가장 작은 DCT 스케일로 디코딩
+    if max_size and max_size > 0 and max(stored_w, stored_h) > max_size and pil_image.format == "JPEG":
+        ratio = max_size / max(stored_w, stored_h)
+        pil_image.draft("RGB", (int(np.ceil(stored_w * ratio)), int(np.ceil(stored_h * ratio))))
+        method = "pil_draft"
+
+    # EXIF 회전 적용 (가로/세로가 바뀔 수 있으므로 원본 크기도 같은 방향으로 맞춤)
+    transposed = ImageOps.exif_transpose(pil_image)
+    if transposed.size != pil_image.size:
+        stored_w, stored_h = stored_h, stored_w
+    if transposed.mode != "RGB":
+        transposed = transposed.convert("RGB")
+
+    image = cv2.cvtColor(np.asarray(transposed), cv2.COLOR_RGB2BGR)
+    return _cap_resolution(image, (stored_w, stored_h), max_size, method)
+
+
+def _cap_resolution(image: np.ndarray, original_size: Tuple[int, int], max_size: int, method: str) -> Tuple[np.ndarray, Dict]:
+    """긴 변이 max_size를 넘으면 INTER_AREA로 축소하고 디코딩 정보를 만듭니다."""
+    max_size = settings.MAX_IMAGE_SIZE if max_size is None else max_size
+    h, w = image.shape[:2]
+    if max_size and max_size > 0 and max(h, w) > max_size:
+        ratio = max_size / max(h, w)
+        image = cv2.resize(image, (max(1, round(w * ratio)), max(1, round(h * ratio))), interpolation=cv2.INTER_AREA)
+        h, w = image.shape[:2]
+
+    original_w, original_h = original_size
+    return image, {
+        "original_size": [original_w, original_h],
+        "decoded_size": [w, h],
+        "scale": round(w / original_w, 6) if original_w else 1.0,
+        "method": method,
+    }
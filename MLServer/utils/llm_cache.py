@@ -0,0 +1,121 @@
+"""
+LLM 응답 캐시
+같은 모델/생성 설정/프롬프트/이미지로 호출하면 Gemini를 다시 호출하지 않고 저장된 응답 텍스트를 반환합니다.
+(LLM_TEMPERATURE=0.0, LLM_TOP_P=0.0 설정에서는 같은 입력에 대한 응답이 결정적입니다)
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import google.generativeai as genai
+
+from config.settings import settings
+from utils.disk_cache import TieredCache
+
+
+class LLMResponseCache:
+    """generate_content() 호출을 감싸는 응답 캐시 (메모리 LRU + SQLite)"""
+
+    def __init__(self, enabled: bool = None, cache: TieredCache = None):
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self._cache = cache or TieredCache(
+            name="llm-cache",
+            path=settings.LLM_CACHE_PATH,
+            max_memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+            max_disk_bytes=settings.LLM_CACHE_MAX_DISK_MB * 1024 * 1024,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        )
+
+    def generate_text(self, model, contents: Any, generation_config: Dict[str, Any]) -> str:
+        """
+        model.generate_content()를 호출하고 응답 텍스트를 반환합니다. 캐시에 있으면 호출하지 않습니다.
+
+        Args:
+            model: genai.GenerativeModel 인스턴스
+            contents: 프롬프트 문자열 또는 멀티모달 content 리스트 (inline_data 포함)
+            generation_config: GenerationConfig 인자 딕셔너리
+        """
+        key = self.key_for(getattr(model, "model_name", type(model).__name__), contents, generation_config) if self.enabled else None
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logging.info(f"LLM 응답 캐시 적중: {key[:12]}...")
+                return cached
+
+        request_options = {}
+        timeout = remaining_call_time()
+        if timeout is not None:
+            if timeout <= 0:
+                raise TimeoutError("LLM 호출 제한 시간 초과 (요청 전)")
+            request_options["timeout"] = timeout
+        response = model.generate_content(
+            contents,
+            generation_config=genai.types.GenerationConfig(**generation_config),
+            request_options=request_options or None,
+        )
+        text = response.text
+        if key is not None and text:
+            self._cache.set(key, text)
+        return text
+
+    @staticmethod
+    def key_for(model_name: str, contents: Any, generation_config: Dict[str, Any]) -> str:
+        """모델 이름, 생성 설정, 프롬프트 텍스트, 인라인 이미지 바이트 다이제스트로 키를 만듭니다."""
+        digest = hashlib.sha256()
+        digest.update(str(model_name).encode())
+        digest.update(json.dumps(generation_config, sort_keys=True, default=str).encode())
+        LLMResponseCache._update_digest(digest, contents)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _update_digest(digest, contents: Any) -> None:
+        if isinstance(contents, (bytes, bytearray)):
+            digest.update(hashlib.sha256(contents).digest())
+        elif isinstance(contents, str):
+            digest.update(contents.encode())
+        elif isinstance(contents, dict):
+            for key in sorted(contents):
+                digest.update(f"<{key}>".encode())
+                LLMResponseCache._update_digest(digest, contents[key])
+        elif isinstance(contents, (list, tuple)):
+            for item in contents:
+                digest.update(b"[")
+                LLMResponseCache._update_digest(digest, item)
+                digest.update(b"]")
+        else:
+            digest.update(repr(contents).encode())
+
+    def snapshot(self) -> Dict:
+        return {"enabled": self.enabled, **self._cache.snapshot()}
+
+
+_call_deadline = threading.local()
+
+
+@contextmanager
+def call_deadline(seconds: float):
+    """
+    이 블록 안에서 현재 스레드가 하는 LLM 호출을 지금부터 seconds초 안에 끝내도록 제한합니다.
+    호출마다 남은 시간을 요청 타임아웃(request_options)으로 넘기므로, 시간 초과된 호출이 스레드를 계속 붙잡지 않습니다.
+    """
+    previous = getattr(_call_deadline, "at", None)
+    _call_deadline.at = time.monotonic() + seconds
+    try:
+        yield
+    finally:
+        _call_deadline.at = previous
+
+
+def remaining_call_time() -> Optional[float]:
+    """call_deadline() 블록 안이면 남은 시간(초), 아니면 None"""
+    deadline = getattr(_call_deadline, "at", None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+# 싱글톤 인스턴스
+llm_response_cache = LLMResponseCache()
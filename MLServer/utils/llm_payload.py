@@ -0,0 +1,162 @@
+"""
+LLM 이미지 페이로드 생성
+전체 프레임 대신 프롬프트가 실제로 사용하는 영역만 잘라 보냅니다.
+- 밀도 조회: 음식 bbox + 여백 (음식 외부는 약간 어둡게)
+- 멀티모달 검증: 음식과 기준 물체 bbox의 합집합 + 여백
+JPEG 품질은 LLM_PAYLOAD_MAX_BYTES 이하가 되도록 조정합니다. (이미지 토큰 수와 업로드 시간 감소)
+"""
+
+import base64
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+from utils.image_context import ImageContext, LLM_IMAGE_MAX_SIZE
+from utils.mask import Mask
+
+MAX_DOWNSCALE_STEPS = 4  # 최소 품질로도 예산을 넘을 때 축소를 반복하는 최대 횟수
+MIN_DOWNSCALE_SIDE = 32  # 이보다 작게는 축소하지 않음 (짧은 변, 픽셀)
+
+
+def encode_with_budget(image_bgr: np.ndarray, max_bytes: int = None,
+                       max_quality: int = None, min_quality: int = None) -> Tuple[str, int]:
+    """
+    바이트 예산 이하가 되는 가장 높은 JPEG 품질로 인코딩합니다.
+    최소 품질로도 예산을 넘으면 예산 이하가 될 때까지 이미지를 축소해 다시 인코딩합니다.
+    (MIN_DOWNSCALE_SIDE까지 줄여도 넘으면 경고 로그를 남기고 마지막 결과를 반환)
+
+    Returns:
+        (base64 문자열, 사용한 JPEG 품질)
+    """
+    max_bytes = settings.LLM_PAYLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    max_quality = settings.LLM_JPEG_QUALITY_MAX if max_quality is None else max_quality
+    min_quality = settings.LLM_JPEG_QUALITY_MIN if min_quality is None else min_quality
+
+    def encode(image, quality):
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        if not ok:
+            raise ValueError("JPEG 인코딩 실패")
+        return buffer
+
+    best = encode(image_bgr, max_quality)
+    quality = max_quality
+    if max_bytes <= 0 or len(best) <= max_bytes:
+        return base64.b64encode(best).decode('utf-8'), quality
+
+    # 품질 이진 탐색 (예산 이하인 가장 높은 품질)
+    low, high = min_quality, max_quality - 1
+    fitted = None
+    while low <= high:
+        mid = (low + high) // 2
+        buffer = encode(image_bgr, mid)
+        if len(buffer) <= max_bytes:
+            fitted, quality = buffer, mid
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    if fitted is None:
+        # 최소 품질로도 초과: 바이트 수가 면적에 비례한다고 보고 예산 이하가 될 때까지 축소
+        h, w = image_bgr.shape[:2]
+        resized, fitted, quality = image_bgr, encode(image_bgr, min_quality), min_quality
+        for _ in range(MAX_DOWNSCALE_STEPS):
+            if len(fitted) <= max_bytes or min(resized.shape[:2]) <= MIN_DOWNSCALE_SIDE:
+                break
+            ratio = min(0.9, 0.9 * (max_bytes / len(fitted)) ** 0.5)
+            rh, rw = resized.shape[:2]
+            ratio = max(ratio, MIN_DOWNSCALE_SIDE / min(rh, rw))
+            resized = cv2.resize(resized, (max(1, int(rw * ratio)), max(1, int(rh * ratio))), interpolation=cv2.INTER_AREA)
+            fitted = encode(resized, min_quality)
+        logging.info(f"LLM 페이로드 예산 초과로 축소: {w}x{h} -> {resized.shape[1]}x{resized.shape[0]}")
+        if len(fitted) > max_bytes:
+            logging.warning(f"LLM 페이로드가 축소 후에도 예산 초과: {len(fitted):,}B > {max_bytes:,}B")
+
+    return base64.b64encode(fitted).decode('utf-8'), quality
+
+
+def expand_box(boxes: Iterable, image_shape: Tuple[int, ...], margin_ratio: float = None) -> Optional[Tuple[int, int, int, int]]:
+    """bbox들의 합집합을 긴 변 기준 margin_ratio만큼 넓히고 이미지 범위로 자릅니다. (유효한 bbox가 없으면 None)"""
+    margin_ratio = settings.LLM_CROP_MARGIN_RATIO if margin_ratio is None else margin_ratio
+    valid = [box for box in boxes if box is not None and len(box) == 4 and box[2] > box[0] and box[3] > box[1]]
+    if not valid:
+        return None
+    h, w = image_shape[:2]
+    x1 = min(box[0] for box in valid)
+    y1 = min(box[1] for box in valid)
+    x2 = max(box[2] for box in valid)
+    y2 = max(box[3] for box in valid)
+    margin = int(max(x2 - x1, y2 - y1) * margin_ratio)
+    x1, y1 = max(0, int(x1) - margin), max(0, int(y1) - margin)
+    x2, y2 = min(w, int(x2) + margin), min(h, int(y2) + margin)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+def _crop(context: ImageContext, region: Tuple[int, int, int, int]) -> np.ndarray:
+    """원본 이미지에서 영역을 잘라 긴 변 LLM_IMAGE_MAX_SIZE 이하로 맞춘 복사본"""
+    x1, y1, x2, y2 = region
+    crop = context.bgr[y1:y2, x1:x2]
+    h, w = crop.shape[:2]
+    if max(h, w) > LLM_IMAGE_MAX_SIZE:
+        scale = LLM_IMAGE_MAX_SIZE / max(h, w)
+        return cv2.resize(crop, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return crop.copy()
+
+
+def build_food_payload(image, bbox: List = None, food_mask: Mask = None) -> str:
+    """
+    음식 하나의 밀도 조회용 이미지 (base64 JPEG).
+    bbox + 여백으로 잘라내고, 마스크가 있으면 음식 외부를 약간 어둡게 처리합니다.
+    bbox가 없으면 전체 프레임을 사용합니다.
+    """
+    context = ImageContext.of(image)
+    region = expand_box([bbox], context.shape) if settings.LLM_ROI_CROP_ENABLED and bbox is not None else None
+    if region is None and food_mask is None:
+        return _full_frame_payload(context)
+    if region is None:
+        region = (0, 0, context.shape[1], context.shape[0])
+        crop = context.llm_bgr.copy()
+    else:
+        crop = _crop(context, region)
+
+    mask_crop = _crop_mask(food_mask, region, context.shape) if food_mask is not None else None
+    if mask_crop is not None and mask_crop.size:
+        mask_resized = cv2.resize(mask_crop, (crop.shape[1], crop.shape[0]), interpolation=cv2.INTER_NEAREST)
+        background = mask_resized == 0
+        crop[background] = (crop[background] * 0.7).astype(np.uint8)
+
+    payload, _ = encode_with_budget(crop)
+    return payload
+
+
+def build_scene_payload(image, boxes: Iterable = ()) -> str:
+    """
+    멀티모달 검증용 이미지 (base64 JPEG).
+    음식/기준 물체 bbox 합집합 + 여백으로 잘라냅니다. 감지된 객체가 없으면 전체 프레임을 사용합니다.
+    """
+    context = ImageContext.of(image)
+    region = expand_box(boxes, context.shape) if settings.LLM_ROI_CROP_ENABLED else None
+    if region is None:
+        return _full_frame_payload(context)
+    payload, _ = encode_with_budget(_crop(context, region))
+    return payload
+
+
+def _full_frame_payload(context: ImageContext) -> str:
+    """LLM 입력 크기 전체 프레임 페이로드 (요청 안에서 한 번만 인코딩)"""
+    return context.cached("llm_full_frame", lambda: encode_with_budget(context.llm_bgr)[0])
+
+
+def _crop_mask(mask: Mask, region: Tuple[int, int, int, int], image_shape: Tuple[int, ...]) -> np.ndarray:
+    """원본 이미지 좌표의 영역을 마스크 좌표(YOLO 마스크 해상도)로 변환해 잘라냅니다."""
+    image_h, image_w = image_shape[:2]
+    mask_h, mask_w = mask.shape[:2]
+    x1, y1, x2, y2 = region
+    sx, sy = mask_w / image_w, mask_h / image_h
+    mx1, my1 = int(x1 * sx), int(y1 * sy)
+    mx2, my2 = max(int(np.ceil(x2 * sx)), mx1 + 1), max(int(np.ceil(y2 * sy)), my1 + 1)
+    return mask.window(mx1, my1, mx2, my2)
@@ -0,0 +1,167 @@
+"""
+압축 마스크 표현
+YOLO 마스크를 전체 프레임 uint8 배열 대신 마스크 영역(bbox)만 잘라 비트 단위로 압축해 보관합니다.
+깊이 통계, 윤곽선, LLM 이미지 강조 등 후속 처리는 잘라낸 영역에서만 수행합니다.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import math
+
+import cv2
+import numpy as np
+
+
+class Mask:
+    """
+    bbox로 잘라낸 비트 압축 이진 마스크.
+    - shape: 마스크가 정의된 전체 격자 크기 (YOLO 마스크 해상도, (H, W))
+    - box: 마스크 픽셀을 감싸는 격자 좌표 bbox (x1, y1, x2, y2), 빈 마스크면 None
+    - shape_metrics: 윤곽선/원형도 (처음 사용할 때 한 번만 계산해 보관)
+    """
+
+    __slots__ = ("shape", "box", "area", "_bits", "_crop_shape", "_shape_metrics")
+
+    def __init__(self, shape: Tuple[int, int], box: Optional[Tuple[int, int, int, int]], bits: np.ndarray, area: int):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.box = box
+        self.area = int(area)
+        self._bits = bits
+        self._crop_shape = (box[3] - box[1], box[2] - box[0]) if box is not None else (0, 0)
+        self._shape_metrics = None
+
+    @classmethod
+    def from_dense(cls, dense: np.ndarray) -> "Mask":
+        """전체 격자 크기의 마스크 배열(0/1 또는 bool)에서 생성"""
+        binary = np.asarray(dense) > 0
+        rows = np.flatnonzero(binary.any(axis=1))
+        if rows.size == 0:
+            return cls(binary.shape[:2], None, np.zeros(0, np.uint8), 0)
+        cols = np.flatnonzero(binary.any(axis=0))
+        y1, y2 = int(rows[0]), int(rows[-1]) + 1
+        x1, x2 = int(cols[0]), int(cols[-1]) + 1
+        crop = binary[y1:y2, x1:x2]
+        return cls(binary.shape[:2], (x1, y1, x2, y2), np.packbits(crop, axis=None), int(crop.sum()))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._bits.nbytes)
+
+    @property
+    def crop(self) -> np.ndarray:
+        """box 영역의 uint8 마스크 (0/1)"""
+        h, w = self._crop_shape
+        return np.unpackbits(self._bits, count=h * w).reshape(h, w)
+
+    def to_full(self, shape: Tuple[int, ...] = None) -> np.ndarray:
+        """
+        전체 크기 uint8 마스크로 복원합니다.
+        shape가 격자 크기와 다르면 box 영역만 최근접 보간으로 변환해 배치합니다.
+        """
+        target_h, target_w = (shape or self.shape)[:2]
+        full = np.zeros((target_h, target_w), np.uint8)
+        if self.box is None:
+            return full
+        (y1, y2, x1, x2), crop = self.placement((target_h, target_w))
+        full[y1:y2, x1:x2] = crop
+        return full
+
+    def crop_of(self, array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        array(격자와 크기가 달라도 됨)에서 마스크 box에 해당하는 영역을 잘라냅니다.
+
+        Returns:
+            (array의 box 영역, 같은 크기의 uint8 마스크)
+        """
+        if self.box is None:
+            return array[0:0, 0:0], np.zeros((0, 0), np.uint8)
+        (y1, y2, x1, x2), crop = self.placement(array.shape[:2])
+        return array[y1:y2, x1:x2], crop
+
+    def values(self, array: np.ndarray) -> np.ndarray:
+        """마스크 영역에 해당하는 array 값들 (array 크기가 격자와 달라도 box 영역만 변환)"""
+        region, crop = self.crop_of(array)
+        return region[crop > 0]
+
+    def window(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+        """격자 좌표의 임의 영역에 해당하는 uint8 마스크 (box 밖은 0)"""
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.shape[1], x2), min(self.shape[0], y2)
+        out = np.zeros((max(0, y2 - y1), max(0, x2 - x1)), np.uint8)
+        if self.box is None or out.size == 0:
+            return out
+        bx1, by1, bx2, by2 = self.box
+        ix1, iy1, ix2, iy2 = max(x1, bx1), max(y1, by1), min(x2, bx2), min(y2, by2)
+        if ix2 > ix1 and iy2 > iy1:
+            out[iy1 - y1:iy2 - y1, ix1 - x1:ix2 - x1] = self.crop[iy1 - by1:iy2 - by1, ix1 - bx1:ix2 - bx1]
+        return out
+
+    @property
+    def shape_metrics(self) -> Dict:
+        """
+        형태 분석 결과 (격자 좌표). 잘라낸 영역에서 findContours를 한 번만 수행하고 보관합니다.
+        - contours: 외곽 윤곽선 리스트
+        - contour_area / perimeter: 가장 큰 윤곽선의 면적과 둘레
+        - circularity: 4π·면적/둘레² (둘레가 0이면 0.0)
+        """
+        if self._shape_metrics is None:
+            contours = []
+            if self.box is not None:
+                x1, y1 = self.box[0], self.box[1]
+                found, _ = cv2.findContours(self.crop, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x1, y1))
+                contours = list(found)
+            contour_area, perimeter, circularity = 0.0, 0.0, 0.0
+            if contours:
+                largest = max(contours, key=cv2.contourArea)
+                contour_area = float(cv2.contourArea(largest))
+                perimeter = float(cv2.arcLength(largest, True))
+                if perimeter > 0:
+                    circularity = 4 * math.pi * contour_area / (perimeter * perimeter)
+            self._shape_metrics = {
+                "contours": contours,
+                "contour_area": contour_area,
+                "perimeter": perimeter,
+                "circularity": circularity,
+            }
+        return self._shape_metrics
+
+    def contours(self, shape: Tuple[int, ...] = None) -> List[np.ndarray]:
+        """외곽 윤곽선 (격자 좌표, shape를 주면 그 크기의 좌표로 변환). shape_metrics의 윤곽선을 재사용합니다."""
+        contours = self.shape_metrics["contours"]
+        if shape is None or tuple(shape[:2]) == self.shape:
+            return list(contours)
+        scale = np.array([shape[1] / self.shape[1], shape[0] / self.shape[0]], dtype=np.float32)
+        return [np.round(contour * scale).astype(np.int32) for contour in contours]
+
+    def placement(self, target_shape: Tuple[int, int]) -> Tuple[Tuple[int, int, int, int], np.ndarray]:
+        """
+        box를 target_shape 좌표로 변환한 영역 (y1, y2, x1, x2)과 그 크기에 맞춘 uint8 마스크 조각.
+        빈 마스크에는 사용할 수 없습니다. (box가 None)
+        """
+        crop = self.crop
+        if tuple(target_shape) == self.shape:
+            x1, y1, x2, y2 = self.box
+            return (y1, y2, x1, x2), crop
+
+        sy, sx = target_shape[0] / self.shape[0], target_shape[1] / self.shape[1]
+        x1, y1, x2, y2 = self.box
+        ty1 = min(int(np.floor(y1 * sy)), target_shape[0] - 1)
+        tx1 = min(int(np.floor(x1 * sx)), target_shape[1] - 1)
+        ty2 = min(max(int(np.ceil(y2 * sy)), ty1 + 1), target_shape[0])
+        tx2 = min(max(int(np.ceil(x2 * sx)), tx1 + 1), target_shape[1])
+        # 최근접 보간: 전체 마스크를 target_shape로 보간했을 때의 해당 영역만 계산
+        # (box 바깥을 가리키는 인덱스는 0으로 채운 테두리를 참조)
+        padded = np.pad(crop, 1)
+        source_rows = np.floor(np.arange(ty1, ty2) / sy).astype(np.int64)
+        source_cols = np.floor(np.arange(tx1, tx2) / sx).astype(np.int64)
+        rows = np.clip(source_rows - y1 + 1, 0, crop.shape[0] + 1)
+        cols = np.clip(source_cols - x1 + 1, 0, crop.shape[1] + 1)
+        resized = padded[rows[:, None], cols[None, :]]
+        if not resized.any():
+            size = (tx2 - tx1, ty2 - ty1)
+            # 축소 시 작은 객체가 최근접 보간으로 사라지면 조금이라도 겹치는 픽셀을 사용
+            resized = (cv2.resize(crop.astype(np.float32), size, interpolation=cv2.INTER_AREA) > 0).astype(np.uint8)
+        return (ty1, ty2, tx1, tx2), resized
+
+    def __repr__(self) -> str:
+        return f"Mask(shape={self.shape}, box={self.box}, area={self.area})"
@@ -0,0 +1,53 @@
+"""
+간단한 인메모리 메트릭 유틸리티
+/pipeline-status 등에서 조회할 수 있도록 스레드 안전한 히스토그램을 제공합니다.
+"""
+
+import math
+import threading
+from typing import Dict, Sequence
+
+
+class Histogram:
+    """
+    누적 버킷 히스토그램 (Prometheus의 le 버킷과 같은 형식).
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        """
+        Args:
+            buckets: 버킷 상한값 목록 (오름차순으로 정렬되어 사용됩니다)
+        """
+        self._buckets = sorted(float(bucket) for bucket in buckets)
+        self._counts = [0] * (len(self._buckets) + 1)  # 마지막 칸은 +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """값 하나를 기록합니다."""
+        with self._lock:
+            index = len(self._buckets)
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        """현재 상태를 JSON 직렬화 가능한 딕셔너리로 반환합니다."""
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self._buckets + [math.inf], self._counts):
+                cumulative += count
+                label = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                buckets[label] = cumulative
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "mean": round(self._sum / self._count, 3) if self._count else 0.0,
+                "buckets": buckets,
+            }